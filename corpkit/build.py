@@ -557,7 +557,7 @@ def get_all_metadata_fields(corpus, include_speakers=False):
     This could take a while for very little infor
     """
     from corpkit.corpus import Corpus
-    from corpkit.constants import OPENER, PYTHON_VERSION, MAX_METADATA_FIELDS
+    from corpkit.constants import MAX_METADATA_FIELDS
 
     # allow corpus object
     if not isinstance(corpus, Corpus):
@@ -567,35 +567,19 @@ def get_all_metadata_fields(corpus, include_speakers=False):
 
     path = getattr(corpus, 'path', corpus)
 
-    fs = []
-    import os
-    for root, dirnames, filenames in os.walk(path):
-        for filename in filenames:
-            fs.append(os.path.join(root, filename))
-
     badfields = ['parse', 'sent_id']
     if not include_speakers:
         badfields.append('speaker')
 
-    fields = set()
-    for f in fs:
-        if PYTHON_VERSION == 2:
-            from corpkit.process import saferead
-            lines = saferead(f)[0].splitlines()
-        else:
-            with open(f, 'rb') as fo:
-                lines = fo.read().decode('utf-8', errors='ignore')
-                lines = lines.strip('\n')
-                lines = lines.splitlines()
-
-        lines = [l[2:].split('=', 1)[0] for l in lines if l.startswith('# ') \
-                 if not l.startswith('# sent_id')]
-        for l in lines:
-            if l not in fields and l not in badfields:
-                fields.add(l)
-        if len(fields) > MAX_METADATA_FIELDS:
-            break
-    return list(fields)
+    # the manifest only reads files that are new or changed
+    import os
+    if os.path.isdir(path):
+        found = corpus.manifest.metadata()
+    else:
+        from corpkit.manifest import count_file
+        found = count_file(path)['fields']
+    fields = [f for f in found if f not in badfields]
+    return fields[:MAX_METADATA_FIELDS + 1]
 
 def get_names(filepath, speakid):
     """
@@ -610,37 +594,27 @@ def get_names(filepath, speakid):
 
 def get_speaker_names_from_parsed_corpus(corpus, feature='speaker'):
     """
-    Use regex to get speaker names from parsed data without parsing it
+    Get the values of a metadata field (by default, speaker names) from
+    parsed data without parsing it
     """
     import os
-    import re
     from corpkit.constants import MAX_METADATA_VALUES
 
     path = corpus.path if hasattr(corpus, 'path') else corpus
     
-    list_of_files = []
     names = []
 
-    speakid = re.compile(r'^# %s=(.*)' % re.escape(feature), re.MULTILINE)
-    
-    # if passed a dir, do it for every file
+    # if passed a dir, get values for every file from the manifest
     if os.path.isdir(path):
-        for (root, dirs, fs) in os.walk(path):
-            for f in fs:
-                list_of_files.append(os.path.join(root, f))
+        if hasattr(corpus, 'manifest'):
+            names = corpus.manifest.metadata(feature)
+        else:
+            from corpkit.manifest import get_manifest
+            names = get_manifest(path).metadata(feature)
     elif os.path.isfile(path):
-        list_of_files.append(path)
-
-    for filepath in list_of_files:
-        res = get_names(filepath, speakid)
-        if not res:
-            continue
-        for i in res:
-            if i not in names:
-                names.append(i)
-        if len(names) > MAX_METADATA_VALUES:
-            break
-    return list(sorted(set(names)))
+        from corpkit.manifest import count_file
+        names = count_file(path)['fields'].get(feature, [])
+    return list(sorted(set(names)))[:MAX_METADATA_VALUES + 1]
 
 def rename_all_files(dirs_to_do):
     """
@@ -0,0 +1,709 @@
+"""
+corpkit: on-disk cache of interrogation results
+
+When asked for with `cache=True`, results are stored as pickles in the
+project's `cache` directory. They are keyed by a fingerprint of the corpus
+(paths, sizes and modification times of its files) and a canonical form
+of the query, so editing, adding or removing a corpus file means a fresh
+interrogation. Queries with arguments that can't be reliably keyed are
+not cached. When the cache grows past its size limit, the least recently
+used results are deleted.
+
+Parsed files can also be kept in memory for the rest of the session, up to
+a budget, so that repeated queries needn't parse them again. This is off
+unless turned on by :func:`~corpkit.corpus.Corpus.preload` or the
+`cache_documents` argument of an interrogation.
+"""
+
+from __future__ import print_function
+from corpkit.constants import STRINGTYPE
+
+CACHE_DIR = 'cache'
+MAX_SIZE = 500 * 1024 * 1024
+# estimated memory for parsed files kept during a session, once turned on
+DOCUMENT_CACHE_SIZE = 256 * 1024 * 1024
+
+# arguments that do not change the result
+IGNORED = ['root', 'note', 'print_info', 'save', 'cache', 'incremental', 'coded',
+           'checkpoint', 'resume', 'shared', 'prefetch', 'prefetch_memory', 'cache_documents',
+           'have_java']
+
+# interrogator arguments that change the result of searching a file
+SEARCH_PARAMS = ['search', 'query', 'show', 'exclude', 'excludemode', 'searchmode',
+                 'case_sensitive', 'subcorpora', 'files_as_subcorpora', 'just_metadata',
+                 'skip_metadata', 'preserve_case', 'lemmatag', 'only_format_match',
+                 'spelling', 'regex_nonword_filter', 'gramsize', 'conc', 'maxconc',
+                 'window', 'no_closed', 'no_punct', 'coref', 'show_conc_metadata',
+                 'fsi_index', 'dep_type']
+
+# interrogator keyword arguments that are only bookkeeping
+BOOKKEEPING = ['paralleling', 'outname', 'denominator', 'startnum', 'note', 'root',
+               'checkpoint_dir', 'printstatus']
+
+def _canonical(obj, lower_keys=False):
+    """
+    Turn a query into something that always serialises the same way
+
+    :raises: `TypeError` for objects that can't be reliably serialised
+    """
+    if isinstance(obj, dict):
+        out = []
+        for k, v in obj.items():
+            if lower_keys and isinstance(k, STRINGTYPE):
+                k = k.lower()
+            out.append([_canonical(k), _canonical(v)])
+        return sorted(out, key=repr)
+    if isinstance(obj, (set, frozenset)):
+        return sorted([_canonical(i) for i in obj], key=repr)
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(i) for i in obj]
+    if hasattr(obj, 'pattern') and hasattr(obj, 'flags'):
+        return ['regex', obj.pattern, obj.flags]
+    if obj is None or isinstance(obj, (bool, int, float) + tuple([STRINGTYPE])):
+        return obj
+    if hasattr(obj, 'path'):
+        return ['path', obj.path]
+    import numpy as np
+    if isinstance(obj, np.generic):
+        return obj.item()
+    import pandas as pd
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        import hashlib
+        # repr() of a big frame leaves rows out, so hash every value
+        hashed = pd.util.hash_pandas_object(obj, index=True).values
+        names = list(obj.columns) if isinstance(obj, pd.DataFrame) else [obj.name]
+        return [type(obj).__name__, _canonical(names), hashlib.sha1(hashed.tobytes()).hexdigest()]
+    raise TypeError('Cannot make a cache key from %s' % type(obj).__name__)
+
+def corpus_fingerprint(corpus, refresh=True):
+    """
+    Hash the paths, sizes and modification times of a corpus' files, as
+    found by refreshing its manifest
+
+    :param refresh: check for files edited in place since the last scan
+    :returns: `str`
+    """
+    import os
+    import hashlib
+    hsh = hashlib.sha1()
+    if os.path.isfile(corpus.path):
+        st = os.stat(corpus.path)
+        stats = [(os.path.basename(corpus.path), st.st_size, st.st_mtime)]
+    else:
+        from corpkit.manifest import get_manifest
+        manifest = getattr(corpus, 'manifest', None) or get_manifest(corpus.path)
+        if refresh:
+            manifest.refresh()
+        rel = os.path.relpath(os.path.abspath(corpus.path), manifest.path)
+        prefix = '' if rel == '.' else rel + os.sep
+        stats = [(f[len(prefix):], e['size'], e['mtime'])
+                 for f, e in sorted(manifest.entries.items()) if f.startswith(prefix)]
+    for name, size, mtime in stats:
+        info = '%s\t%d\t%r\n' % (name, size, mtime)
+        hsh.update(info.encode('utf-8'))
+    return hsh.hexdigest()
+
+def _corpus_prefix(corpus):
+    import os
+    import hashlib
+    return hashlib.sha1(os.path.abspath(corpus.path).encode('utf-8')).hexdigest()[:12]
+
+def make_key(corpus, search, args, kwargs):
+    """
+    Make a cache key for an interrogation of a corpus
+
+    :returns: `str`
+    """
+    import json
+    import hashlib
+    import corpkit
+    query = {k: v for k, v in kwargs.items() if k not in IGNORED}
+    for name in ['search', 'exclude']:
+        if name in query:
+            query[name] = _canonical(query[name], lower_keys=True)
+    if isinstance(query.get('show'), STRINGTYPE):
+        query['show'] = [query['show']]
+    dlist = getattr(corpus, '_dlist', None)
+    parts = [corpkit.__version__,
+             corpus_fingerprint(corpus),
+             corpus.level,
+             _canonical(getattr(corpus, 'kwa', None)),
+             _canonical([getattr(f, 'path', f) for f in dlist]) if dlist else None,
+             _canonical(search, lower_keys=True),
+             _canonical(list(args)),
+             _canonical(query)]
+    dumped = json.dumps(parts, sort_keys=True, default=repr)
+    return _corpus_prefix(corpus) + '-' + hashlib.sha1(dumped.encode('utf-8')).hexdigest()
+
+class ResultCache(object):
+    """
+    A directory of pickled results, with least-recently-used eviction
+
+    :param cachedir: directory to store results in
+    :type cachedir: `str`
+    :param max_size: total size in bytes before old results are deleted
+    :type max_size: `int`
+    """
+
+    def __init__(self, cachedir=None, max_size=None):
+        self.cachedir = cachedir or CACHE_DIR
+        self.max_size = max_size or MAX_SIZE
+
+    def _path(self, key):
+        import os
+        return os.path.join(self.cachedir, key + '.p')
+
+    def _entries(self):
+        """
+        Get (last use, size, path) for each stored result, oldest first
+        """
+        import os
+        import glob
+        out = []
+        for path in glob.glob(os.path.join(self.cachedir, '*.p')):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return sorted(out)
+
+    def size(self):
+        """
+        Total size of the cache in bytes
+        """
+        return sum(s for _, s, _ in self._entries())
+
+    def get(self, key):
+        """
+        Load a result, or return `None` if it is not stored
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        path = self._path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as fo:
+                res, query = pickle.load(fo)
+        except Exception:
+            # unreadable, e.g. from an older version of pandas
+            self.delete(key)
+            return None
+        if query is not None:
+            try:
+                res.query = query
+            except AttributeError:
+                pass
+        # mark as recently used
+        os.utime(path, None)
+        return res
+
+    def set(self, key, res):
+        """
+        Store a result, then evict old results if over the size limit
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        from corpkit.process import sanitise_dict
+        if not os.path.isdir(self.cachedir):
+            os.makedirs(self.cachedir)
+        query = getattr(res, 'query', None)
+        safe_query = sanitise_dict(query) if isinstance(query, dict) else None
+        path = self._path(key)
+        tmp = path + '.tmp'
+        try:
+            if isinstance(query, dict):
+                res.query = safe_query
+            with open(tmp, 'wb') as fo:
+                pickle.dump((res, safe_query), fo, protocol=pickle.HIGHEST_PROTOCOL)
+            if os.path.isfile(path):
+                os.remove(path)
+            os.rename(tmp, path)
+        except Exception:
+            # not worth failing an interrogation over
+            if os.path.isfile(tmp):
+                os.remove(tmp)
+            return False
+        finally:
+            if isinstance(query, dict):
+                res.query = query
+        self.evict()
+        return True
+
+    def delete(self, key):
+        import os
+        path = self._path(key)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def evict(self):
+        """
+        Delete least recently used results until under the size limit
+        """
+        import os
+        entries = self._entries()
+        total = sum(s for _, s, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self, corpus=None):
+        """
+        Delete all stored results, or just those for `corpus`
+
+        :returns: number of results deleted
+        """
+        import os
+        prefix = _corpus_prefix(corpus) + '-' if corpus is not None else ''
+        deleted = 0
+        for _, _, path in self._entries():
+            if os.path.basename(path).startswith(prefix):
+                os.remove(path)
+                deleted += 1
+        return deleted
+
+def query_params(locs, kwargs):
+    """
+    Get everything that affects an interrogation's per-file results
+
+    :param locs: the interrogator's arguments
+    :param kwargs: the interrogator's extra keyword arguments
+    :returns: `dict`
+    """
+    params = {k: locs.get(k) for k in SEARCH_PARAMS}
+    params['kwargs'] = {k: v for k, v in kwargs.items() if k not in BOOKKEEPING}
+    return params
+
+def query_hash(params):
+    """
+    Hash the output of :func:`query_params`
+
+    :returns: `str`
+    """
+    import json
+    import hashlib
+    params = dict(params)
+    for name in ['search', 'exclude']:
+        if name in params:
+            params[name] = _canonical(params[name], lower_keys=True)
+    dumped = json.dumps(_canonical(params), sort_keys=True, default=repr)
+    return hashlib.sha1(dumped.encode('utf-8')).hexdigest()
+
+def file_fingerprint(path):
+    """
+    Identify a version of a file by its size and modification time
+    """
+    import os
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime)
+
+class FileResults(object):
+    """
+    Per-file search results for one query, for incremental interrogation
+
+    Each corpus file's results are pickled along with its fingerprint, so
+    that a later run of the same query need only search files that were
+    added or changed. Results are grouped by directory, so that entries
+    for deleted files can be pruned.
+
+    :param params: everything that affects the result of searching a file,
+                   from :func:`query_params`
+    :type params: `dict`
+    """
+
+    def __init__(self, params, cachedir=None):
+        import os
+        self.directory = os.path.join(cachedir or CACHE_DIR, 'incremental', query_hash(params))
+        self.seen = {}
+        self.reused = 0
+
+    def _path(self, filepath):
+        import os
+        import hashlib
+        filepath = os.path.abspath(filepath)
+        bucket = hashlib.sha1(os.path.dirname(filepath).encode('utf-8')).hexdigest()
+        return bucket, os.path.join(self.directory, bucket, os.path.basename(filepath) + '.p')
+
+    def _load(self, filepath, results=True):
+        """
+        Read the stored entry for a file, if it is still current. The
+        fingerprint is pickled first, so that it can be checked without
+        loading the results.
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        bucket, path = self._path(filepath)
+        self.seen.setdefault(bucket, set()).add(os.path.basename(path))
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as fo:
+                if pickle.load(fo) != file_fingerprint(filepath):
+                    return None
+                return pickle.load(fo) if results else True
+        except Exception:
+            return None
+
+    def fresh(self, filepath):
+        """
+        Check whether there are stored results for a file that has not
+        changed since, without loading them
+        """
+        return bool(self._load(filepath, results=False))
+
+    def get(self, filepath):
+        """
+        Get the stored `(res, conc_res)` for a file, or `None` if the
+        file is new or has changed
+        """
+        stored = self._load(filepath)
+        if stored is not None:
+            self.reused += 1
+        return stored
+
+    def set(self, filepath, res, conc_res):
+        """
+        Store the results of searching a file
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        bucket, path = self._path(filepath)
+        self.seen.setdefault(bucket, set()).add(os.path.basename(path))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'wb') as fo:
+                pickle.dump(file_fingerprint(filepath), fo, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump((res, conc_res), fo, protocol=pickle.HIGHEST_PROTOCOL)
+            if os.path.isfile(path):
+                os.remove(path)
+            os.rename(tmp, path)
+        except Exception:
+            if os.path.isfile(tmp):
+                os.remove(tmp)
+
+    def prune(self):
+        """
+        Delete stored results for files that were not seen in this run,
+        in the directories that were
+
+        :returns: number of results deleted
+        """
+        import os
+        deleted = 0
+        for bucket, names in self.seen.items():
+            bucketdir = os.path.join(self.directory, bucket)
+            if not os.path.isdir(bucketdir):
+                continue
+            for name in os.listdir(bucketdir):
+                if name.endswith('.p') and name not in names:
+                    os.remove(os.path.join(bucketdir, name))
+                    deleted += 1
+        return deleted
+
+def checkpoint_directory(params, corpus, cachedir=None):
+    """
+    Get the directory for checkpoints of an interrogation. It depends on
+    the paths and fingerprints of the corpus as well as the query, so a
+    checkpoint is never resumed against another or a changed corpus.
+
+    :param params: output of :func:`query_params`
+    :param corpus: the corpus, or a `list` of the parts to be interrogated
+    """
+    import os
+    parts = corpus if isinstance(corpus, list) else [corpus]
+    # parts of one corpus share a manifest, which need only be refreshed once
+    params = dict(params, corpus=[(os.path.abspath(c.path), corpus_fingerprint(c, refresh=not n))
+                                  for n, c in enumerate(parts)])
+    return os.path.join(cachedir or CACHE_DIR, 'checkpoints', query_hash(params))
+
+def checkpoint_name(corpus, paralleling=None, outname=''):
+    """
+    Name the checkpoint of an interrogation, or of one of its parallel tasks
+
+    :param paralleling: the number of the parallel task, if any
+    """
+    if paralleling is not None:
+        return 'task-%d' % paralleling
+    return corpus.path + outname
+
+class Checkpoint(object):
+    """
+    Saved progress of an interrogation, so that it can be resumed
+
+    The state is whatever the interrogator needs to carry on: its
+    accumulated results, plus the files it has finished with. Each
+    parallel worker has its own checkpoint file in the same directory.
+
+    :param directory: from :func:`checkpoint_directory`
+    :param name: from :func:`checkpoint_name`
+    :param every: save after this many files
+    """
+
+    def __init__(self, directory, name, every=100):
+        import os
+        import hashlib
+        self.directory = directory
+        self.path = os.path.join(directory, hashlib.sha1(name.encode('utf-8')).hexdigest() + '.p')
+        self.every = every
+        self.done = set()
+        self.since_save = 0
+        # true while a file's results are only partly added
+        self.busy = False
+
+    def load(self):
+        """
+        Get the saved state, or `None` if there is none
+
+        :returns: `dict`
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        if not os.path.isfile(self.path):
+            return None
+        with open(self.path, 'rb') as fo:
+            state = pickle.load(fo)
+        self.done = set(state.get('done', []))
+        return state
+
+    def save(self, state):
+        """
+        Write the state to disk, along with the files done so far
+        """
+        import os
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        state = dict(state)
+        state['done'] = self.done
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as fo:
+            pickle.dump(state, fo, protocol=pickle.HIGHEST_PROTOCOL)
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+        os.rename(tmp, self.path)
+        self.since_save = 0
+
+    def finished(self, path, state_getter):
+        """
+        Mark a file or subcorpus as done, saving if it is time to
+
+        :param state_getter: function returning the state to save
+        """
+        self.done.add(path)
+        self.busy = False
+        self.since_save += 1
+        if self.since_save >= self.every:
+            self.save(state_getter())
+
+    def clear(self):
+        """
+        Delete the saved state, and the directory if nothing else is in it
+        """
+        import os
+        for path in [self.path, self.path + '.tmp']:
+            if os.path.isfile(path):
+                os.remove(path)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+def clear_checkpoints(directory, names):
+    """
+    Delete the named checkpoints in a directory from
+    :func:`checkpoint_directory`, leaving any others
+    """
+    if not directory:
+        return
+    for name in names:
+        Checkpoint(directory, name).clear()
+
+def _frame_size(df):
+    """
+    Estimate the memory used by a `DataFrame`, measuring strings in a
+    sample of its rows
+    """
+    if len(df) <= 1000:
+        return int(df.memory_usage(deep=True).sum())
+    sample = df.iloc[:1000].memory_usage(deep=True).sum()
+    return int(sample * len(df) / 1000.0)
+
+class DocumentCache(object):
+    """
+    Parsed CONLL files, least recently used first, bounded by their
+    estimated size in memory
+
+    A file is parsed again if it has changed on disk, or if the cached
+    version was parsed with fewer columns than are needed.
+    """
+
+    def __init__(self, max_bytes=DOCUMENT_CACHE_SIZE):
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "<corpkit.cache.DocumentCache instance: %d files, %.1fMB of %.1fMB>" % \
+               (len(self), self.nbytes / 1048576.0, self.max_bytes / 1048576.0)
+
+    def get(self, path, span=None, usecols=None, data=None):
+        """
+        Get a parsed file, parsing and storing it if need be
+
+        Arguments are those of :func:`corpkit.conll.parse_conll`. A copy
+        is returned, so callers may change it freely.
+
+        :returns: `DataFrame`, or `None` if the file could not be parsed
+        """
+        import os
+        from corpkit.conll import parse_conll
+        if not self.max_bytes:
+            return parse_conll(path, usecols=usecols, span=span, data=data)
+        key = (os.path.abspath(path), span)
+        stamp = file_fingerprint(path)
+        entry = self.items.get(key)
+        if entry is not None:
+            cached_stamp, cols, df, size = entry
+            if cached_stamp == stamp and (cols is None or (usecols and set(usecols) <= set(cols))):
+                # mark as recently used
+                self.items[key] = self.items.pop(key)
+                self.hits += 1
+                return self._copy(df)
+        self.misses += 1
+        df = parse_conll(path, usecols=usecols, span=span, data=data)
+        if df is None:
+            return
+        self.discard(key)
+        size = _frame_size(df)
+        if size <= self.max_bytes:
+            self.items[key] = (stamp, list(usecols) if usecols else None, df, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                self.discard(next(iter(self.items)))
+        return self._copy(df)
+
+    @staticmethod
+    def _copy(df):
+        # strings are not copied, only the arrays that point to them
+        out = df.copy()
+        out._metadata = df._metadata
+        return out
+
+    def discard(self, key):
+        """
+        Forget a file
+        """
+        entry = self.items.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[3]
+
+    def clear(self):
+        """
+        Forget every file
+        """
+        self.items.clear()
+        self.nbytes = 0
+
+    def enable(self, max_bytes=None):
+        """
+        Start keeping parsed files, if not already doing so
+
+        :param max_bytes: memory budget (default 256MB)
+        """
+        if max_bytes is not None and max_bytes is not True:
+            self.max_bytes = max_bytes
+        elif not self.max_bytes:
+            self.max_bytes = DOCUMENT_CACHE_SIZE
+
+    def disable(self):
+        """
+        Stop keeping parsed files, and forget those kept so far
+        """
+        self.max_bytes = 0
+        self.clear()
+
+# shared by every interrogation in this process, and off until enabled
+documents = DocumentCache(max_bytes=0)
+
+def clear_cache(corpus=None, cachedir=None):
+    """
+    Delete cached results, for all corpora or just `corpus`. Stored
+    results for incremental interrogation are deleted only if no corpus
+    is given.
+
+    :returns: number of results deleted
+    """
+    import os
+    import shutil
+    deleted = ResultCache(cachedir).clear(corpus)
+    incremental = os.path.join(cachedir or CACHE_DIR, 'incremental')
+    if corpus is None and os.path.isdir(incremental):
+        shutil.rmtree(incremental)
+    return deleted
+
+def cached(method):
+    """
+    Decorate a `Corpus` method so that its results are cached on disk
+
+    The method accepts an extra `cache` keyword argument: `True` to use the
+    cache, `False` (the default) to bypass it, or `'refresh'` to
+    interrogate again and replace the stored result.
+    """
+    import functools
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        from time import localtime, strftime
+        cache = kwargs.pop('cache', False)
+        if not cache:
+            return method(self, *args, **kwargs)
+        search = args[0] if args else kwargs.get('search')
+        try:
+            key = make_key(self, search, args[1:], kwargs)
+        except (OSError, TypeError):
+            return method(self, *args, **kwargs)
+        store = ResultCache()
+        if cache != 'refresh':
+            res = store.get(key)
+            if res is not None:
+                if kwargs.get('print_info', True):
+                    thetime = strftime("%H:%M:%S", localtime())
+                    print('%s: Loaded cached result for %s' % (thetime, self.name))
+                save = kwargs.get('save')
+                if isinstance(save, STRINGTYPE) and hasattr(res, 'save'):
+                    res.save(self.name + '-' + save)
+                return res
+        res = method(self, *args, **kwargs)
+        if res is not None and not isinstance(res, STRINGTYPE):
+            store.set(key, res)
+        return res
+    return wrapper
@@ -0,0 +1,297 @@
+"""
+corpkit: integer-coded counting of interrogation results
+
+Rather than keeping a `Counter` of strings for each subcorpus, results are
+mapped to integer ids from a shared vocabulary, and each subcorpus keeps
+counts of only the ids found in it. Strings are only decoded once, when the
+results matrix is built.
+"""
+
+from __future__ import print_function
+
+class Vocabulary(object):
+    """
+    A two-way mapping between results and integer ids
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, item):
+        return item in self.ids
+
+    def _add(self, item):
+        self.ids[item] = len(self.words)
+        self.words.append(item)
+        return self.ids[item]
+
+    def encode(self, items):
+        """
+        Get the id of each item, adding new items to the vocabulary
+
+        :returns: `numpy` array of `int`s
+        """
+        import numpy as np
+        ids = self.ids
+        codes = [ids[i] if i in ids else self._add(i) for i in items]
+        return np.array(codes, dtype=np.int64)
+
+    def decode(self, codes):
+        """
+        Get the item for each id
+        """
+        return [self.words[i] for i in codes]
+
+class CodedCounts(object):
+    """
+    Integer-coded counts of results for each subcorpus
+
+    Each subcorpus has a `dict` of vocabulary ids and counts, holding only
+    the results found in it, so that neither time nor memory grows with the
+    size of the whole vocabulary. The dense matrix is only made by
+    :func:`matrix`.
+    """
+
+    def __init__(self, vocab=None):
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self.counts = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __contains__(self, name):
+        return name in self.counts
+
+    def __repr__(self):
+        return "<corpkit.coded.CodedCounts instance: %d subcorpora, %d unique results>" % \
+               (len(self), len(self.vocab))
+
+    def keys(self):
+        return self.counts.keys()
+
+    def _count(self, items):
+        """
+        Count a list of items, or a `dict`/`Counter` of counts
+
+        :returns: `numpy` arrays of the ids found, and their counts
+        """
+        import numpy as np
+        if hasattr(items, 'items'):
+            codes = self.vocab.encode(list(items.keys()))
+            return codes, np.array(list(items.values()), dtype=np.int64)
+        ids, counts = np.unique(self.vocab.encode(items), return_counts=True)
+        return ids, counts.astype(np.int64)
+
+    def add(self, name, items, discard=False):
+        """
+        Count results for a subcorpus
+
+        :param name: subcorpus name
+        :param items: results for one file
+        :type items: `list`, or `dict` of counts
+        :param discard: drop results under this frequency (`int`), or this
+                        proportion of the least frequent results (`float`)
+        """
+        import numpy as np
+        ids, counts = self._count(items)
+        if isinstance(discard, float):
+            nkeep = len(ids) - len(ids) * discard
+            ranked = np.argsort(-counts, kind='mergesort')[:int(nkeep) + 1]
+            ids, counts = ids[ranked], counts[ranked]
+        elif isinstance(discard, int) and not isinstance(discard, bool):
+            keep = counts >= discard
+            ids, counts = ids[keep], counts[keep]
+        existing = self.counts.setdefault(name, {})
+        for i, count in zip(ids.tolist(), counts.tolist()):
+            existing[i] = existing.get(i, 0) + count
+
+    def merge(self, other):
+        """
+        Add counts from another :class:`CodedCounts` object
+        """
+        # map the other vocabulary onto this one
+        recode = None
+        if other.vocab is not self.vocab:
+            recode = self.vocab.encode(other.vocab.words).tolist()
+        for name, counts in other.counts.items():
+            existing = self.counts.setdefault(name, {})
+            for i, count in counts.items():
+                if recode is not None:
+                    i = recode[i]
+                existing[i] = existing.get(i, 0) + count
+
+    def items(self):
+        """
+        Yield subcorpus names and `Counters` of their results
+        """
+        from collections import Counter
+        words = self.vocab.words
+        for name, counts in self.counts.items():
+            yield name, Counter({words[i]: c for i, c in counts.items() if c})
+
+    def _used(self):
+        """
+        Get the sorted ids that have been counted in any subcorpus
+        """
+        import numpy as np
+        used = set()
+        for counts in self.counts.values():
+            used.update(counts)
+        return np.array(sorted(used), dtype=np.int64)
+
+    def matrix(self):
+        """
+        Get the counts as a 2-D array, leaving out results never counted
+
+        :returns: sorted subcorpus names, results, and a `numpy` array
+        """
+        import numpy as np
+        index = sorted(self.counts.keys())
+        used = self._used()
+        mat = np.zeros((len(index), len(used)), dtype=np.int64)
+        for row, name in enumerate(index):
+            counts = self.counts[name]
+            if counts:
+                ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+                mat[row, np.searchsorted(used, ids)] = values
+        keep = np.flatnonzero(mat.any(axis=0))
+        return index, self.vocab.decode(used[keep]), mat[:, keep]
+
+    def to_coo(self):
+        """
+        Get the counts as a `scipy.sparse.coo_matrix`, without building
+        the dense matrix
+
+        :returns: sorted subcorpus names, results, and the matrix
+        """
+        import numpy as np
+        from scipy.sparse import coo_matrix
+        index = sorted(self.counts.keys())
+        used = self._used()
+        rows, cols, data = [], [], []
+        for row, name in enumerate(index):
+            counts = self.counts[name]
+            rows.extend([row] * len(counts))
+            cols.extend(counts.keys())
+            data.extend(counts.values())
+        cols = np.searchsorted(used, np.array(cols, dtype=np.int64))
+        mat = coo_matrix((np.array(data, dtype=np.int64), (rows, cols)),
+                         shape=(len(index), len(used))).tocsc()
+        mat.eliminate_zeros()
+        # drop results that were only ever counted as zero
+        keep = np.flatnonzero(np.asarray(mat.getnnz(axis=0)))
+        return index, self.vocab.decode(used[keep]), mat[:, keep]
+
+    def to_frame(self):
+        """
+        Make a `DataFrame` with a row for each subcorpus
+        """
+        from pandas import DataFrame
+        index, columns, mat = self.matrix()
+        return DataFrame(mat, index=index, columns=columns)
+
+class SortedCounts(object):
+    """
+    Counts for each subcorpus as a sorted array of results, and an array of
+    their counts
+
+    Unlike :class:`CodedCounts`, these don't depend on a vocabulary, so
+    counts made in different processes can be merged directly.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return "<corpkit.coded.SortedCounts instance: %d subcorpora>" % len(self)
+
+    @classmethod
+    def from_counters(cls, results):
+        """
+        Make from a `dict` of subcorpus names and `Counters`
+        """
+        import numpy as np
+        counts = {}
+        for name, counter in results.items():
+            found = [(k, v) for k, v in counter.items() if v]
+            keys = np.empty(len(found), dtype=object)
+            keys[:] = [k for k, _ in found]
+            values = np.array([v for _, v in found], dtype=np.int64)
+            order = np.argsort(keys, kind='mergesort')
+            counts[name] = (keys[order], values[order])
+        return cls(counts)
+
+    @classmethod
+    def from_coded(cls, coded):
+        """
+        Make from a :class:`CodedCounts` object
+        """
+        return cls.from_counters(dict(coded.items()))
+
+    def merge(self, other):
+        """
+        Add two sets of counts together
+
+        :returns: a new :class:`SortedCounts` object
+        """
+        return merge_all([self, other])
+
+    def to_coded(self):
+        """
+        Make a :class:`CodedCounts` object, with one vocabulary for every
+        subcorpus
+        """
+        import numpy as np
+        if self.counts:
+            words = np.unique(np.concatenate([k for k, _ in self.counts.values()]))
+        else:
+            words = np.empty(0, dtype=object)
+        vocab = Vocabulary()
+        vocab.words = list(words)
+        vocab.ids = {w: i for i, w in enumerate(vocab.words)}
+        coded = CodedCounts(vocab)
+        for name, (keys, values) in self.counts.items():
+            ids = np.searchsorted(words, keys).tolist()
+            coded.counts[name] = dict(zip(ids, np.asarray(values, dtype=np.int64).tolist()))
+        return coded
+
+def merge_all(parts):
+    """
+    Merge any number of :class:`SortedCounts` objects at once. For each
+    subcorpus, every part's results and counts are concatenated, and the
+    counts of equal results summed with `np.unique` and `np.bincount`.
+
+    :param parts: `list` of :class:`SortedCounts`
+
+    :returns: :class:`SortedCounts`, or `None` if there were no parts
+    """
+    import numpy as np
+    parts = list(parts)
+    if not parts:
+        return None
+    names = []
+    for part in parts:
+        names.extend(n for n in part.counts if n not in names)
+    counts = {}
+    for name in names:
+        runs = [part.counts[name] for part in parts if name in part.counts]
+        if len(runs) == 1:
+            counts[name] = runs[0]
+            continue
+        keys = np.concatenate([k for k, _ in runs])
+        values = np.concatenate([v for _, v in runs])
+        merged, inverse = np.unique(keys, return_inverse=True)
+        summed = np.bincount(inverse.ravel(), weights=values, minlength=len(merged))
+        counts[name] = (merged, summed.astype(np.int64))
+    return SortedCounts(counts)
@@ -0,0 +1,353 @@
+"""
+corpkit: concordance lines kept on disk
+
+For searches with more results than fit in memory, concordance lines are
+appended to an SQLite table as files are searched. A :class:`DiskConcordance`
+is a lazy view of that table: editing and sorting are done by the database,
+and only the lines actually looked at are made into a
+:class:`corpkit.interrogation.Concordance`.
+"""
+
+from __future__ import print_function
+
+# name of the table of lines in the database
+TABLE = 'lines'
+
+def _regexp(pattern, value):
+    """
+    `REGEXP` for SQLite, with the semantics of `Series.str.contains`
+    """
+    import re
+    if value is None:
+        return False
+    return re.search(pattern, value) is not None
+
+def _quote(name):
+    return '"%s"' % str(name).replace('"', '""')
+
+class DiskConcordance(object):
+    """
+    Concordance lines in an SQLite database, filtered and sorted lazily
+
+    Make one with :func:`~corpkit.corpus.Corpus.concordance`, passing
+    `on_disk`. Slicing, :func:`head` and :func:`page` return a
+    :class:`corpkit.interrogation.Concordance`; :func:`edit` and
+    :func:`sort_values` return a new view of the same lines.
+    """
+
+    def __init__(self, path, where=None, params=None, order=None, query=None, owner=None):
+        """
+        :param path: path of the database, made if need be
+        """
+        import os
+        self.path = os.path.abspath(path)
+        self.where = list(where or [])
+        self.params = list(params or [])
+        self.order = order
+        self.query = query
+        # a view keeps whatever made the database alive, so that a temporary
+        # file is only deleted once nothing uses it
+        self._owner = owner
+
+    def __repr__(self):
+        return "<corpkit.concstore.DiskConcordance instance: %s, %d lines>" % \
+               (self.path, len(self))
+
+    def __str__(self):
+        return self.format(print_it=False)
+
+    def connect(self):
+        """
+        Open the database, with `REGEXP` available
+        """
+        import sqlite3
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.create_function('REGEXP', 2, _regexp)
+        return conn
+
+    @property
+    def columns(self):
+        """
+        Names of the columns, in order
+        """
+        from contextlib import closing
+        with closing(self.connect()) as conn:
+            rows = conn.execute('PRAGMA table_info(%s)' % TABLE).fetchall()
+        return [r[1] for r in rows if r[1] != 'line']
+
+    def append(self, df):
+        """
+        Add concordance lines to the end of the table, adding any columns
+        it does not have yet
+        """
+        from contextlib import closing
+        if df is None or not len(df):
+            return
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS %s (line INTEGER PRIMARY KEY)' % TABLE)
+                have = [r[1] for r in conn.execute('PRAGMA table_info(%s)' % TABLE)]
+                for col in df.columns:
+                    if col not in have:
+                        conn.execute('ALTER TABLE %s ADD COLUMN %s TEXT' % (TABLE, _quote(col)))
+                start = conn.execute('SELECT COALESCE(MAX(line) + 1, 0) FROM %s' % TABLE).fetchone()[0]
+                cols = ', '.join(['line'] + [_quote(c) for c in df.columns])
+                marks = ', '.join(['?'] * (len(df.columns) + 1))
+                rows = ((start + i,) + tuple(None if v != v else str(v) for v in row)
+                        for i, row in enumerate(df.itertuples(index=False, name=None)))
+                conn.executemany('INSERT INTO %s (%s) VALUES (%s)' % (TABLE, cols, marks), rows)
+
+    def _select(self, what='*', limit=None, offset=0, order=True):
+        sql = 'SELECT %s FROM %s' % (what, TABLE)
+        if self.where:
+            sql += ' WHERE ' + ' AND '.join('(%s)' % w for w in self.where)
+        if order:
+            sql += ' ORDER BY %s' % (self.order or 'line')
+        if limit is not None:
+            sql += ' LIMIT %d OFFSET %d' % (limit, offset)
+        return sql
+
+    def __len__(self):
+        from contextlib import closing
+        import sqlite3
+        with closing(self.connect()) as conn:
+            try:
+                return conn.execute(self._select('COUNT(*)', order=False), self.params).fetchone()[0]
+            except sqlite3.OperationalError:
+                return 0
+
+    def _frame(self, limit=None, offset=0):
+        """
+        Get lines as a :class:`corpkit.interrogation.Concordance`, indexed by
+        their line number
+        """
+        import pandas as pd
+        import sqlite3
+        from contextlib import closing
+        from corpkit.interrogation import Concordance
+        with closing(self.connect()) as conn:
+            try:
+                df = pd.read_sql_query(self._select('*', limit, offset), conn,
+                                       params=self.params, index_col='line')
+            except (sqlite3.OperationalError, pd.errors.DatabaseError):
+                df = pd.DataFrame()
+        df.index.name = None
+        conc = Concordance(df)
+        try:
+            conc.query = self.query
+        except AttributeError:
+            pass
+        return conc
+
+    def __getitem__(self, key):
+        """
+        Get lines by position or slice, or one column in full
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            lines = self._frame(max(stop - start, 0), start)
+            return lines if step == 1 else lines.iloc[::step]
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            return self._frame(1, key).iloc[0]
+        if key in self.columns:
+            return self._frame()[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return self.iterchunks()
+
+    def head(self, n=5):
+        """
+        Get the first `n` lines
+        """
+        return self._frame(n)
+
+    def page(self, number, size=100):
+        """
+        Get one page of lines, counting from zero
+        """
+        return self._frame(size, number * size)
+
+    def iterchunks(self, size=10000):
+        """
+        Yield every line, `size` at a time, as
+        :class:`corpkit.interrogation.Concordance` objects
+        """
+        offset = 0
+        while True:
+            chunk = self._frame(size, offset)
+            if not len(chunk):
+                return
+            yield chunk
+            offset += size
+
+    def materialise(self):
+        """
+        Read every line into memory
+
+        :returns: :class:`corpkit.interrogation.Concordance`
+        """
+        return self._frame()
+
+    def _view(self, where=None, params=None, order=None):
+        return DiskConcordance(self.path,
+                               where=self.where + list(where or []),
+                               params=self.params + list(params or []),
+                               order=order or self.order,
+                               query=self.query,
+                               owner=self._owner or self)
+
+    def _condition(self, column, value, keep):
+        """
+        Turn an `edit` argument into SQL, as
+        :func:`~corpkit.editor.editor` would apply it to a `DataFrame`
+        """
+        from corpkit.constants import STRINGTYPE
+        if isinstance(value, int):
+            value = [value]
+        if isinstance(value, STRINGTYPE):
+            sql = '%s REGEXP ?' % _quote(column)
+            params = [value]
+        elif all(isinstance(v, STRINGTYPE) for v in value):
+            sql = '%s IN (%s)' % (_quote(column), ', '.join(['?'] * len(value)))
+            params = list(value)
+        else:
+            sql = 'line IN (%s)' % ', '.join(['?'] * len(value))
+            params = [int(v) for v in value]
+        if not keep:
+            sql = 'NOT COALESCE(%s, 0)' % sql
+        return sql, params
+
+    def edit(self, just_entries=False, skip_entries=False,
+             just_subcorpora=False, skip_subcorpora=False, **kwargs):
+        """
+        Keep or delete lines by middle column or subcorpus, in the database.
+        Arguments are as for :func:`corpkit.interrogation.Concordance.edit`.
+
+        >>> skipped = conc.edit(skip_entries=r'to_?match')
+
+        :returns: a new :class:`DiskConcordance` view
+        """
+        if kwargs:
+            raise ValueError('Lines on disk can only be edited by entries and subcorpora.')
+        where, params = [], []
+        for column, value, keep in [('m', just_entries, True),
+                                    ('m', skip_entries, False),
+                                    ('c', just_subcorpora, True),
+                                    ('c', skip_subcorpora, False)]:
+            if value is False or value is None:
+                continue
+            sql, args = self._condition(column, value, keep)
+            where.append(sql)
+            params.extend(args)
+        return self._view(where, params)
+
+    def sort_values(self, by, ascending=True):
+        """
+        Sort lines by one or more columns, which are indexed for the purpose
+
+        :param by: column name(s)
+        :type by: `str`/`list`
+        :param ascending: sort direction, for all columns or each
+        :type ascending: `bool`/`list`
+
+        :returns: a new :class:`DiskConcordance` view
+        """
+        from contextlib import closing
+        from corpkit.constants import STRINGTYPE
+        if isinstance(by, STRINGTYPE):
+            by = [by]
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(by)
+        missing = [c for c in by if c not in self.columns]
+        if missing:
+            raise ValueError('No such column: %s' % ', '.join(missing))
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute('CREATE INDEX IF NOT EXISTS %s ON %s (%s)' % \
+                             (_quote('by_' + '_'.join(by)), TABLE, ', '.join(_quote(c) for c in by)))
+        order = ', '.join('%s %s' % (_quote(c), 'ASC' if a else 'DESC') for c, a in zip(by, ascending))
+        return self._view(order=order + ', line')
+
+    def format(self, kind='string', n=100, **kwargs):
+        """
+        Print the first `n` lines nicely, as
+        :func:`corpkit.interrogation.Concordance.format`
+        """
+        lines = self.materialise() if n in ['all', False] else self.head(n)
+        return lines.format(kind=kind, n=n, **kwargs)
+
+    def calculate(self):
+        """
+        Count the middle column of each subcorpus, in the database
+
+        :returns: a `DataFrame` like
+                  :func:`corpkit.interrogation.Concordance.calculate`
+        """
+        import pandas as pd
+        from contextlib import closing
+        from corpkit.editor import editor
+        with closing(self.connect()) as conn:
+            counts = pd.read_sql_query(self._select('c, m, COUNT(*) AS n', order=False) + \
+                                       ' GROUP BY c, m', conn, params=self.params)
+        df = counts.pivot(index='c', columns='m', values='n').fillna(0).astype(int)
+        df.index.name, df.columns.name = None, None
+        return editor(df, sort_by='total', print_info=False)
+
+    def to_csv(self, path, sep=',', chunksize=10000):
+        """
+        Write every line to a CSV file, a chunk at a time
+        """
+        with open(path, 'w') as fo:
+            for i, chunk in enumerate(self.iterchunks(chunksize)):
+                chunk.to_csv(fo, sep=sep, header=i == 0)
+
+    def delete(self):
+        """
+        Delete the database. No view of it can be used afterward.
+        """
+        import os
+        for suffix in ['', '-wal', '-shm']:
+            try:
+                os.remove(self.path + suffix)
+            except OSError:
+                pass
+
+def concordance_to_disk(lines, path=None):
+    """
+    Write chunks of concordance lines into a new :class:`DiskConcordance`
+
+    :param lines: iterable of `DataFrames`, as from
+                  :func:`~corpkit.corpus.Corpus.iter_concordance`
+    :param path: path of the database. If `None`, a temporary file is used,
+                 deleted once the returned object is garbage collected.
+
+    :returns: :class:`DiskConcordance`
+    """
+    import os
+    import weakref
+    import tempfile
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='corpkit-', suffix='.sqlite')
+        os.close(fd)
+        os.remove(path)
+        temporary = True
+    else:
+        temporary = False
+        if os.path.exists(path):
+            raise ValueError('%s already exists.' % path)
+    store = DiskConcordance(path)
+    try:
+        for chunk in lines:
+            store.append(chunk)
+            if store.query is None:
+                store.query = getattr(chunk, 'query', None)
+    except BaseException:
+        store.delete()
+        raise
+    if temporary:
+        weakref.finalize(store, DiskConcordance(path).delete)
+    return store
@@ -2,10 +2,157 @@
 corpkit: process CONLL formatted data
 """
 
+def scan_sentences(fo, blocksize=1 << 22):
+    """
+    Find where each sentence of an open CONLL-U file starts and ends,
+    reading it a block at a time. Sentences are split at every `\\n\\n`,
+    from left to right, as `bytes.split` would split the whole text.
+    
+    Args:
+        fo (file): File opened for reading bytes
+    
+    Returns:
+        tuple: `numpy` arrays of start and end byte offsets
+    """
+    import re
+    import numpy as np
+    gaps = []
+    # offset of the start of data, which may begin with a carried newline
+    offset = 0
+    carry = b''
+    lo, hi = None, 0
+    while True:
+        block = fo.read(blocksize)
+        if not block:
+            break
+        data = carry + block
+        pos = 0
+        for m in re.finditer(b'\n\n', data):
+            gaps.append(offset + m.start())
+            pos = m.end()
+        stripped = data.strip(b'\n')
+        if stripped:
+            if lo is None:
+                lo = offset + data.index(stripped[:1])
+            hi = offset + len(data.rstrip(b'\n'))
+        # a newline at the end may begin a gap that ends in the next block
+        carry = b'\n' if data.endswith(b'\n') and pos < len(data) else b''
+        offset += len(data) - len(carry)
+    if lo is None:
+        lo = offset + len(carry)
+    gaps = np.array(gaps, dtype=np.int64)
+    gaps = gaps[(gaps >= lo) & (gaps < hi)]
+    starts = np.concatenate(([lo], gaps + 2)).astype(np.int64)
+    ends = np.concatenate((gaps, [hi])).astype(np.int64)
+    return starts, ends
+
+def sentence_ranges(f, parts):
+    """
+    Split a CONLL-U file into sentence-aligned byte ranges of similar size
+    
+    Args:
+        f (str): Filepath
+        parts (int): How many ranges to make
+    
+    Returns:
+        list: `(start, end, first sentence number)` tuples
+    """
+    import os
+    import numpy as np
+    size = os.path.getsize(f)
+    starts, _ = sentence_offsets(f)
+    # cut at the first sentence starting after each equal share of bytes,
+    # or after the last cut, whichever is later
+    targets = [size * i // parts + 2 for i in range(1, parts)]
+    cuts = []
+    for i in np.searchsorted(starts, targets):
+        i = max(int(i), cuts[-1] + 1 if cuts else 1)
+        if i < len(starts):
+            cuts.append(i)
+    bounds = [0] + [int(starts[i]) for i in cuts] + [size]
+    firsts = [1] + [i + 1 for i in cuts]
+    return [(start, end, first) for start, end, first in zip(bounds, bounds[1:], firsts)]
+
+# sentence offsets of files read this session, by path
+_sentence_offsets = {}
+
+def sentence_offsets(f):
+    """
+    Find where each sentence of a CONLL-U file starts and ends, splitting the
+    file as `parse_conll` does, so that sentence `n` is row `n - 1`. Offsets
+    are kept for the session, until the file changes.
+    
+    Args:
+        f (str): Filepath
+    
+    Returns:
+        tuple: `numpy` arrays of start and end byte offsets (in the
+            decompressed text, for compressed files)
+    """
+    import os
+    from corpkit.process import open_compressed
+    path = os.path.abspath(f)
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime)
+    if path in _sentence_offsets and _sentence_offsets[path][0] == key:
+        return _sentence_offsets[path][1]
+    with open_compressed(path, 'rb') as fo:
+        starts, ends = scan_sentences(fo)
+    _sentence_offsets[path] = (key, (starts, ends))
+    return starts, ends
+
+def read_sentences(f, numbers, usecols=None):
+    """
+    Parse only some sentences of a CONLL-U file, using `sentence_offsets`
+    
+    Args:
+        f (str): Filepath
+        numbers (list): Sentence numbers, counting from one. Runs of
+            consecutive sentences are read together.
+        usecols (None, optional): Which columns must be parsed by pandas.read_csv
+    
+    Returns:
+        pandas.DataFrame: DataFrame of the sentences that exist, with a
+            ._metadata attribute, or `None` if there are none
+    """
+    import pandas as pd
+    from corpkit.process import open_compressed, compression_of
+    starts, ends = sentence_offsets(f)
+    numbers = sorted(set(n for n in numbers if 1 <= n <= len(starts)))
+    runs = []
+    for n in numbers:
+        if runs and runs[-1][1] == n - 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    dfs, metadata = [], {}
+    with open_compressed(f, 'rb') as fo:
+        # compressed streams can't jump to an offset, so read them once
+        whole = fo.read() if runs and compression_of(f) else None
+        for first, last in runs:
+            start, end = int(starts[first - 1]), int(ends[last - 1])
+            if whole is not None:
+                data = whole[start:end].decode('utf-8')
+            else:
+                fo.seek(start)
+                data = fo.read(end - start).decode('utf-8')
+            df = parse_conll(f, usecols=usecols, span=(start, end, first), data=data)
+            if df is None:
+                continue
+            dfs.append(df)
+            metadata.update(df._metadata)
+    if not dfs:
+        return
+    df = pd.concat(dfs) if len(dfs) > 1 else dfs[0]
+    df._metadata = metadata
+    return df
+
 def parse_conll(f,
                 first_time=False,
                 just_meta=False,
-                usecols=None):
+                usecols=None,
+                span=None,
+                data=None):
     """
     Make a pandas.DataFrame with metadata from a CONLL-U file
     
@@ -14,6 +161,9 @@ def parse_conll(f,
         first_time (bool, optional): If True, add in sent index
         just_meta (bool, optional): Return only a metadata `dict`
         usecols (None, optional): Which columns must be parsed by pandas.read_csv
+        span (tuple, optional): Only read part of the file: a `(start, end, 
+            first sentence number)` tuple from `sentence_ranges`
+        data (str, optional): Text of the file (or span), if already read
     
     Returns:
         pandas.DataFrame: DataFrame containing tokens and a ._metadata attribute
@@ -25,17 +175,32 @@ def parse_conll(f,
         from io import StringIO
 
     from collections import defaultdict
+    from corpkit.process import compression_of, open_compressed
 
     # go to corpkit.constants to modify the order of columns if yours are different
     from corpkit.constants import CONLL_COLUMNS as head
 
-    with open(f, 'r') as fo:
-        data = fo.read().strip('\n')
+    first_sent = 1
+    if span:
+        start, end, first_sent = span
+    if data is not None:
+        data = data.strip('\n')
+    elif span:
+        with open(f, 'rb') as fo:
+            fo.seek(start)
+            data = fo.read(end - start).decode('utf-8').strip('\n')
+    elif compression_of(f):
+        # decompress as a stream, without a temporary file
+        with open_compressed(f) as fo:
+            data = fo.read().strip('\n')
+    else:
+        with open(f, 'r') as fo:
+            data = fo.read().strip('\n')
 
     splitdata = []
     metadata = {}
     sents = data.split('\n\n')    
-    for count, sent in enumerate(sents, start=1):
+    for count, sent in enumerate(sents, start=first_sent):
         metadata[count] = defaultdict(set)
         for line in sent.split('\n'):
             if line and not line.startswith('#') \
@@ -464,15 +629,42 @@ def turn_pos_to_wc(ser, showval):
     news.name = ser.name[:-1] + 'x'
     return news
 
+def _window(window):
+    """
+    Turn a window into a `(left, right)` tuple, or `None` for no limit
+    """
+    if window is None or window is False:
+        return None
+    if isinstance(window, int):
+        return window, window
+    return tuple(window)
+
 def concline_generator(matches, idxs, df, metadata,
-                       add_meta, category, fname, preserve_case=False):
+                       add_meta, category, fname, preserve_case=False,
+                       conc_window=None, conc_chars=None, sort_keys=False):
     """
     Get all conclines
 
+    Each sentence with a match is joined into one string, once, and the
+    character offset of every token is worked out from the token lengths.
+    Left and right contexts are then just slices of that string.
+
     :param matches: a list of formatted matches
     :param idxs: their (sent, word) idx
+    :param conc_window: only keep this many tokens of context, either side
+                        or as a `(left, right)` tuple
+    :param conc_chars: only keep this many characters of context, either
+                       side or as a `(left, right)` tuple
+    :param sort_keys: also give the first this many tokens to the left and
+                      right, lowercased, as `L1`, `L2` ... `R1`, `R2` ...
     """
+    import numpy as np
+    from bisect import bisect_left, bisect_right
     conc_res = []
+    if not len(matches):
+        return conc_res
+    conc_window = _window(conc_window)
+    conc_chars = _window(conc_chars)
     # potential speedup: turn idxs into dict
     from collections import defaultdict
     mdict = defaultdict(list)
@@ -482,21 +674,55 @@ def concline_generator(matches, idxs, df, metadata,
     #for s, i in matches:
         mdict[s].append((i, mid))
     # shorten df to just relevant sents to save lookup time
-    df = df.loc[list(mdict.keys())]
-    # don't look up the same sentence multiple times
-    for s, tup in sorted(mdict.items()):
-        sent = df.loc[s]
+    df = df.loc[sorted(mdict)]
+    sents = df.index.get_level_values(0).values
+    labels = df.index.get_level_values(1).values
+    words = np.asarray(df.values, dtype=object)
+    # where each sentence starts and ends in the arrays
+    bounds = np.flatnonzero(sents[1:] != sents[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(sents)]))
+    for a, b in zip(starts, ends):
+        s = sents[a]
+        toks = words[a:b].tolist()
+        text = ' '.join(toks)
         if not preserve_case:
-            sent = sent.str.lower()
+            lowered = text.lower()
+            # some characters change length when lowercased
+            if len(lowered) == len(text):
+                text = lowered
+            else:
+                toks = [t.lower() for t in toks]
+                text = ' '.join(toks)
+        # offs[k] is where token k starts, offs[-1] one past the end
+        offs = [0] + np.cumsum([len(t) + 1 for t in toks]).tolist()
+        sent_labels = labels[a:b].tolist()
         meta = metadata[s]
         sname = meta.get('speaker', 'none')
-        for i, mid in tup:
+        for i, mid in mdict[s]:
             if not preserve_case:
                 mid = mid.lower()
             ix = '%d,%d' % (s, i)
-            start = ' '.join(sent.loc[:i-1].values)
-            end = ' '.join(sent.loc[i+1:].values)
+            # tokens before and after i, whether or not i is itself there
+            left_end = bisect_left(sent_labels, i)
+            right_start = bisect_right(sent_labels, i)
+            left_start, right_end = 0, len(toks)
+            if conc_window:
+                left_start = max(0, left_end - conc_window[0])
+                right_end = min(len(toks), right_start + conc_window[1])
+            start = text[offs[left_start]:offs[left_end] - 1] if left_end > left_start else ''
+            end = text[offs[right_start]:offs[right_end] - 1] if right_end > right_start else ''
+            if conc_chars:
+                start = start[len(start) - conc_chars[0]:] if len(start) > conc_chars[0] else start
+                end = end[:conc_chars[1]]
             lin = [ix, category, fname, sname, start, mid, end]
+            if sort_keys:
+                for n in range(1, sort_keys + 1):
+                    pos = left_end - n
+                    lin.append(toks[pos].lower() if pos >= 0 else '')
+                for n in range(sort_keys):
+                    pos = right_start + n
+                    lin.append(toks[pos].lower() if pos < len(toks) else '')
             if add_meta:
                 for k, v in sorted(meta.items()):
                     if k in ['speaker', 'parse', 'sent_id']:
@@ -521,7 +747,10 @@ def fast_simple_conc(dfss, idxs, show,
                      conc=False,
                      preserve_case=False,
                      gramsize=1,
-                     window=None):
+                     window=None,
+                     conc_window=None,
+                     conc_chars=None,
+                     sort_keys=False):
     """
     Fast, simple concordancer, heavily conditional
     to save time.
@@ -665,7 +894,10 @@ def fast_simple_conc(dfss, idxs, show,
         conc_res = concline_generator(matches, idxs, df,
                                       metadata, add_meta,
                                       category, fname,
-                                      preserve_case=preserve_case)
+                                      preserve_case=preserve_case,
+                                      conc_window=conc_window,
+                                      conc_chars=conc_chars,
+                                      sort_keys=sort_keys)
 
     return list(matches), conc_res
 
@@ -691,6 +923,9 @@ def show_this(df, matches, show, metadata, conc=False,
     preserve_case = kwargs.get('preserve_case', False)
     gramsize = kwargs.get('gramsize', 1)
     window = kwargs.get('window', None)
+    conc_window = kwargs.get('conc_window', None)
+    conc_chars = kwargs.get('conc_chars', None)
+    sort_keys = int(kwargs.get('sort_keys') or 0)
 
     matches = sorted(list(matches))
 
@@ -724,7 +959,10 @@ def show_this(df, matches, show, metadata, conc=False,
                                 conc=conc,
                                 preserve_case=preserve_case,
                                 gramsize=gramsize,
-                                window=window)
+                                window=window,
+                                conc_window=conc_window,
+                                conc_chars=conc_chars,
+                                sort_keys=sort_keys)
         else:
             resbit = []
             concbit = []
@@ -747,7 +985,10 @@ def show_this(df, matches, show, metadata, conc=False,
                                 conc=conc,
                                 preserve_case=preserve_case,
                                 gramsize=gramsize,
-                                window=window)
+                                window=window,
+                                conc_window=conc_window,
+                                conc_chars=conc_chars,
+                                sort_keys=sort_keys)
 
                 resbit.append(r)
                 concbit.append(c)
@@ -876,9 +1117,10 @@ def tgrep_searcher(f=False,
     Use tgrep for constituency grammar search
     """
 
-    from corpkit.process import show_tree_as_per_option, tgrep
+    from corpkit.process import show_tree_as_per_option, tgrep, sort_key_fields
     matches = []
     conc_out = []
+    sort_keys = int(kwargs.get('sort_keys') or 0)
     # in case search was a dict
     srch = search.get('t') if isinstance(search, dict) else search
     metcat = category if category else ''
@@ -895,6 +1137,8 @@ def tgrep_searcher(f=False,
             if conc:
                 form_ix = '%d,%d' % (i, tok_id)
                 lin = [form_ix, metcat, fname, sname, start, middle, end]
+                if sort_keys:
+                    lin += sort_key_fields(start, end, sort_keys)
                 if show_conc_metadata:
                     for k, v in sorted(sent.items()):
                         if k in ['speaker', 'parse', 'sent_id']:
@@ -989,7 +1233,8 @@ def slow_tregex(metadata=False,
                                        lemtag=lemtag)
 
         # make conc lines from conc results
-        concs = make_conc_lines_from_whole_mid(whole_res, res, filename=fname, show=show)
+        concs = make_conc_lines_from_whole_mid(whole_res, res, filename=fname, show=show,
+                                               sort_keys=int(kwargs.get('sort_keys') or 0))
     else:
         concs = [False for i in res]
 
@@ -1120,9 +1365,13 @@ def pipeline(f=False,
 
     all_matches = []
     all_exclude = []
+    span = kwargs.pop('span', None)
+    data = kwargs.pop('data', None)
 
     if from_df is False or from_df is None:
-        df = parse_conll(f, usecols=kwargs.get('usecols'))
+        # reuse the file if it was parsed earlier in the session
+        from corpkit.cache import documents
+        df = documents.get(f, usecols=kwargs.get('usecols'), span=span, data=data)
         # can fail here if df is none
         if df is None:
             print('Problem reading data from %s.' % f)
@@ -1247,9 +1496,10 @@ def load_raw_data(f):
     """
     Loads the stripped and raw versions of a parsed file
     """
-    from corpkit.process import saferead
+    from corpkit.process import saferead, strip_compression
 
     # open the unparsed version of the file, read into memory
+    f = strip_compression(f)
     stripped_txtfile = f.replace('.conll', '').replace('-parsed', '-stripped')
     stripped_txtdata, enc = saferead(stripped_txtfile)
 
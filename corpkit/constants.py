@@ -77,4 +77,7 @@ CORENLP_URL  = 'http://nlp.stanford.edu/software/stanford-corenlp-full-2016-10-3
 
 # it can be very slow to load a bunch of unused metadata categories
 MAX_METADATA_FIELDS = 99
-MAX_METADATA_VALUES = 99
\ No newline at end of file
+MAX_METADATA_VALUES = 99
+
+# corpus files with these extensions are decompressed as they are read
+COMPRESSED_EXTENSIONS = ['.gz', '.bz2', '.xz', '.zst']
\ No newline at end of file
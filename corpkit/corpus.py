@@ -7,6 +7,7 @@ from __future__ import print_function
 from lazyprop import lazyprop
 from corpkit.process import classname
 from corpkit.constants import STRINGTYPE, PYTHON_VERSION
+from corpkit.cache import cached
 
 class Corpus(object):
     """
@@ -46,6 +47,7 @@ class Corpus(object):
         self.symbolic = kwargs.get('subcorpora', False)
         self.skip = kwargs.get('skip', False)
         self.just = kwargs.get('just', False)
+        self._manifest = kwargs.pop('manifest', None)
         self.kwa = get_symbolics(self)
 
         if isinstance(path, (list, Datalist)):
@@ -77,31 +79,26 @@ class Corpus(object):
                     if isdir(join('data', path)):
                         self.path = abspath(join('data', path))
             
+            # directories are scanned once, into the corpus manifest
             if self.path.endswith('-parsed') or self.path.endswith('-tokenised'):
 
-                for r, d, f in os.walk(self.path):
-                    if not f:
-                        continue
-                    if isinstance(f, str) and f.startswith('.'):
-                        continue
-                    if f[0].endswith('conll') or f[0].endswith('conllu'):
-                        self.datatype = 'conll'
-                        break
-
-                if len([d for d in os.listdir(self.path)
-                        if isdir(join(self.path, d))]) > 0:
+                if self.manifest.datatype == 'conll':
+                    self.datatype = 'conll'
+
+                if self.manifest.subdirs(self.path):
                     self.singlefile = False
-                if len([d for d in os.listdir(self.path)
-                        if isdir(join(self.path, d))]) == 0:
+                else:
                     self.level = 's'
             else:
                 if self.level == 'c':
                     if not self.datatype:
-                        self.datatype, self.singlefile = determine_datatype(
-                            self.path)
-                if isdir(self.path):
-                    if len([d for d in os.listdir(self.path)
-                            if isdir(join(self.path, d))]) == 0:
+                        if isdir(self.path):
+                            self.datatype = self.manifest.datatype
+                        else:
+                            self.datatype, self.singlefile = determine_datatype(
+                                self.path)
+                if isdir(self.path) and self.level != 's':
+                    if not self.manifest.subdirs(self.path):
                         self.level = 's'
 
             # if initialised on a file, process as file
@@ -138,6 +135,17 @@ class Corpus(object):
             if self.print_info:
                 print('Corpus: %s' % self.path)
 
+    @property
+    def manifest(self):
+        """
+        A :class:`corpkit.manifest.Manifest` of the files in the corpus, 
+        shared with its subcorpora
+        """
+        if getattr(self, '_manifest', None) is None:
+            from corpkit.manifest import get_manifest
+            self._manifest = get_manifest(self.path)
+        return self._manifest
+
     @lazyprop
     def subcorpora(self):
         """
@@ -153,9 +161,9 @@ class Corpus(object):
             return self.data
         if self.level == 'c':
             variable_safe_r = re.compile(r'[\W0-9_]+', re.UNICODE)
-            sbs = Datalist(sorted([Subcorpus(join(self.path, d), self.datatype, **self.kwa)
-                                   for d in os.listdir(self.path)
-                                   if isdir(join(self.path, d))],
+            sbs = Datalist(sorted([Subcorpus(join(self.path, d), self.datatype,
+                                             manifest=self.manifest, **self.kwa)
+                                   for d in self.manifest.subdirs(self.path)],
                                   key=operator.attrgetter('name')), **self.kwa)
             for subcorpus in sbs:
                 variable_safe = re.sub(variable_safe_r, '',
@@ -184,7 +192,7 @@ class Corpus(object):
         import operator
         from os.path import join, isdir
         if self.level == 's':
-            fls = [f for f in os.listdir(self.path) if not f.startswith('.')]
+            fls = self.manifest.filenames(self.path)
             fls = [File(f, self.path, self.datatype, **self.kwa) for f in fls]
             fls = sorted(fls, key=operator.attrgetter('name'))
             return Datalist(fls, **self.kwa)
@@ -342,18 +350,16 @@ class Corpus(object):
 
         """
         from corpkit.dictionaries.word_transforms import mergetags
-        from corpkit.process import get_corpus_metadata, add_df_to_dotfile, make_df_json_name
+        from corpkit.process import get_df_from_dotfile, add_df_to_dotfile
 
         kwa = {'just_metadata': self.just,
                'skip_metadata': self.skip,
                'subcorpora': self.symbolic}
 
-        md = get_corpus_metadata(self.path, generate=True)
-        name = make_df_json_name('features', self.symbolic)
+        feat = get_df_from_dotfile(self.path, typ='features', subcorpora=self.symbolic)
 
-        if name in md:
-            import pandas as pd
-            return pd.DataFrame(md[name])
+        if feat is not None:
+            return feat
         else:
             feat = self.interrogate('features', **kwa)
             from corpkit.interrogation import Interrodict
@@ -368,20 +374,17 @@ class Corpus(object):
         Called by corpus.postags and corpus.wordclasses internally
         """
         from corpkit.dictionaries.word_transforms import mergetags
-        from corpkit.process import get_corpus_metadata, add_df_to_dotfile, make_df_json_name
+        from corpkit.process import get_df_from_dotfile, add_df_to_dotfile
 
         kwa = {'just_metadata': self.just,
                'skip_metadata': self.skip,
                'subcorpora': self.symbolic}
 
-        md = get_corpus_metadata(self.path, generate=True)
-
-        pname = make_df_json_name('postags', self.symbolic)
-        wname = make_df_json_name('wordclasses', self.symbolic)
+        postags = get_df_from_dotfile(self.path, typ='postags', subcorpora=self.symbolic)
+        wordclasses = get_df_from_dotfile(self.path, typ='wordclasses', subcorpora=self.symbolic)
         
-        if pname in md and wname in md:
-            import pandas as pd
-            return pd.DataFrame(md[pname]), pd.DataFrame(md[wname])
+        if postags is not None and wordclasses is not None:
+            return postags, wordclasses
         else:
             postags = self.interrogate('postags', **kwa)
             from corpkit.interrogation import Interrodict
@@ -440,18 +443,16 @@ class Corpus(object):
         :returns: a `DataFrame` of tokens and counts
         """
         
-        from corpkit.process import get_corpus_metadata, add_df_to_dotfile, make_df_json_name
+        from corpkit.process import get_df_from_dotfile, add_df_to_dotfile
 
         kwa = {'just_metadata': self.just,
                'skip_metadata': self.skip,
                'subcorpora': self.symbolic}
 
-        md = get_corpus_metadata(self.path, generate=True)
-        name = make_df_json_name('lexicon', self.symbolic)
+        lexi = get_df_from_dotfile(self.path, typ='lexicon', subcorpora=self.symbolic)
         
-        if name in md:
-            import pandas as pd
-            return pd.DataFrame(md[name])
+        if lexi is not None:
+            return lexi
         else:
             lexi = self.interrogate('lexicon', **kwa)
             from corpkit.interrogation import Interrodict
@@ -500,6 +501,7 @@ class Corpus(object):
         from corpkit.configurations import configurations
         return configurations(self, search, **kwargs)
 
+    @cached
     def interrogate(self, search='w', *args, **kwargs):
         """
         Interrogate a corpus of texts for a lexicogrammatical phenomenon.
@@ -631,10 +633,55 @@ class Corpus(object):
                      completion
         :type save: `str`
 
+        :param cache: Reuse the result of an identical earlier interrogation of 
+                      this corpus, stored in `cache/`. Results are 
+                      recalculated if any corpus file has changed. Off by
+                      default; use `'refresh'` to recalculate and store the
+                      result again.
+        :type cache: `bool`/`'refresh'`
+
+        :param incremental: Store the results of searching each file, so that 
+                            running the same query again only searches files 
+                            that have been added or changed since. Results for 
+                            deleted files are dropped.
+        :type incremental: `bool`
+
+        :param checkpoint: Save progress to `cache/checkpoints` every 100 files 
+                           (or every `checkpoint` files, if an `int`), and 
+                           when paused with ctrl+c
+        :type checkpoint: `bool`/`int`
+
+        :param resume: Continue an interrogation that was checkpointed but not 
+                       finished, skipping the files already done
+        :type resume: `bool`
+
         :param gramsize: Size of n-grams (default 1, i.e. unigrams)
         :type gramsize: `int`
 
-        :param multiprocess: How many parallel processes to run
+        :param prefetch: Read the next files (4, or `prefetch` if an `int`) in 
+                         background threads while each file is searched. 
+                         Helps most when files are on a slow or network disk.
+        :type prefetch: `bool`/`int`
+
+        :param prefetch_memory: Most bytes of files to read ahead (default 256MB)
+        :type prefetch_memory: `int`
+
+        :param shared: Search the copy of the corpus kept in shared memory by 
+                       :func:`~corpkit.corpus.Corpus.share`, making it first if 
+                       need be, instead of parsing each file. With 
+                       `multiprocess`, every process reads the same copy.
+        :type shared: `bool`
+
+        :param skip_duplicates: Leave out files that are near duplicates of 
+                                another, as found by 
+                                :func:`~corpkit.corpus.Corpus.duplicates`. A 
+                                `float` sets the similarity threshold.
+        :type skip_duplicates: `bool`/`float`
+
+        :param multiprocess: How many parallel processes to run. For a corpus 
+                             with subcorpora, files are shared out between 
+                             processes by size, and counted back into their 
+                             subcorpora.
         :type multiprocess: `int`/`bool` (`bool` determines automatically)
 
         :param files_as_subcorpora: (**Deprecated, use subcorpora=files**). Treat each file as a subcorpus, ignoring 
@@ -675,6 +722,47 @@ class Corpus(object):
                         of results (i.e. 0.1 will remove 10 per cent)
         :type discard: ``int``/``float``
 
+        :param top: Keep only a bounded, approximate summary of the ``top`` most 
+                    frequent results per subcorpus (the Space-Saving algorithm). 
+                    This keeps memory use flat for huge, open-ended queries. 
+                    Counts may be overestimated: the largest possible overestimate 
+                    for each cell is stored in the result's ``errors`` attribute, 
+                    and whether each result is certainly among the most frequent 
+                    in its ``guaranteed`` attribute. A ``float`` is taken as the 
+                    error bound instead, keeping ``1/top`` results.
+        :type top: ``int``/``float``
+
+        :param approximate: Count results in a count-min sketch per subcorpus, keeping 
+                            exact counts only for results whose estimate reaches a 
+                            threshold. Useful for large ``gramsize`` runs and language 
+                            models, where the long tail need not be exact. ``True`` uses 
+                            the defaults; a ``dict`` can set ``epsilon`` (relative error, 
+                            default ``0.001``), or ``expected`` (roughly how many results 
+                            will be counted, to size the sketch from instead), ``delta`` 
+                            (chance of exceeding it, default ``0.01``) and ``threshold`` 
+                            (default ``5``). Error bounds are stored in the result's 
+                            ``errors`` attribute.
+        :type approximate: ``bool``/``dict``
+
+        :param sparse: Store results as a sparse matrix (requires `scipy`). Worth 
+                       using when there are many subcorpora (e.g. ``subcorpora='file'``) 
+                       and a big vocabulary, where almost every cell would be zero. 
+                       Relative frequencies, keyness, `topwords` and plotting work 
+                       without filling in the zeros.
+        :type sparse: ``bool``
+
+        :param cache_documents: Keep parsed files in memory for the rest of 
+                                the session (up to 256MB, or this many 
+                                bytes), so later searches of this corpus 
+                                needn't parse them again. Not used by 
+                                worker processes.
+        :type cache_documents: `bool`/`int`
+
+        :param coded: Count results as integer ids of a shared vocabulary 
+                      (:class:`corpkit.coded.CodedCounts`) rather than as 
+                      `Counters` of strings, decoding them once at the end
+        :type coded: ``bool``
+
         :returns: A :class:`corpkit.interrogation.Interrogation` object, with 
                   `.query`, `.results`, `.totals` attributes. If multiprocessing is 
                   invoked, result may be multiindexed.
@@ -713,6 +801,14 @@ class Corpus(object):
 
         kwargs.pop('subcorpora', False)
 
+        if kwargs.get('shared') is True:
+            kwargs['shared'] = self.share().handle
+
+        skip_duplicates = kwargs.pop('skip_duplicates', False)
+        if skip_duplicates:
+            threshold = 0.8 if skip_duplicates is True else skip_duplicates
+            kwargs['skip_files'] = sorted(self.duplicates(threshold=threshold))
+
         if par and self.subcorpora:
             if isinstance(par, int):
                 kwargs['multiprocess'] = par
@@ -736,16 +832,22 @@ class Corpus(object):
                 res.results.index.name = subcorpora
 
         # sort by total
+        from corpkit.sparse import is_sparse
         ind = list(res.results.index)
+        # casting would fill in the zeros of sparse results
+        sparse = is_sparse(res.results)
         if isinstance(res.results, pd.DataFrame):
             if not res.results.empty:
                 res.results = res.results[list(res.results.sum().sort_values(ascending=False).index)]
-                res.results = res.results.astype(int)
+                if not sparse:
+                    res.results = res.results.astype(int)
 
             if all(i == 'none' or str(i).isdigit() for i in ind):
                 longest = max([len(str(i)) if str(i).isdigit() else 1 for i in ind])
                 res.results.index = [str(i).zfill(longest) for i in ind]
-                res.results = res.results.sort_index().astype(int)
+                res.results = res.results.sort_index()
+                if not sparse:
+                    res.results = res.results.astype(int)
         else:
             show = res.query.get('show', [])
             outs = []
@@ -759,6 +861,124 @@ class Corpus(object):
                 res.results.name = name
         return res
 
+    def compress(self, kind='gz', level=None, multiprocess=True):
+        """
+        Compress every file in the corpus, replacing the originals. 
+        Compressed files are decompressed as they are read, so the corpus 
+        can be used just as before.
+
+        :param kind: `'gz'`, `'bz2'`, `'xz'` or `'zst'` (needs `zstandard`)
+        :type kind: `str`
+        :param level: Compression level, or `None` for the default
+        :type level: `int`
+        :param multiprocess: How many files to compress at once
+        :type multiprocess: `int`/`bool` (`True` for one per core)
+
+        :returns: The compressed :class:`corpkit.corpus.Corpus`
+        """
+        import multiprocessing
+        from functools import partial
+        from corpkit.process import compress_file
+        job = partial(compress_file, kind=kind, level=level)
+        paths = list(self.all_filepaths)
+        if multiprocess is True:
+            multiprocess = multiprocessing.cpu_count()
+        if multiprocess and multiprocess > 1 and len(paths) > 1:
+            pool = multiprocessing.Pool(min(multiprocess, len(paths)))
+            try:
+                newpaths = pool.map(job, paths)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            newpaths = [job(path) for path in paths]
+        if self.level == 'f':
+            return Corpus(newpaths[0], print_info=False)
+        return Corpus(self.path, print_info=False)
+
+    def preload(self, max_bytes=None):
+        """
+        Turn on the session's cache of parsed files, and parse every file 
+        into it, so that interrogations, concordances and `File.document` 
+        don't need to parse them. If the corpus is bigger than the cache, 
+        the files parsed last are kept.
+
+        :param max_bytes: Change the cache's memory budget (default 256MB)
+        :type max_bytes: `int`
+
+        :returns: :class:`corpkit.cache.DocumentCache`
+        """
+        from corpkit.cache import documents
+        documents.enable(max_bytes)
+        for path in self.all_filepaths:
+            documents.get(path)
+        return documents
+
+    def share(self):
+        """
+        Parse the corpus once and keep it in shared memory, so that 
+        interrogations with `shared=True` (and their parallel processes) 
+        don't need to read and parse each file again. The copy is kept 
+        until :func:`~corpkit.corpus.Corpus.unshare` is called, or the 
+        corpus is deleted, and is made again if the corpus' files change.
+
+        Needs Python 3.8 or later.
+
+        :returns: :class:`corpkit.shared.SharedCorpus`
+        """
+        from corpkit.cache import corpus_fingerprint
+        if getattr(self, '_shared', None) is not None and \
+           self._shared.fingerprint != corpus_fingerprint(self):
+            self.unshare()
+        if getattr(self, '_shared', None) is None:
+            from corpkit.shared import SharedCorpus
+            self._shared = SharedCorpus(self)
+        return self._shared
+
+    def unshare(self):
+        """
+        Free the shared memory made by :func:`~corpkit.corpus.Corpus.share`
+        """
+        if getattr(self, '_shared', None) is not None:
+            self._shared.close()
+            self._shared = None
+
+    def duplicates(self, threshold=0.8, num_perm=128, shingle=5, multiprocess=True):
+        """
+        Find files that are (nearly) the same as another, such as syndicated
+        articles, by MinHash and locality-sensitive hashing of their words
+
+        :Example:
+
+        >>> corpus.duplicates(threshold=0.9)
+        {'.../data/news/2016/reuters-02.txt.conll': '.../data/news/2016/ap-11.txt.conll'}
+
+        :param threshold: Minimum estimated share of word shingles in common
+        :type threshold: `float`
+        :param num_perm: Length of each file's signature
+        :type num_perm: `int`
+        :param shingle: Number of words in each shingle
+        :type shingle: `int`
+        :param multiprocess: Make signatures in this many processes (`True`
+                             for one per core)
+        :type multiprocess: `int`/`bool`
+
+        :returns: `dict` of each duplicate's path and the path of the file it
+                  duplicates, which is the first of its group by path
+        """
+        from corpkit.dedupe import signatures, near_duplicates
+        sigs = signatures(self, num_perm=num_perm, shingle=shingle, multiprocess=multiprocess)
+        return near_duplicates(sigs, threshold=threshold)
+
+    def clear_cache(self):
+        """
+        Delete cached interrogation results for this corpus
+
+        :returns: number of results deleted
+        """
+        from corpkit.cache import clear_cache
+        return clear_cache(self)
+
     def sample(self, n, level='f'):
         """
         Get a sample of the corpus
@@ -799,8 +1019,8 @@ class Corpus(object):
         """
         Delete metadata for corpus. May be needed if corpus is changed
         """
-        import os
-        os.remove(os.path.join('data', '.%s.json' % self.name))
+        from corpkit.metastore import MetadataStore
+        MetadataStore(self.path).clear()
 
     @lazyprop
     def metadata(self):
@@ -971,16 +1191,118 @@ class Corpus(object):
         :param maxconc: Maximum number of concordance lines
         :type maxconc: `int`
 
+        :param conc_window: Only keep this many tokens of context to the left
+                            and right of each match, or a `(left, right)` tuple
+        :type conc_window: `int`/`tuple`
+
+        :param conc_chars: Only keep this many characters of context to the
+                           left and right, or a `(left, right)` tuple
+        :type conc_chars: `int`/`tuple`
+
+        :param sort_keys: Keep the first `n` words to the left and right of
+                          each match in columns `L1` ... `Ln` and `R1` ... `Rn`,
+                          for quick sorting with
+                          :func:`~corpkit.interrogation.Concordance.sort_kwic`
+        :type sort_keys: `int`
+
+        :param on_disk: Write lines to an SQLite database as they are found,
+                        for results too big for memory. `True` uses a
+                        temporary file; a string is the path of a new one.
+                        There is no `maxconc` unless given.
+        :type on_disk: `bool`/`str`
+
         :returns: A :class:`corpkit.interrogation.Concordance` instance, with 
                   columns showing filename, subcorpus name, speaker name, left 
-                  context, match and right context.
+                  context, match and right context. With `on_disk`, a
+                  :class:`corpkit.concstore.DiskConcordance` view of them.
         """
 
         kwargs.pop('conc', None)
         kwargs.pop('conc', None)
         kwargs.pop('corpus', None)
+        on_disk = kwargs.pop('on_disk', False)
+        if on_disk:
+            from corpkit.concstore import concordance_to_disk
+            if args:
+                kwargs['search'] = args[0]
+            return concordance_to_disk(self.iter_concordance(**kwargs),
+                                       path=None if on_disk is True else on_disk)
         return self.interrogate(conc='only', *args, **kwargs)
 
+    def iter_concordance(self, search, chunksize=1000, multiprocess=False,
+                         tuples=False, **kwargs):
+        """
+        Concordance the corpus one file at a time, yielding lines as soon as
+        they are found, rather than all at once at the end.
+
+        :Example:
+
+        >>> for chunk in corpus.iter_concordance({W: r'^fr?iends?$'}, chunksize=100):
+        ...     chunk.format(n=5)
+        ...     break
+
+        Arguments are the same as :func:`~corpkit.corpus.Corpus.concordance`,
+        plus:
+
+        :param chunksize: Number of lines in each chunk
+        :type chunksize: `int`
+
+        :param multiprocess: Search this many files at once (`True` for one
+                             per core). Chunks then arrive in the order files
+                             are finished, not corpus order.
+        :type multiprocess: `int`/`bool`
+
+        :param tuples: Yield each line as a `tuple`, instead of chunks
+        :type tuples: `bool`
+
+        :returns: A generator of :class:`corpkit.interrogation.Concordance`
+                  chunks, or of `tuples`. Breaking out of the loop, or closing
+                  the generator, stops the search.
+        """
+        from corpkit.multiprocess import iter_concordance
+        if self.datatype != 'conll':
+            raise ValueError('You need to parse or tokenise the corpus before searching.')
+        for key in ['conc', 'corpus', 'subcorpora']:
+            kwargs.pop(key, None)
+        if self.skip:
+            kwargs['skip_metadata'] = dict(kwargs.get('skip_metadata') or {}, **self.skip)
+        if self.just:
+            kwargs['just_metadata'] = dict(kwargs.get('just_metadata') or {}, **self.just)
+        if kwargs.get('shared') is True:
+            kwargs['shared'] = self.share().handle
+        return iter_concordance(self, search, chunksize=chunksize,
+                                multiprocess=multiprocess, tuples=tuples, **kwargs)
+
+    def sentence(self, f, s, window=0, usecols=None):
+        """
+        Get one sentence of a file, read straight from its position in the
+        file rather than by parsing the whole thing
+
+        :Example:
+
+        >>> corpus.sentence('1-01.txt.conll', 12, window=1)
+
+        :param f: the file: a :class:`corpkit.corpus.File`, its path, or
+                  its name
+        :param s: sentence number, as in the `i` column of concordance lines
+        :type s: `int`
+
+        :param window: also get this many sentences before and after
+        :type window: `int`
+
+        :returns: a `DataFrame` of tokens, indexed by sentence and token
+                  number, with metadata as `._metadata`
+        """
+        import os
+        from corpkit.conll import read_sentences
+        path = getattr(f, 'path', f)
+        if not os.path.isfile(path):
+            found = [i.path for i in self.all_files if i.name == path]
+            if not found:
+                raise ValueError('No file called %s in %s.' % (path, self.name))
+            path = found[0]
+        return read_sentences(path, range(s - window, s + window + 1), usecols=usecols)
+
     def interroplot(self, search, **kwargs):
         """
         Interrogate, relativise, then plot, with very little customisability.
@@ -1032,7 +1354,9 @@ class Corpus(object):
         :param name: a name for the model
         :type name: `str`
 
-        :param kwargs: keyword arguments for the interrogate() method
+        :param kwargs: keyword arguments for the interrogate() method. For 
+                       big corpora or long n-grams, pass ``approximate=True`` 
+                       to count the long tail in bounded memory
         :type kwargs: `keyword arguments`
 
         :returns: a :class:`corpkit.model.MultiModel`
@@ -1172,7 +1496,8 @@ class File(Corpus):
         kwargs = {'print_info': False, 'level': 'f', 'datatype': datatype}
         kwargs.update(kwa)
         Corpus.__init__(self, self.path, **kwargs)
-        if self.path.endswith('.conll') or self.path.endswith('.conllu'):
+        from corpkit.process import strip_compression
+        if strip_compression(self.path).endswith(('.conll', '.conllu')):
             self.datatype = 'conll'
         else:
             self.datatype = 'plaintext'
@@ -1190,6 +1515,10 @@ class File(Corpus):
         :returns: `str`/unpickled data
         """
         from corpkit.constants import OPENER
+        from corpkit.process import compression_of, open_compressed
+        if compression_of(self.path):
+            with open_compressed(self.path) as fo:
+                return fo.read()
         with OPENER(self.path, 'r', **kwargs) as fo:
             return fo.read()
 
@@ -1203,8 +1532,8 @@ class File(Corpus):
         * For plaintext, this is a string
         """
         if self.datatype == 'conll':
-            from corpkit.conll import parse_conll
-            return parse_conll(self.path)
+            from corpkit.cache import documents
+            return documents.get(self.path)
         else:
             from corpkit.process import saferead
             return saferead(self.path)[0]
@@ -1248,8 +1577,24 @@ class Datalist(list):
     def __repr__(self):
         return "<%s instance: %d items>" % (classname(self), len(self))
 
+    def _position(self, key):
+        """
+        Find the first item called `key`, using a dict of names that is 
+        rebuilt if the list has changed
+        """
+        names = self.__dict__.get('_names')
+        ix = names.get(key) if names is not None else None
+        if ix is None or ix >= len(self) or \
+           getattr(list.__getitem__(self, ix), 'name', None) != key:
+            names = {}
+            for i, d in enumerate(self):
+                names.setdefault(getattr(d, 'name', None), i)
+            self.__dict__['_names'] = names
+            ix = names.get(key)
+        return ix
+
     def __getattr__(self, key):
-        ix = next((i for i, d in enumerate(self) if d.name == key), None)
+        ix = self._position(key)
         if ix is not None:
             return self[ix]
 
@@ -1270,14 +1615,14 @@ class Datalist(list):
             return super(Datalist, self).__getitem__(key)
 
         elif isinstance(key, STRINGTYPE):
-            ix = next((i for i, x in enumerate(self) if x.name == key), None)
+            ix = self._position(key)
             if ix is not None:
                 return super(Datalist, self).__getitem__(ix)
 
     def __delitem__(self, key):
         from corpkit.constants import STRINGTYPE
         if isinstance(key, STRINGTYPE):
-            key = next((i for i, d in enumerate(self) if d.name == key), None)
+            key = self._position(key)
             if key is None:
                 return
         super(Datalist, self).__delitem__(key)
@@ -1351,8 +1696,12 @@ class Corpora(Datalist):
                 else:
                     data = os.path.join('data', data)
             self.name = os.path.basename(data)
-            data = sorted([join(data, d) for d in os.listdir(data)
-                           if isdir(join(data, d)) and not d.startswith('.')])
+            try:
+                from os import scandir
+            except ImportError:
+                from scandir import scandir
+            data = sorted([join(data, d.name) for d in scandir(data)
+                           if d.is_dir() and not d.name.startswith('.')])
 
         # otherwise, make a list of Corpus objects
 
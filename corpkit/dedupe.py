@@ -0,0 +1,187 @@
+"""
+corpkit: finding near-duplicate documents
+
+Syndicated or reposted texts can make up a good part of a corpus, and
+inflate every count made from it. Each file is summarised as a MinHash
+signature of its word shingles, and locality-sensitive hashing finds the
+pairs of files whose shingles are likely to overlap by more than a
+threshold, without comparing every file with every other.
+
+Signatures are made in a process pool, and kept in the corpus' metadata
+store along with the size and modification time of each file, so that only
+new and changed files need their signatures made again.
+"""
+
+from __future__ import print_function
+
+# a Mersenne prime, small enough that hashing never overflows 64 bits
+PRIME = (1 << 31) - 1
+
+def document_tokens(path):
+    """
+    Get the lowercased words of a CONLL or plain text file, as bytes
+    """
+    from corpkit.process import open_compressed, strip_compression
+    conll = strip_compression(path).endswith(('.conll', '.conllu'))
+    tokens = []
+    with open_compressed(path, 'rb') as fo:
+        while True:
+            lines = fo.readlines(1 << 22)
+            if not lines:
+                break
+            for line in lines:
+                if not conll:
+                    tokens.extend(line.lower().split())
+                elif line[:1] not in [b'#', b'\n', b'\r', b'']:
+                    parts = line.split(b'\t', 2)
+                    if len(parts) > 1:
+                        tokens.append(parts[1].lower())
+    return tokens
+
+def shingle_hashes(tokens, size=5):
+    """
+    Hash every run of `size` consecutive tokens
+
+    :returns: `numpy` array of unique 32 bit hashes
+    """
+    import zlib
+    import numpy as np
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    size = min(size, len(tokens))
+    hashes = set(zlib.crc32(b' '.join(tokens[i:i + size]))
+                 for i in range(len(tokens) - size + 1))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+def permutations(num_perm, seed=1):
+    """
+    Get the `a` and `b` of each hash function, `(a * x + b) % PRIME`
+    """
+    import numpy as np
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, PRIME, size=num_perm).astype(np.uint64)
+    return a, b
+
+def minhash(path, num_perm=128, shingle=5):
+    """
+    Make the MinHash signature of a file
+
+    :returns: `numpy` array of `num_perm` minimum hashes
+    """
+    import numpy as np
+    a, b = permutations(num_perm)
+    hashes = shingle_hashes(document_tokens(path), size=shingle)
+    signature = np.full(num_perm, PRIME, dtype=np.uint64)
+    # a block at a time, to bound memory for long documents
+    for start in range(0, len(hashes), 4096):
+        block = hashes[start:start + 4096]
+        values = (a[:, None] * block[None, :] + b[:, None]) % PRIME
+        np.minimum(signature, values.min(axis=1), out=signature)
+    return signature
+
+def signatures(corpus, num_perm=128, shingle=5, multiprocess=True):
+    """
+    Get the MinHash signature of every file in a corpus, reusing those in
+    the metadata store for files that have not changed since
+
+    :returns: `dict` of file paths and signatures
+    """
+    import os
+    import functools
+    import multiprocessing
+    from corpkit.cache import file_fingerprint
+    from corpkit.manifest import MIN_POOL_FILES
+    from corpkit.metastore import MetadataStore
+    paths = list(corpus.all_filepaths)
+    store, name, stored = None, 'minhash-%d-%d' % (num_perm, shingle), {}
+    if getattr(corpus, 'level', None) == 'c':
+        store = MetadataStore(corpus.path)
+        # read before update(), which drops every table if any file changed
+        stored = store.get_table(name) or {}
+        store.update()
+    rel = {p: os.path.relpath(p, corpus.path) for p in paths}
+    stamps = {rel[p]: file_fingerprint(p) for p in paths}
+    # each stored signature is kept with the (size, mtime) it was made from
+    done = {r: entry[1] for r, entry in stored.items()
+            if isinstance(entry, tuple) and entry[0] == stamps.get(r)}
+    todo = [p for p in paths if rel[p] not in done]
+    if todo:
+        func = functools.partial(minhash, num_perm=num_perm, shingle=shingle)
+        if multiprocess is True:
+            multiprocess = multiprocessing.cpu_count()
+        # pool workers can't start pools of their own
+        if multiprocess and multiprocess > 1 and len(todo) >= MIN_POOL_FILES \
+           and not multiprocessing.current_process().daemon:
+            pool = multiprocessing.Pool(min(multiprocess, len(todo)))
+            try:
+                sigs = pool.map(func, todo, chunksize=max(1, len(todo) // (multiprocess * 4)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            sigs = [func(p) for p in todo]
+        done.update({rel[p]: s for p, s in zip(todo, sigs)})
+    if store is not None and (todo or len(done) != len(stored)):
+        store.set_table(name, {r: (stamps[r], s) for r, s in done.items()})
+    return {p: done[rel[p]] for p in paths}
+
+def lsh_bands(num_perm, threshold):
+    """
+    Choose how many bands, of how many rows, to split signatures into, so
+    that files become candidates a little below `threshold` similarity.
+    Candidates are checked afterward, so missing a pair is worse than
+    comparing too many.
+
+    :returns: `(bands, rows)`
+    """
+    options = []
+    for rows in range(1, num_perm + 1):
+        if not num_perm % rows:
+            bands = num_perm // rows
+            options.append(((1.0 / bands) ** (1.0 / rows), bands, rows))
+    below = [o for o in options if o[0] <= threshold]
+    _, bands, rows = max(below) if below else min(options)
+    return bands, rows
+
+def near_duplicates(sigs, threshold=0.8):
+    """
+    Group files with similar signatures
+
+    Files that share every row of any band are compared, and joined into a
+    group if the estimated Jaccard similarity of their shingles is at least
+    `threshold`. The first file of each group, by path, is the original.
+
+    :param sigs: `dict` of file paths and signatures, from :func:`signatures`
+    :returns: `dict` of each duplicate's path and the path of its original
+    """
+    import numpy as np
+    paths = sorted(sigs)
+    if len(paths) < 2:
+        return {}
+    matrix = np.vstack([sigs[p] for p in paths])
+    bands, rows = lsh_bands(matrix.shape[1], threshold)
+    parent = list(range(len(paths)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(matrix[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            for n, x in enumerate(members):
+                for y in members[n + 1:]:
+                    if (x, y) in checked:
+                        continue
+                    checked.add((x, y))
+                    if np.mean(matrix[x] == matrix[y]) >= threshold:
+                        rx, ry = find(x), find(y)
+                        if rx != ry:
+                            parent[max(rx, ry)] = min(rx, ry)
+    return {paths[i]: paths[find(i)] for i in range(len(paths)) if find(i) != i}
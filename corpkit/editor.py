@@ -169,7 +169,13 @@ def editor(interrogation,
                     denom = df2
         else:
             denom = list(df2)
-        if single_totals:
+        if single_totals and sparse and operation in ['%', '/'] and len(denom) == len(df.index):
+            # dividing a sparse frame with pandas fills in its zeros
+            from corpkit.sparse import scale_rows
+            mult = 100.0 if operation == '%' else 1.0
+            totals = df.sum() * mult / float(df.sum().sum())
+            df = scale_rows(df, [mult / d if d else 0.0 for d in denom])
+        elif single_totals:
             if operation == '%':
                 totals = df.sum() * 100.0 / float(df.sum().sum())
                 df = df * 100.0
@@ -681,10 +687,13 @@ def editor(interrogation,
         # if just a single result
     else:
         df = DataFrame(df)
+    from corpkit.sparse import is_sparse
+    sparse = is_sparse(df)
     if operation.startswith('k'):
         if sort_by is False:
             if not df1_istotals:
-                sort_by = 'turbulent'
+                # sorting by trend would fill in the zeros
+                sort_by = 'total' if sparse else 'turbulent'
         if df1_istotals:
             df = df.T
     
@@ -841,15 +850,19 @@ def editor(interrogation,
                 df2 = denominator
 
         from corpkit.keys import keywords
-        df = keywords(df, df2, 
-                      selfdrop=selfdrop, 
-                      threshold=threshold, 
-                      print_info=print_info,
-                      editing=True,
-                      calc_all=calc_all,
-                      sort_by=sort_by,
-                      measure=keyword_measure,
-                      **kwargs)
+        if sparse and isinstance(denominator, STRINGTYPE) and denominator == 'self':
+            from corpkit.sparse import sparse_keywords
+            df = sparse_keywords(df, measure=keyword_measure, selfdrop=selfdrop)
+        else:
+            df = keywords(df, df2, 
+                          selfdrop=selfdrop, 
+                          threshold=threshold, 
+                          print_info=print_info,
+                          editing=True,
+                          calc_all=calc_all,
+                          sort_by=sort_by,
+                          measure=keyword_measure,
+                          **kwargs)
     
     # drop infinites and nans
     df = df.replace([np.inf, -np.inf], np.nan)
@@ -1394,6 +1394,8 @@ def interpreter(debug=False,
         else:
             if val.startswith('i'):
                 sorted_lines = thing_to_edit.sort_index()
+            elif val[0] in ['l', 'r'] and val[1:].isdigit():
+                sorted_lines = thing_to_edit.sort_kwic(val)
             else:
                 if val.startswith('l') or val.startswith('r') or val.startswith('m'):
                     val = val[0]
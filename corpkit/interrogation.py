@@ -15,7 +15,8 @@ class Interrogation(object):
     Pandas object, which can be edited or plotted.
     """
 
-    def __init__(self, results=None, totals=None, query=None, concordance=None):
+    def __init__(self, results=None, totals=None, query=None, concordance=None,
+                 errors=None, guaranteed=None):
         """Initialise the class"""
         self.results = results
         """pandas `DataFrame` containing counts for each subcorpus"""
@@ -25,6 +26,10 @@ class Interrogation(object):
         """`dict` containing values that generated the result"""
         self.concordance = concordance
         """pandas `DataFrame` containing concordance lines, if concordance lines were requested."""
+        self.errors = errors
+        """pandas object the shape of `results`, giving the largest possible overestimate of each count, if `top` or `approximate` was used."""
+        self.guaranteed = guaranteed
+        """pandas `Series` of booleans, `True` for each result certainly among the most frequent, if `top` was used."""
 
     def __str__(self):
         if self.query.get('corpus'):
@@ -342,6 +347,12 @@ class Interrogation(object):
             to_plot = self.results
         elif branch.lower().startswith('t'):
             to_plot = self.totals
+        from corpkit.sparse import is_sparse, densify
+        if is_sparse(to_plot):
+            # only fill in the zeros of the columns being plotted
+            if num_to_plot != 'all' and isinstance(to_plot, pd.DataFrame):
+                to_plot = to_plot[list(to_plot.columns)[:num_to_plot]]
+            to_plot = densify(to_plot)
         return plotter(to_plot,
                        title=title,
                        x_label=x_label,
@@ -656,6 +667,80 @@ class Concordance(pd.core.frame.DataFrame):
         else:
             return shuffled
 
+    def kwic_key(self, key):
+        """
+        Get the word at a position to the left or right of each match,
+        lowercased: `L1` is the word just before it, `R2` the second after
+
+        Keys made by `concordance(sort_keys=n)` are used if there are any;
+        otherwise the word is found by splitting the `l` or `r` column.
+
+        :returns: `Series` of words, with `''` where there is none
+        """
+        import re
+        key = key.upper()
+        found = re.match(r'^([LR])([0-9]+)$', key)
+        if not found:
+            raise ValueError('Sort key must be L or R and a number, not %s.' % key)
+        if key in self.columns:
+            return self[key].fillna('').astype(str)
+        side, num = found.group(1).lower(), int(found.group(2))
+        words = self[side].fillna('').astype(str).str.lower().str.split()
+        words = words.str[-num] if side == 'l' else words.str[num - 1]
+        return words.fillna('')
+
+    def sort_kwic(self, by, ascending=True):
+        """
+        Stable sort of lines by words around the match and/or by columns
+
+        :param by: keys such as `'R1'`, `'L2'`, or column names, applied in
+                   order
+        :type by: `str`/`list`
+        :param ascending: sort direction, for all keys or each
+        :type ascending: `bool`/`list`
+
+        :Example:
+
+        >>> lines = corpus.concordance({W: 'any'}, sort_keys=3)
+        >>> lines.sort_kwic(['R1', 'R2', 'L1'])
+
+        :returns: a new :class:`corpkit.interrogation.Concordance`
+        """
+        import re
+        import numpy as np
+        from corpkit.constants import STRINGTYPE
+        if isinstance(by, STRINGTYPE):
+            by = [by]
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(by)
+        # sort integer codes of the words, whose order is alphabetical
+        codes, sizes = [], []
+        for key, asc in zip(by, ascending):
+            if re.match(r'^[LRlr][0-9]+$', key):
+                values = self.kwic_key(key)
+            else:
+                values = self[key].fillna('').astype(str).str.lower()
+            code, uniques = pd.factorize(values, sort=True)
+            code = code.astype(np.int64)
+            codes.append(code if asc else len(uniques) - 1 - code)
+            sizes.append(max(len(uniques), 1))
+        # pack the codes into one number per line if they fit, as one
+        # stable argsort is much quicker than lexsort
+        if np.prod(np.array(sizes, dtype=float)) < 2 ** 62:
+            packed = np.zeros(len(self), dtype=np.int64)
+            for code, size in zip(codes, sizes):
+                packed = packed * size + code
+            order = np.argsort(packed, kind='stable')
+        else:
+            # lexsort sorts by its last key first
+            order = np.lexsort(codes[::-1])
+        lines = Concordance(self.iloc[order])
+        try:
+            lines.query = getattr(self, 'query', None)
+        except AttributeError:
+            pass
+        return lines
+
     def edit(self, *args, **kwargs):
         """
         Delete or keep rows by subcorpus or by middle column text.
@@ -666,6 +751,89 @@ class Concordance(pd.core.frame.DataFrame):
         from corpkit.editor import editor
         return editor(self, *args, **kwargs)
 
+    def _addresses(self):
+        """
+        Get the file, sentence and token number of each line
+        """
+        if 'f' not in self.columns or 'i' not in self.columns:
+            raise ValueError('Concordance lines need file and index columns to get their context.')
+        # lines from tregex have no sentence or token number
+        if not self['i'].astype(str).str.match(r'^\d+,\d+$').all():
+            raise ValueError('Only concordance lines from CONLL files can be given their context, '
+                             'not lines from tregex searches.')
+        nums = self['i'].astype(str).str.split(',')
+        return [(f, int(n[0]), int(n[1])) for f, n in zip(self['f'], nums)]
+
+    def context(self, row, window=1, usecols=None):
+        """
+        Get the sentence of a line, and `window` sentences either side of it,
+        from its file, with every annotation layer
+
+        :param row: index of the line
+        :param window: number of sentences before and after
+        :type window: `int`
+
+        :Example:
+
+        >>> lines.context(0, window=1)[['w', 'p']]
+
+        :returns: `DataFrame` of tokens, as from :func:`~corpkit.corpus.Corpus.sentence`
+        """
+        from corpkit.conll import read_sentences
+        f, s, _ = Concordance(self.loc[[row]])._addresses()[0]
+        return read_sentences(f, range(s - window, s + window + 1), usecols=usecols)
+
+    def expand(self, n_sentences=1, show='w', preserve_case=False):
+        """
+        Widen the left and right context of each line to the whole sentence,
+        plus `n_sentences` before and after it, read from the files. Every
+        token is shown, including punctuation.
+
+        :param n_sentences: number of sentences to add either side
+        :type n_sentences: `int`
+        :param show: the CONLL column to show in the context
+        :type show: `str`
+
+        :returns: a new :class:`corpkit.interrogation.Concordance`
+        """
+        from collections import defaultdict
+        from corpkit.conll import read_sentences
+        addresses = self._addresses()
+        wanted = defaultdict(set)
+        for f, s, _ in addresses:
+            wanted[f].update(range(s - n_sentences, s + n_sentences + 1))
+        # tokens and token numbers of each sentence, by file
+        sents = {}
+        for f, numbers in wanted.items():
+            df = read_sentences(f, numbers, usecols=None)
+            sents[f] = {}
+            if df is None:
+                continue
+            col = df[show].astype(str)
+            if not preserve_case:
+                col = col.str.lower()
+            for s, toks in col.groupby(level=0, sort=False):
+                sents[f][s] = (list(toks.index.get_level_values(1)), list(toks.values))
+        left, right = [], []
+        for f, s, i in addresses:
+            found = sents[f]
+            labels, toks = found.get(s, ([], []))
+            before = [' '.join(found[n][1]) for n in range(s - n_sentences, s) if n in found]
+            after = [' '.join(found[n][1]) for n in range(s + 1, s + n_sentences + 1) if n in found]
+            before.append(' '.join(t for n, t in zip(labels, toks) if n < i))
+            after.insert(0, ' '.join(t for n, t in zip(labels, toks) if n > i))
+            left.append(' '.join(x for x in before if x))
+            right.append(' '.join(x for x in after if x))
+        lines = self.copy()
+        lines['l'] = left
+        lines['r'] = right
+        lines = Concordance(lines)
+        try:
+            lines.query = getattr(self, 'query', None)
+        except AttributeError:
+            pass
+        return lines
+
     def __str__(self):
         return self.format(print_it=False)
 
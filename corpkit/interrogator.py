@@ -3,7 +3,7 @@ corpkit: Interrogate a parsed corpus
 """
 
 from __future__ import print_function
-from corpkit.constants import STRINGTYPE, PYTHON_VERSION, INPUTFUNC
+from corpkit.constants import STRINGTYPE, PYTHON_VERSION, INPUTFUNC, COMPRESSED_EXTENSIONS
 
 def interrogator(corpus, 
     search='w', 
@@ -44,6 +44,25 @@ def interrogator(corpus,
     show_conc_metadata = kwargs.pop('show_conc_metadata', False)
     fsi_index = kwargs.pop('fsi_index', True)
     dep_type = kwargs.pop('dep_type', 'collapsed-ccprocessed-dependencies')
+    top = kwargs.pop('top', False)
+    approximate = kwargs.pop('approximate', False)
+    sparse = kwargs.pop('sparse', False)
+    coded = kwargs.pop('coded', False)
+    cache_documents = kwargs.pop('cache_documents', False)
+    incremental = kwargs.pop('incremental', False)
+    checkpoint = kwargs.pop('checkpoint', False)
+    resume = kwargs.pop('resume', False)
+    checkpoint_dir = kwargs.pop('checkpoint_dir', None)
+    file_subcorpora = kwargs.pop('file_subcorpora', None)
+    shared = kwargs.pop('shared', None)
+    partial = kwargs.pop('partial', False)
+    prefetch = kwargs.pop('prefetch', False)
+    prefetch_memory = kwargs.pop('prefetch_memory', 256 * 1024 * 1024)
+    skip_files = kwargs.pop('skip_files', None)
+    # whether java is available, if already checked by the caller
+    have_java = kwargs.pop('have_java', None)
+    if top and approximate:
+        raise ValueError('top and approximate cannot be used together.')
 
     nosubmode = subcorpora is None
     #todo: temporary
@@ -69,14 +88,16 @@ def interrogator(corpus,
     from corpkit.process import (tregex_engine, get_deps, unsplitter, sanitise_dict, 
                                  animator, filtermaker, fix_search,
                                  pat_format, auto_usecols, format_tregex,
-                                 make_conc_lines_from_whole_mid)
+                                 make_conc_lines_from_whole_mid,
+                                 conc_lines_from_spans)
     from corpkit.other import as_regex
     from corpkit.dictionaries.process_types import Wordlist
     from corpkit.build import check_jdk
     from corpkit.conll import pipeline
     from corpkit.process import delete_files_and_subcorpora
     
-    have_java = check_jdk()
+    if have_java is None:
+        have_java = check_jdk()
 
     # remake corpus without bad files and folders 
     corpus, skip_metadata, just_metadata = delete_files_and_subcorpora(corpus, skip_metadata, just_metadata)
@@ -125,6 +146,10 @@ def interrogator(corpus,
         from time import localtime, strftime
         signal.signal(signal.SIGINT, original_sigint)
         thetime = strftime("%H:%M:%S", localtime())
+        # keep progress in case the user quits
+        if checkpointer is not None and not checkpointer.busy:
+            checkpointer.save(checkpoint_state())
+            print('\n\n%s: Progress saved. Use resume=True to continue after quitting.' % thetime)
         INPUTFUNC('\n\n%s: Paused. Press any key to resume, or ctrl+c to quit.\n' % thetime)
         time = strftime("%H:%M:%S", localtime())
         print('%s: Interrogation resumed.\n' % time)
@@ -204,14 +229,14 @@ def interrogator(corpus,
 
     def uniquify(conc_lines):
         """get unique concordance lines"""
-        from collections import OrderedDict
         unique_lines = []
-        checking = []
-        for index, (_, speakr, start, middle, end) in enumerate(conc_lines):
-            joined = ' '.join([speakr, start, 'MIDDLEHERE:', middle, ':MIDDLEHERE', end])
-            if joined not in checking:
-                unique_lines.append(conc_lines[index])
-            checking.append(joined)
+        checking = set()
+        for line in conc_lines:
+            # speaker, left, middle and right
+            key = tuple(line[3:7])
+            if key not in checking:
+                unique_lines.append(line)
+                checking.add(key)
         return unique_lines
 
     def compiler(pattern):
@@ -370,7 +395,13 @@ def interrogator(corpus,
         """determine how to structure the corpus for interrogation"""
         # skip file definitions if they are not needed
         if getattr(corpus, '_dlist', False):
-
+            # files scheduled across workers go back into their subcorpora
+            if file_subcorpora:
+                grouped = {}
+                for f in corpus.files:
+                    name = file_subcorpora[f.path]
+                    grouped.setdefault((name, os.path.dirname(f.path)), []).append(f)
+                return grouped
             return {(i.name, i.path): [i] for i in list(corpus.files)}
             #return {('Sample', 'Sample'): list(corpus.files)}
 
@@ -486,6 +517,12 @@ def interrogator(corpus,
         else:
             base = base.split() 
 
+        # first few words either side of the match, for sorting
+        if kwargs.get('sort_keys'):
+            num = int(kwargs['sort_keys'])
+            base += ['L%d' % n for n in range(1, num + 1)]
+            base += ['R%d' % n for n in range(1, num + 1)]
+
         if show_conc_metadata:
             from corpkit.build import get_all_metadata_fields
             meta = get_all_metadata_fields(corpus.path)
@@ -563,6 +600,34 @@ def interrogator(corpus,
             res = [correct_spelling(r) for r in res]
         return res
 
+    def add_results(name, res, discard=False):
+        """
+        Count the results from one file
+        """
+        from corpkit.coded import CodedCounts
+        if isinstance(results, CodedCounts):
+            results.add(name, res, discard=discard)
+            return
+        countres = Counter(res)
+        # discard removes low results, helping with 
+        # curse of dimensionality
+        if isinstance(discard, float):
+            nkeep = len(countres) - len(countres) * discard
+            countres = Counter({k: v for i, (k, v) in enumerate(countres.most_common()) if i <= nkeep})
+        elif isinstance(discard, int):
+            countres = Counter({k: v for k, v in countres.most_common() if v >= discard})
+        results[name] += countres
+
+    def checkpoint_state():
+        """
+        Get everything needed to resume the interrogation
+        """
+        from corpkit.coded import CodedCounts
+        return {'results': results if isinstance(results, CodedCounts) else dict(results),
+                'count_results': dict(count_results),
+                'conc_results': dict(conc_results),
+                'numconc': numconc}
+
     def postprocess_concline(line, fsi_index=False, conc=False):
         # todo: are these right?
         if not conc:
@@ -619,6 +684,7 @@ def interrogator(corpus,
     language_model = kwargs.get('language_model')
 
     # set up pause method
+    checkpointer = None
     original_sigint = signal.getsignal(signal.SIGINT)
     if kwargs.get('paralleling', None) is None:
         if not root:
@@ -674,10 +740,19 @@ def interrogator(corpus,
 
     # split corpus if the user wants multiprocessing but no other iterable
     if not im and multiprocess:
-        im = 'datalist'
-        if getattr(corpus, 'subcorpora', False):
+        # tregex is given whole directories, which can't be shared out by file
+        datatype = getattr(corpus, 'datatype', 'conll')
+        _, by_dir, _, tree_to_text, _ = determine_search_func(show)
+        if (getattr(corpus, 'subcorpora', False) or corpus.level == 's') \
+           and not (by_dir or tree_to_text):
+            # share out files (or parts of big files) rather than subcorpora,
+            # so that one big subcorpus or file does not keep a process busy
+            im = 'scheduled'
+        elif getattr(corpus, 'subcorpora', False):
+            im = 'datalist'
             corpus = corpus[:]
         else:
+            im = 'datalist'
             corpus = corpus.files
 
     search = fix_search(search, case_sensitive=case_sensitive, root=root)
@@ -694,10 +769,17 @@ def interrogator(corpus,
     locs['subcorpora'] = subcorpora
     locs['nosubmode'] = nosubmode
 
+    # all parallel workers checkpoint into the same directory
+    if (checkpoint or resume) and not checkpoint_dir:
+        from corpkit.cache import query_params, checkpoint_directory
+        checkpoint_dir = checkpoint_directory(query_params(locs, kwargs), corpus)
+        locs['checkpoint_dir'] = checkpoint_dir
+
     # send to multiprocess function
     if im:
         signal.signal(signal.SIGINT, original_sigint)
         from corpkit.multiprocess import pmultiquery
+        locs['have_java'] = have_java
         return pmultiquery(**locs)
 
     # get corpus metadata
@@ -714,7 +796,25 @@ def interrogator(corpus,
         
     # store all results in here
     from collections import defaultdict
-    results = defaultdict(Counter)
+    if top:
+        # bounded memory: keep only a heavy hitters summary per subcorpus
+        from corpkit.sketch import SpaceSaving
+        # an int is the number of counters, a float the error bound
+        if isinstance(top, float):
+            results = defaultdict(lambda: SpaceSaving(epsilon=top))
+        else:
+            results = defaultdict(lambda: SpaceSaving(top))
+    elif approximate:
+        # bounded memory: count the long tail in a count-min sketch
+        from corpkit.sketch import CountMinSketch
+        sketch_args = approximate if isinstance(approximate, dict) else {}
+        results = defaultdict(lambda: CountMinSketch(**sketch_args))
+    elif coded:
+        # results are integer-coded, and only decoded into strings at the end
+        from corpkit.coded import CodedCounts
+        results = CodedCounts()
+    else:
+        results = defaultdict(Counter)
     count_results = defaultdict(list)
     conc_results = defaultdict(list)
 
@@ -756,8 +856,17 @@ def interrogator(corpus,
         treg_q = search['t']
         op = ['-%s' % i for i in translated_option] + ['-o', '-f']
 
+    # when concordancing, get each match's node number and its whole tree in
+    # one tregex run, and slice lines from the tree's leaves
+    span_conc = simple_tregex_mode and not no_conc and not countmode \
+                and translated_option in [['t'], ['u'], ['o']]
+
     # make iterable object for corpus interrogation
     to_iterate_over = make_search_iterable(corpus)
+    if skip_files:
+        skip_files = set(skip_files)
+        to_iterate_over = {k: [f for f in v if getattr(f, 'path', f) not in skip_files]
+                           for k, v in to_iterate_over.items()}
 
     try:
         from ipywidgets import IntProgress
@@ -789,8 +898,64 @@ def interrogator(corpus,
                                            fsi_index=fsi_index,
                                            simple_tregex_mode=False)
 
+    # keep parsed files in memory for later searches
+    if cache_documents:
+        from corpkit.cache import documents
+        documents.enable(cache_documents)
+
+    # reuse stored results for files that have not changed
+    file_store = None
+    if incremental:
+        from corpkit.cache import FileResults, query_params
+        try:
+            file_store = FileResults(query_params(locs, kwargs))
+        # an argument that can't be hashed reliably
+        except TypeError:
+            file_store = None
+
+    # periodically save progress, and pick up from saved progress
+    if checkpoint_dir:
+        from corpkit.cache import Checkpoint, checkpoint_name
+        from corpkit.coded import CodedCounts
+        every = checkpoint if isinstance(checkpoint, int) and checkpoint is not True else 100
+        name = checkpoint_name(corpus, kwargs.get('paralleling'), kwargs.get('outname', ''))
+        checkpointer = Checkpoint(checkpoint_dir, name, every=every)
+        state = checkpointer.load() if resume else None
+        if state:
+            if isinstance(results, CodedCounts):
+                results = state['results']
+            else:
+                results.update(state['results'])
+            count_results.update(state['count_results'])
+            conc_results.update(state['conc_results'])
+            numconc = state['numconc']
+            if not kwargs.get('paralleling') and kwargs.get('printstatus', True):
+                thetime = strftime("%H:%M:%S", localtime())
+                print('%s: Resuming: %d files/subcorpora already done.' % (thetime, len(checkpointer.done)))
+
  
 
+    # read conll files ahead, in background threads, while each is searched
+    prefetcher = None
+    if prefetch and not (tree_to_text or simple_tregex_mode):
+        from corpkit.prefetch import Prefetcher
+        to_read = []
+        for _, files in sorted(to_iterate_over.items()):
+            for f in files:
+                span = getattr(f, 'span', None)
+                if shared and not span and f.path in shared['files']:
+                    continue
+                # results already stored for this file will be reused
+                if file_store is not None and not span and file_store.fresh(f.path):
+                    continue
+                if checkpointer is not None:
+                    filekey = f.path if not span else '%s:%d-%d' % (f.path, span[0], span[1])
+                    if filekey in checkpointer.done:
+                        continue
+                to_read.append((f.path, span))
+        depth = prefetch if isinstance(prefetch, int) and prefetch is not True else 4
+        prefetcher = Prefetcher(to_read, depth=depth, max_bytes=prefetch_memory)
+
     # Iterate over data, doing interrogations
     for (subcorpus_name, subcorpus_path), files in sorted(to_iterate_over.items()):
         if nosubmode:
@@ -803,11 +968,27 @@ def interrogator(corpus,
 
         # get either everything (tree_to_text) or the search['t'] query
         if tree_to_text or simple_tregex_mode:
-            result = tregex_engine(query=treg_q,
-                                   options=op,
-                                   corpus=subcorpus_path,
-                                   root=root,
-                                   preserve_case=preserve_case)
+            if checkpointer is not None:
+                if subcorpus_path in checkpointer.done:
+                    current_iter += 1
+                    continue
+                checkpointer.busy = True
+            if span_conc:
+                matches = tregex_engine(query=treg_q,
+                                        options=['-x', '-w', '-o', '-f', '-s'],
+                                        corpus=subcorpus_path,
+                                        root=root,
+                                        preserve_case=preserve_case)
+                result, conc_result = conc_lines_from_spans(matches or [],
+                                                            option=translated_option[0],
+                                                            preserve_case=preserve_case,
+                                                            sort_keys=int(kwargs.get('sort_keys') or 0))
+            else:
+                result = tregex_engine(query=treg_q,
+                                       options=op,
+                                       corpus=subcorpus_path,
+                                       root=root,
+                                       preserve_case=preserve_case)
 
             # format search results with slashes etc
             if not countmode and not tree_to_text:
@@ -817,23 +998,25 @@ def interrogator(corpus,
 
             # if concordancing, do the query again with 'whole' sent and fname
             if not no_conc:
-                ops = ['-w'] + op
-                #ops = [i for i in ops if i != '-n']
-                whole_result = tregex_engine(query=search['t'],
-                                             options=ops,
-                                             corpus=subcorpus_path,
-                                             root=root,
-                                             preserve_case=preserve_case
-                                            )
-
-                # format match too depending on option
-                if not only_format_match:
-                    wholeresult = format_tregex(whole_result, show, translated_option=translated_option,
-                                exclude=exclude, excludemode=excludemode, lemtag=lemtag,
-                            lem_instance=lem_instance, countmode=countmode, speaker_data=False, whole=True)
-
-                # make conc lines from conc results
-                conc_result = make_conc_lines_from_whole_mid(whole_result, result, show=show)
+                if not span_conc:
+                    ops = ['-w'] + op
+                    #ops = [i for i in ops if i != '-n']
+                    whole_result = tregex_engine(query=search['t'],
+                                                 options=ops,
+                                                 corpus=subcorpus_path,
+                                                 root=root,
+                                                 preserve_case=preserve_case
+                                                )
+
+                    # format match too depending on option
+                    if not only_format_match:
+                        wholeresult = format_tregex(whole_result, show, translated_option=translated_option,
+                                    exclude=exclude, excludemode=excludemode, lemtag=lemtag,
+                                lem_instance=lem_instance, countmode=countmode, speaker_data=False, whole=True)
+
+                    # make conc lines from conc results
+                    conc_result = make_conc_lines_from_whole_mid(whole_result, result, show=show,
+                                                                 sort_keys=int(kwargs.get('sort_keys') or 0))
                 for lin in conc_result:
                     if maxconc is False or numconc < maxconc:
                         conc_results[subcorpus_name].append(lin)
@@ -844,9 +1027,12 @@ def interrogator(corpus,
                 count_results[subcorpus_name] += [result]            
             else:
                 if result:
-                    results[subcorpus_name] += Counter([i[-1] for i in result])
+                    add_results(subcorpus_name, [i[-1] for i in result])
                 else:
-                    results[subcorpus_name] += Counter()
+                    add_results(subcorpus_name, [])
+
+            if checkpointer is not None:
+                checkpointer.finished(subcorpus_path, checkpoint_state)
 
             # update progress bar
             current_iter += 1
@@ -861,40 +1047,69 @@ def interrogator(corpus,
         for f in files:
             slow_treg_speaker_guess = kwargs.get('outname', '') if kwargs.get('multispeaker') else ''
             filepath, corefs = f.path, coref
-            res, conc_res = pipeline(filepath, search=search, show=show,
-                                     dep_type=dep_type,
-                                     exclude=exclude,
-                                     excludemode=excludemode,
-                                     searchmode=searchmode,
-                                     case_sensitive=case_sensitive,
-                                     conc=conc,
-                                     only_format_match=only_format_match,
-                                     speaker=slow_treg_speaker_guess,
-                                     gramsize=gramsize,
-                                     no_punct=no_punct,
-                                     no_closed=no_closed,
-                                     window=window,
-                                     filename=f.path,
-                                     coref=corefs,
-                                     countmode=countmode,
-                                     maxconc=(maxconc, numconc),
-                                     is_a_word=is_a_word,
-                                     by_metadata=subcorpora,
-                                     show_conc_metadata=show_conc_metadata,
-                                     just_metadata=just_metadata,
-                                     skip_metadata=skip_metadata,
-                                     fsi_index=fsi_index,
-                                     category=subcorpus_name,
-                                     translated_option=translated_option,
-                                     statsmode=statsmode,
-                                     preserve_case=preserve_case,
-                                     usecols=usecols,
-                                     search_trees=search_trees,
-                                     lem_instance=lem_instance,
-                                     lemtag=lemtag,
-                                     **kwargs)
+            # a big file may have been split into several pieces
+            span = getattr(f, 'span', None)
+            filekey = filepath if not span else '%s:%d-%d' % (filepath, span[0], span[1])
+            if checkpointer is not None and filekey in checkpointer.done:
+                current_iter += 1
+                continue
+            stored = None
+            if file_store is not None and not span:
+                stored = file_store.get(filepath)
+            # rebuild the file from shared memory rather than parsing it
+            file_kwargs = kwargs
+            if shared and not span and stored is None:
+                from corpkit.shared import shared_frame
+                shared_df = shared_frame(shared, filepath, usecols=usecols)
+                if shared_df is not None:
+                    file_kwargs = dict(kwargs, from_df=shared_df, metadata=shared_df._metadata)
+            if prefetcher is not None and stored is None and 'from_df' not in file_kwargs:
+                file_kwargs = dict(kwargs, data=prefetcher.get(filepath, span))
+            if stored is not None:
+                res, conc_res = stored
+            else:
+                res, conc_res = pipeline(filepath, search=search, show=show,
+                                         dep_type=dep_type,
+                                         exclude=exclude,
+                                         excludemode=excludemode,
+                                         searchmode=searchmode,
+                                         case_sensitive=case_sensitive,
+                                         conc=conc,
+                                         only_format_match=only_format_match,
+                                         speaker=slow_treg_speaker_guess,
+                                         gramsize=gramsize,
+                                         no_punct=no_punct,
+                                         no_closed=no_closed,
+                                         window=window,
+                                         filename=f.path,
+                                         span=span,
+                                         coref=corefs,
+                                         countmode=countmode,
+                                         # stored results must not depend on earlier files
+                                         maxconc=(maxconc, 0 if file_store is not None else numconc),
+                                         is_a_word=is_a_word,
+                                         by_metadata=subcorpora,
+                                         show_conc_metadata=show_conc_metadata,
+                                         just_metadata=just_metadata,
+                                         skip_metadata=skip_metadata,
+                                         fsi_index=fsi_index,
+                                         category=subcorpus_name,
+                                         translated_option=translated_option,
+                                         statsmode=statsmode,
+                                         preserve_case=preserve_case,
+                                         usecols=usecols,
+                                         search_trees=search_trees,
+                                         lem_instance=lem_instance,
+                                         lemtag=lemtag,
+                                         **file_kwargs)
+                if file_store is not None and not span:
+                    file_store.set(filepath, res, conc_res)
+            if checkpointer is not None:
+                checkpointer.busy = True
 
             if res is None and conc_res is None:
+                if checkpointer is not None:
+                    checkpointer.finished(filekey, checkpoint_state)
                 current_iter += 1
                 tstr = '%s%d/%d' % (outn, current_iter + 1, total_files)
                 animator(p, current_iter, tstr, **par_args)
@@ -906,14 +1121,16 @@ def interrogator(corpus,
             if subcorpora:
                 for (k, v), concl in zip(res.items(), conc_res.values()):                            
                     v = lowercase_result(v)
-                    results[k] += Counter(v)
+                    add_results(k, v)
                     for line in concl:
                         if maxconc is False or numconc < maxconc:
                             line = postprocess_concline(line,
                                 fsi_index=fsi_index, conc=conc)
                             conc_results[k].append(line)
                             numconc += 1
-                
+
+                if checkpointer is not None:
+                    checkpointer.finished(filekey, checkpoint_state)
                 current_iter += 1
                 tstr = '%s%d/%d' % (outn, current_iter + 1, total_files)
                 animator(p, current_iter, tstr, **par_args)
@@ -942,24 +1159,32 @@ def interrogator(corpus,
                 # do lowercasing and spelling
                 if not only_conc:
                     res = lowercase_result(res)
-                    # discard removes low results, helping with 
-                    # curse of dimensionality
-                    countres = Counter(res)
-                    if isinstance(discard, float):
-                        countres.most_common()
-                        nkeep = len(counter) - len(counter) * discard
-                        countres = Counter({k: v for i, (k, v) in enumerate(countres.most_common()) if i <= nkeep})
-                    elif isinstance(discard, int):
-                        countres = Counter({k: v for k, v in countres.most_common() if v >= discard})
-                    results[subcorpus_name] += countres
+                    add_results(subcorpus_name, res, discard=discard)
                     #else:
                     #results[subcorpus_name] += res
 
+            if checkpointer is not None:
+                checkpointer.finished(filekey, checkpoint_state)
+
             # update progress bar
             current_iter += 1
             tstr = '%s%d/%d' % (outn, current_iter + 1, total_files)
             animator(p, current_iter, tstr, **par_args)
 
+    if prefetcher is not None:
+        prefetcher.close()
+
+    # forget about files that have been deleted from the corpus
+    if file_store is not None and kwargs.get('paralleling', None) is None:
+        file_store.prune()
+
+    # parallel workers' checkpoints are kept until they have all finished
+    if checkpointer is not None:
+        if kwargs.get('paralleling', None) is None:
+            checkpointer.clear()
+        else:
+            checkpointer.save(checkpoint_state())
+
     # Get concordances into DataFrame, return if just conc
     if not no_conc:
         # fail on this line with typeerror if no results?
@@ -982,18 +1207,58 @@ def interrogator(corpus,
     else:
         conc_df = None
 
+    if conc_df is not None and conc_df is not False:
+        # removed 'f' from here for now
+        for col in ['c']:
+            for pat in ['.txt', '.conll', '.conllu'] + COMPRESSED_EXTENSIONS:
+                conc_df[col] = conc_df[col].str.replace(pat, '')
+            conc_df[col] = conc_df[col].str.replace(r'-[0-9][0-9][0-9]$', '')
+
+        #df.index = df.index.str.replace('w', 'this')
+
+    # part of a parallel interrogation: leave the counts for pmultiquery to merge
+    from corpkit.coded import CodedCounts, SortedCounts
+    if partial and not (countmode or top or approximate):
+        locs['corpus'] = corpus.path
+        interro = Interrogation(query=sanitise_dict(locs), concordance=conc_df)
+        if isinstance(results, CodedCounts):
+            interro.partial = SortedCounts.from_coded(results)
+        else:
+            interro.partial = SortedCounts.from_counters(results)
+        if not root:
+            signal.signal(signal.SIGINT, original_sigint)
+        return interro
+
     # Get interrogation into DataFrame
+    errors, guaranteed = None, None
     if countmode:
         df = Series({k: sum(v) for k, v in sorted(count_results.items())})
         tot = df.sum()
+    elif top or approximate:
+        from corpkit.sketch import summaries_to_frames
+        df, errors, guaranteed = summaries_to_frames(results, None if isinstance(top, float) else top or None)
+        numentries = len(df.columns)
+        tot = df.sum(axis=1)
+        total_total = df.sum().sum()
+    elif sparse:
+        # build a scipy.sparse matrix straight from the counters
+        from corpkit.sparse import counters_to_sparse
+        df = counters_to_sparse(results)
+        numentries = len(df.columns)
+        tot = df.sum(axis=1)
+        total_total = df.sum().sum()
     else:
-        the_big_dict = {}
-        unique_results = set(item for sublist in list(results.values()) for item in sublist)
-        sortres = sorted(results.items(), key=lambda x: x[0])
-        for word in unique_results:
-            the_big_dict[word] = [subcorp_result[word] for _, subcorp_result in sortres]
-        # turn master dict into dataframe, sorted
-        df = DataFrame(the_big_dict, index=sorted(results.keys()))
+        if isinstance(results, CodedCounts):
+            # one array operation, decoding each result only once
+            df = results.to_frame()
+        else:
+            the_big_dict = {}
+            unique_results = set(item for sublist in list(results.values()) for item in sublist)
+            sortres = sorted(results.items(), key=lambda x: x[0])
+            for word in unique_results:
+                the_big_dict[word] = [subcorp_result[word] for _, subcorp_result in sortres]
+            # turn master dict into dataframe, sorted
+            df = DataFrame(the_big_dict, index=sorted(results.keys()))
 
         # for ngrams, remove hapaxes
         #if show_ngram or show_collocates:
@@ -1015,6 +1280,8 @@ def interrogator(corpus,
     if all(not x for x in conds) and any(x for x in anyxs):
         df = Series(df.ix[0])
         df.sort_values(ascending=False, inplace=True)
+        if errors is not None:
+            errors = Series(errors.ix[0])[df.index]
         tot = df.sum()
         numentries = len(df.index)
         total_total = tot
@@ -1032,24 +1299,23 @@ def interrogator(corpus,
                  (r'-%s(-stripped)?(-parsed)?' % cname, '')]
         from corpkit.editor import editor
         df = editor(df, replace_subcorpus_names=edits).results
+        if errors is not None:
+            errors = editor(errors, replace_subcorpus_names=edits).results
         tot = df.sum(axis=1)
         total_total = df.sum().sum()
 
-    if conc_df is not None and conc_df is not False:
-        # removed 'f' from here for now
-        for col in ['c']:
-            for pat in ['.txt', '.conll', '.conllu']:
-                conc_df[col] = conc_df[col].str.replace(pat, '')
-            conc_df[col] = conc_df[col].str.replace(r'-[0-9][0-9][0-9]$', '')
-
-        #df.index = df.index.str.replace('w', 'this')
-
     # make interrogation object
     locs['corpus'] = corpus.path
     locs = sanitise_dict(locs)
     if nosubmode and isinstance(df, pd.DataFrame):
         df = df.sum()
-    interro = Interrogation(results=df, totals=tot, query=locs, concordance=conc_df)
+        if errors is not None:
+            errors = errors.sum()
+    interro = Interrogation(results=df, totals=tot, query=locs,
+                            concordance=conc_df, errors=errors, guaranteed=guaranteed)
+    # keep the summaries, so that pmultiquery can merge them
+    if top or approximate:
+        interro.summaries = dict(results)
 
     # save it
     if save and not kwargs.get('outname'):
@@ -0,0 +1,334 @@
+"""
+corpkit: a manifest of the files in a corpus
+
+Finding a corpus' subcorpora, files, datatype and metadata used to mean
+walking the whole tree (and reading every file) several times over. The
+manifest keeps this information in a JSON file beside the corpus, named
+like the metadata dotfile (`.<name>.manifest.json`), and refreshes it with
+one `os.scandir` pass. Files are only read again when their size or
+modification time has changed, and the manifest is only written after
+files have been read.
+
+Within a session, the tree is only scanned again when one of its
+directories has been modified. Call :meth:`Manifest.refresh` to check for
+files edited in place.
+"""
+
+from __future__ import print_function
+
+MANIFEST_VERSION = 1
+
+# fewer files than this are quicker to read without a process pool
+MIN_POOL_FILES = 16
+
+# manifests already loaded in this process, by corpus path
+_manifests = {}
+
+def manifest_path(path):
+    """
+    Where the manifest of the corpus at `path` is kept
+    """
+    import os
+    return os.path.join(os.path.dirname(path), '.%s.manifest.json' % os.path.basename(path))
+
+def listdir(path):
+    """
+    Get `(name, is_dir, size, mtime)` for everything in `path`, using
+    `os.scandir` where it exists (python 3.5+), and `os.stat` on each entry
+    where it doesn't. `size` and `mtime` are `None` for directories.
+    """
+    import os
+    import stat
+    out = []
+    if hasattr(os, 'scandir'):
+        for entry in os.scandir(path):
+            if entry.is_dir():
+                out.append((entry.name, True, None, None))
+            elif entry.is_file():
+                st = entry.stat()
+                out.append((entry.name, False, st.st_size, st.st_mtime))
+        return out
+    for name in os.listdir(path):
+        st = os.stat(os.path.join(path, name))
+        if stat.S_ISDIR(st.st_mode):
+            out.append((name, True, None, None))
+        elif stat.S_ISREG(st.st_mode):
+            out.append((name, False, st.st_size, st.st_mtime))
+    return out
+
+def scan(path):
+    """
+    Find every directory and file under `path`, skipping hidden ones
+
+    :returns: sorted relative paths of directories, a `dict` of the
+              relative paths of files and their `(size, mtime)`, and a
+              `dict` of the modification times of the directories,
+              including `''` for `path` itself
+    """
+    import os
+    dirs, files, stamps = [], {}, {}
+    todo = ['']
+    while todo:
+        rel = todo.pop()
+        full = os.path.join(path, rel)
+        try:
+            stamps[rel] = os.stat(full).st_mtime
+            entries = listdir(full)
+        except OSError:
+            continue
+        for name, is_dir, size, mtime in entries:
+            if name.startswith('.'):
+                continue
+            relname = os.path.join(rel, name) if rel else name
+            if is_dir:
+                dirs.append(relname)
+                todo.append(relname)
+            else:
+                files[relname] = (size, mtime)
+    return sorted(dirs), files, stamps
+
+def count_file(path):
+    """
+    Count the sentences and tokens in a CONLL file, and get the values of
+    its metadata fields, in one pass
+
+    Lines are read as bytes, in large batches, and only comment lines are
+    decoded. Token lines are just counted.
+
+    :returns: `dict` with `sents`, `tokens` and `fields` keys
+    """
+    from corpkit.process import open_compressed
+    from corpkit.constants import MAX_METADATA_VALUES
+    sents, tokens = 0, 0
+    fields = {}
+    in_sent = False
+    with open_compressed(path, 'rb') as fo:
+        while True:
+            lines = fo.readlines(1 << 22)
+            if not lines:
+                break
+            for line in lines:
+                first = line[:1]
+                if first == b'#':
+                    if line[:2] != b'# ':
+                        continue
+                    field, _, value = line[2:].decode('utf-8', errors='ignore').partition('=')
+                    field = field.rstrip('\r\n')
+                    values = fields.setdefault(field, set())
+                    # trees and ids are too big, and too many, to keep
+                    if field not in ['parse', 'sent_id'] and len(values) < MAX_METADATA_VALUES:
+                        values.add(value.strip())
+                elif first in [b'\n', b'\r', b'']:
+                    in_sent = False
+                else:
+                    tokens += 1
+                    if not in_sent:
+                        sents += 1
+                        in_sent = True
+    return {'sents': sents,
+            'tokens': tokens,
+            'fields': {k: sorted(v) for k, v in fields.items()}}
+
+class Manifest(object):
+    """
+    Sizes, modification times, and (once counted) sentence and token counts
+    and metadata of every file in a corpus
+    """
+
+    def __init__(self, path):
+        import os
+        import json
+        self.path = os.path.abspath(path)
+        self.dirs = []
+        self.entries = {}
+        # directory modification times at the last scan, not saved
+        self.stamps = {}
+        try:
+            with open(manifest_path(self.path), 'r') as fo:
+                data = json.load(fo)
+            if data.get('version') == MANIFEST_VERSION and data.get('path') == self.path:
+                self.dirs = data['dirs']
+                self.entries = data['files']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+    def __repr__(self):
+        return "<corpkit.manifest.Manifest instance: %s, %d files>" % (self.path, len(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self):
+        """
+        Write the manifest, if the corpus' parent directory is writable
+        """
+        import os
+        import json
+        path = manifest_path(self.path)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        data = {'version': MANIFEST_VERSION, 'path': self.path,
+                'dirs': self.dirs, 'files': self.entries}
+        try:
+            with open(tmp, 'w') as fo:
+                json.dump(data, fo)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            pass
+
+    def stale(self):
+        """
+        Whether any directory has been modified (a file added, removed or
+        renamed) since the last scan
+
+        :returns: `bool`
+        """
+        import os
+        if not self.stamps:
+            return True
+        for rel, mtime in self.stamps.items():
+            try:
+                if os.stat(os.path.join(self.path, rel)).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self):
+        """
+        Check the corpus for added, changed and deleted files
+
+        Counts of changed files are dropped, to be read again by
+        :meth:`count`, which saves the manifest.
+
+        :returns: the manifest
+        """
+        dirs, stats, stamps = scan(self.path)
+        entries = {}
+        for rel, (size, mtime) in stats.items():
+            old = self.entries.get(rel)
+            if old and old['size'] == size and old['mtime'] == mtime:
+                entries[rel] = old
+            else:
+                entries[rel] = {'size': size, 'mtime': mtime}
+        self.dirs, self.entries, self.stamps = dirs, entries, stamps
+        return self
+
+    def _relative(self, path):
+        import os
+        if path is None:
+            return ''
+        rel = os.path.relpath(os.path.abspath(path), self.path)
+        return '' if rel == '.' else rel
+
+    def subdirs(self, path=None):
+        """
+        Names of the directories directly inside `path` (default: the corpus)
+        """
+        import os
+        rel = self._relative(path)
+        return [os.path.basename(d) for d in self.dirs if os.path.dirname(d) == rel]
+
+    def filenames(self, path=None):
+        """
+        Names of the files directly inside `path` (default: the corpus)
+        """
+        import os
+        rel = self._relative(path)
+        return sorted(os.path.basename(f) for f in self.entries if os.path.dirname(f) == rel)
+
+    def filepaths(self):
+        """
+        Full paths of every file in the corpus
+        """
+        import os
+        return [os.path.join(self.path, f) for f in sorted(self.entries)]
+
+    @property
+    def datatype(self):
+        """
+        `'conll'` or `'plaintext'`, from the most common file extension
+        """
+        import os
+        from collections import Counter
+        from corpkit.process import strip_compression
+        exts = Counter(os.path.splitext(strip_compression(f))[1] for f in self.entries)
+        exts.pop('', None)
+        if not exts:
+            return 'plaintext'
+        lookup = {'.conll': 'conll', '.conllu': 'conll'}
+        return lookup.get(exts.most_common(1)[0][0], 'plaintext')
+
+    def count(self, multiprocess=True):
+        """
+        Read any CONLL files that have not been counted since they changed
+
+        :param multiprocess: read files in this many processes (`True` for 
+                             one per core) if there are enough of them
+        :returns: the manifest
+        """
+        import os
+        import multiprocessing
+        from corpkit.process import strip_compression
+        todo = [rel for rel, entry in sorted(self.entries.items()) if 'sents' not in entry
+                and strip_compression(rel).endswith(('.conll', '.conllu'))]
+        if not todo:
+            return self
+        paths = [os.path.join(self.path, rel) for rel in todo]
+        if multiprocess is True:
+            multiprocess = multiprocessing.cpu_count()
+        # pool workers can't start pools of their own
+        if multiprocess and multiprocess > 1 and len(todo) >= MIN_POOL_FILES \
+           and not multiprocessing.current_process().daemon:
+            pool = multiprocessing.Pool(min(multiprocess, len(todo)))
+            try:
+                counts = pool.map(count_file, paths, chunksize=max(1, len(paths) // (multiprocess * 4)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            counts = [count_file(path) for path in paths]
+        for rel, count in zip(todo, counts):
+            self.entries[rel].update(count)
+        self.save()
+        return self
+
+    def metadata(self, field=None):
+        """
+        Get metadata fields, or the values of one field
+
+        :returns: `dict` of fields and `sets` of values, or a `set`
+        """
+        self.count()
+        fields = {}
+        for entry in self.entries.values():
+            for name, values in entry.get('fields', {}).items():
+                fields.setdefault(name, set()).update(values)
+        if field is not None:
+            return fields.get(field, set())
+        return fields
+
+    def totals(self):
+        """
+        Sentence and token counts of the corpus
+
+        :returns: `(sentences, tokens)`
+        """
+        self.count()
+        entries = self.entries.values()
+        return sum(e.get('sents', 0) for e in entries), sum(e.get('tokens', 0) for e in entries)
+
+def get_manifest(path):
+    """
+    Get the manifest of the corpus at `path`, scanning the corpus again if
+    any of its directories have changed since it was last scanned
+
+    :returns: :class:`Manifest`
+    """
+    import os
+    path = os.path.abspath(path)
+    if path not in _manifests:
+        _manifests[path] = Manifest(path)
+    manifest = _manifests[path]
+    if manifest.stale():
+        manifest.refresh()
+    return manifest
@@ -0,0 +1,167 @@
+"""
+corpkit: a per-corpus metadata store
+
+The metadata fields and values of each file, and tables of results such as
+`features` and `postags`, are kept in an SQLite database beside the corpus
+(`.<name>.sqlite`). Files are only read again when their size or
+modification time changes, every write is a transaction, and in WAL mode
+any number of processes can read while one writes.
+"""
+
+from __future__ import print_function
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL);
+CREATE TABLE IF NOT EXISTS metadata (path TEXT, field TEXT, value TEXT);
+CREATE INDEX IF NOT EXISTS metadata_field ON metadata (field);
+CREATE INDEX IF NOT EXISTS metadata_path ON metadata (path);
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tables (name TEXT PRIMARY KEY, data BLOB);
+"""
+
+# fields that are in every sentence, and not useful as metadata
+IGNORED_FIELDS = ['parse', 'sent_id']
+
+def store_path(path):
+    """
+    Where the store of the corpus at `path` is kept
+    """
+    import os
+    return os.path.join(os.path.dirname(path), '.%s.sqlite' % os.path.basename(path))
+
+class MetadataStore(object):
+    """
+    SQLite store of a corpus' metadata and cached tables
+    """
+
+    def __init__(self, path):
+        import os
+        self.path = os.path.abspath(getattr(path, 'path', path))
+        self.dbpath = store_path(self.path)
+
+    def __repr__(self):
+        return "<corpkit.metastore.MetadataStore instance: %s>" % self.dbpath
+
+    def exists(self):
+        import os
+        return os.path.isfile(self.dbpath)
+
+    def connect(self):
+        """
+        Open the database, making its tables if need be
+        """
+        import sqlite3
+        conn = sqlite3.connect(self.dbpath, timeout=60)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    def update(self):
+        """
+        Record the metadata of new and changed files, and forget deleted
+        ones. Cached tables are dropped if anything changed.
+
+        :returns: `True` if anything changed
+        """
+        import json
+        from contextlib import closing
+        from corpkit.manifest import get_manifest
+        manifest = get_manifest(self.path).refresh().count()
+        with closing(self.connect()) as conn:
+            with conn:
+                known = {p: (s, m) for p, s, m in conn.execute('SELECT path, size, mtime FROM files')}
+                changed = False
+                for rel, entry in manifest.entries.items():
+                    if known.pop(rel, None) == (entry['size'], entry['mtime']):
+                        continue
+                    changed = True
+                    rows = []
+                    for field, values in entry.get('fields', {}).items():
+                        rows.extend((rel, field, v) for v in values)
+                        if not values:
+                            rows.append((rel, field, None))
+                    conn.execute('DELETE FROM metadata WHERE path = ?', (rel,))
+                    conn.executemany('INSERT INTO metadata VALUES (?, ?, ?)', rows)
+                    conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)',
+                                 (rel, entry['size'], entry['mtime']))
+                for rel in known:
+                    changed = True
+                    conn.execute('DELETE FROM metadata WHERE path = ?', (rel,))
+                    conn.execute('DELETE FROM files WHERE path = ?', (rel,))
+                if changed:
+                    conn.execute('DELETE FROM tables')
+                    conn.execute('INSERT OR REPLACE INTO info VALUES (?, ?)',
+                                 ('columns', json.dumps(self._columns())))
+        return changed
+
+    def _columns(self):
+        """
+        Get the columns of the corpus' first file
+        """
+        from corpkit.process import get_first_df
+        try:
+            return ['s', 'i'] + list(get_first_df(self.path).columns)
+        except (AttributeError, IndexError, TypeError):
+            return []
+
+    def fields(self):
+        """
+        Get each metadata field and its values
+
+        :returns: `dict` of field names and sorted `lists` of values
+        """
+        from contextlib import closing
+        from corpkit.constants import MAX_METADATA_FIELDS, MAX_METADATA_VALUES
+        out = {}
+        with closing(self.connect()) as conn:
+            names = [r[0] for r in conn.execute('SELECT DISTINCT field FROM metadata ORDER BY field')]
+            for name in [n for n in names if n not in IGNORED_FIELDS][:MAX_METADATA_FIELDS + 1]:
+                rows = conn.execute('SELECT DISTINCT value FROM metadata WHERE field = ? AND '
+                                    'value IS NOT NULL ORDER BY value LIMIT ?',
+                                    (name, MAX_METADATA_VALUES + 1))
+                out[name] = [r[0] for r in rows]
+        return out
+
+    def as_dict(self):
+        """
+        Get metadata in the format of the old JSON dotfile, without tables
+        """
+        import json
+        from contextlib import closing
+        with closing(self.connect()) as conn:
+            row = conn.execute("SELECT value FROM info WHERE key = 'columns'").fetchone()
+        return {'fields': self.fields(), 'columns': json.loads(row[0]) if row else []}
+
+    def get_table(self, name):
+        """
+        Get a cached `DataFrame`, or `None`
+        """
+        import pickle
+        from contextlib import closing
+        with closing(self.connect()) as conn:
+            row = conn.execute('SELECT data FROM tables WHERE name = ?', (name,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set_table(self, name, df):
+        """
+        Cache a `DataFrame`, pickled
+        """
+        import pickle
+        import sqlite3
+        from contextlib import closing
+        data = sqlite3.Binary(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO tables VALUES (?, ?)', (name, data))
+
+    def clear(self):
+        """
+        Delete everything in the store
+        """
+        from contextlib import closing
+        if not self.exists():
+            return
+        with closing(self.connect()) as conn:
+            with conn:
+                for table in ['files', 'metadata', 'info', 'tables']:
+                    conn.execute('DELETE FROM %s' % table)
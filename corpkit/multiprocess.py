@@ -2,6 +2,148 @@
 
 from __future__ import print_function
 
+# options shared by every task, set once per worker process
+_shared = {}
+
+def describe_corpus(corpus):
+    """
+    Make a small, picklable description of a corpus, from which a worker
+    can remake it
+
+    :returns: `tuple`
+    """
+    from corpkit.constants import STRINGTYPE
+    # symbolic subcorpora, and metadata to skip or keep
+    symbolics = {k: v for k, v in [('subcorpora', getattr(corpus, 'symbolic', False)),
+                                   ('skip', getattr(corpus, 'skip', False)),
+                                   ('just', getattr(corpus, 'just', False))] if v}
+    if getattr(corpus, '_dlist', None):
+        files = [(f.path, getattr(f, 'span', None)) for f in corpus._dlist]
+        return ('files', files, corpus.singlefile, corpus.datatype, symbolics)
+    if isinstance(corpus, STRINGTYPE):
+        return ('path', corpus, None, None, symbolics)
+    if hasattr(corpus, 'path') and hasattr(corpus, 'level'):
+        kind = type(corpus).__name__ if type(corpus).__name__ in ['File', 'Subcorpus'] else None
+        return ('path', corpus.path, kind, corpus.datatype, symbolics)
+    return ('object', corpus)
+
+def make_corpus(description):
+    """
+    Remake a corpus from :func:`describe_corpus` output
+    """
+    from corpkit.corpus import Corpus, Subcorpus, File, Datalist
+    if description[0] == 'files':
+        _, files, singlefile, datatype, symbolics = description
+        fobjs = []
+        for path, span in files:
+            f = File(path)
+            if span:
+                f.span = span
+            fobjs.append(f)
+        corpus = Corpus(Datalist(fobjs), level='d', datatype=datatype,
+                        print_info=False, **symbolics)
+        corpus.singlefile = singlefile
+        return corpus
+    if description[0] == 'path':
+        _, path, kind, datatype, symbolics = description
+        if kind == 'File':
+            return File(path, **symbolics)
+        if kind == 'Subcorpus':
+            return Subcorpus(path, datatype, **symbolics)
+        return Corpus(path, datatype=datatype, print_info=False, **symbolics)
+    return description[1]
+
+class Task(object):
+    """
+    What a worker process needs to run one interrogation: a description of
+    the corpus, and the options that differ from the shared ones
+    """
+    __slots__ = ['corpus', 'options']
+
+    def __init__(self, corpus, options):
+        self.corpus = describe_corpus(corpus)
+        self.options = options
+
+    def __repr__(self):
+        return "<corpkit.multiprocess.Task instance: %s>" % self.options.get('outname', '')
+
+def init_worker(shared, in_pool=True):
+    """
+    Store the options shared by all tasks, once per process
+
+    :param in_pool: `False` if tasks are to be run in this process
+    """
+    from corpkit.cache import documents
+    _shared.clear()
+    _shared.update(shared)
+    # a pool worker won't read its files again, so it shouldn't keep them
+    if in_pool:
+        _shared['cache_documents'] = False
+        documents.disable()
+
+def run_task(task):
+    """
+    Interrogate according to a :class:`Task`
+    """
+    from corpkit.interrogator import interrogator
+    kwargs = dict(_shared)
+    kwargs.update(task.options)
+    kwargs['corpus'] = make_corpus(task.corpus)
+    return interrogator(**kwargs)
+
+def schedule_files(corpus, num_groups, min_piece=1 << 20):
+    """
+    Share a corpus' files between `num_groups` groups of similar total size
+
+    Files are handed out largest first, each to the group with the least
+    data so far (longest processing time first). Groups are returned
+    biggest first, so that the longest jobs start earliest.
+
+    A CONLL file bigger than a group's fair share is cut into sentence-aligned
+    pieces of at least `min_piece` bytes, which are `File` copies with a
+    `span` attribute. If the corpus has no subcorpora, each file is treated
+    as a subcorpus.
+
+    :returns: `list` of `lists` of `(subcorpus name, File)` tuples
+    """
+    import os
+    import copy
+    import heapq
+    from corpkit.conll import sentence_ranges
+    from corpkit.process import compression_of
+    files = []
+    if getattr(corpus, 'subcorpora', False):
+        for subc in corpus.subcorpora:
+            for f in subc.files:
+                files.append((os.path.getsize(f.path), subc.name, f))
+    else:
+        for f in corpus.files:
+            files.append((os.path.getsize(f.path), f.name, f))
+    target = float(sum(s for s, _, _ in files)) / max(num_groups, 1)
+    pieces = []
+    for size, name, f in files:
+        parts = min(int(-(-size // target)) if target else 1, size // min_piece)
+        # compressed files can't be read from the middle
+        if parts > 1 and getattr(f, 'datatype', None) == 'conll' and not compression_of(f.path):
+            for span in sentence_ranges(f.path, parts):
+                piece = copy.copy(f)
+                piece.span = span
+                pieces.append((span[1] - span[0], name, piece))
+        else:
+            pieces.append((size, name, f))
+    files = sorted(pieces, key=lambda x: (-x[0], x[2].path, getattr(x[2], 'span', None)))
+    num_groups = max(1, min(num_groups, len(files)))
+    heap = [(0, i) for i in range(num_groups)]
+    groups = [[] for _ in range(num_groups)]
+    sizes = [0] * num_groups
+    for size, name, f in files:
+        load, i = heapq.heappop(heap)
+        groups[i].append((name, f))
+        sizes[i] = load + size
+        heapq.heappush(heap, (sizes[i], i))
+    order = sorted(range(num_groups), key=lambda i: -sizes[i])
+    return [groups[i] for i in order if groups[i]]
+
 def pmultiquery(corpus, 
                 search,
                 show='words',
@@ -31,10 +173,6 @@ def pmultiquery(corpus,
     from corpkit.interrogator import interrogator
     from corpkit.interrogation import Interrogation, Interrodict
     from corpkit.process import canpickle
-    try:
-        from joblib import Parallel, delayed
-    except ImportError:
-        pass
     import multiprocessing
 
     locs = locals()
@@ -90,7 +228,14 @@ def pmultiquery(corpus,
                 print('No %s metadata found.' % str(subval))
                 return
 
+    # several groups per process, so that idle processes can take up the slack
+    scheduled = None
+    if multiple == 'scheduled':
+        per_core = multiprocess if isinstance(multiprocess, int) and multiprocess is not True else num_cores
+        scheduled = schedule_files(corpus, per_core * 4)
+
     mapcores = {'datalist': [corpus, 'corpus'],
+                'scheduled': [scheduled, 'corpus'],
                 'multiplecorpora': [corpus, 'corpus'],
                 'namedqueriessingle': [query, 'query'],
                 'namedqueriesmultiple': [search, 'search'],
@@ -135,10 +280,12 @@ def pmultiquery(corpus,
     if isinstance(non_first_sub, list) and len(non_first_sub) == 1:
         non_first_sub = non_first_sub[0]
 
-    # make the default query
-    locs = {k: v for k, v in locs.items() if canpickle(v)}
-    # make a new dict for every iteration
-    ds = [dict(**locs) for i in range(denom)]
+    # options shared by every task are sent to each process just once,
+    # and the corpus is described by its paths rather than pickled whole
+    shared = {k: v for k, v in locs.items() if k != 'corpus' and canpickle(v)}
+    locs = dict(shared, corpus=corpus)
+    # a dict of what is different about each task
+    ds = [{} for i in range(denom)]
     for index, (d, bit) in enumerate(zip(ds, toiter)):
         d['paralleling'] = index
         if multiple in ['namedqueriessingle', 'namedqueriesmultiple']:
@@ -162,6 +309,17 @@ def pmultiquery(corpus,
             d['subcorpora'] = non_first_sub
             if non_first_sub:
                 d['print_info'] = False
+        elif multiple == 'scheduled':
+            from corpkit.corpus import Corpus, Datalist
+            part = Corpus(Datalist([f for _, f in bit]), level='d',
+                          datatype=corpus.datatype, print_info=False)
+            # keep a row for each subcorpus in the results
+            part.singlefile = False
+            d['corpus'] = part
+            d['file_subcorpora'] = {f.path: name for name, f in bit}
+            d['outname'] = 'part-%d' % (index + 1)
+            # return raw counts, to be merged when every task is done
+            d['partial'] = True
 
     # message printer should be a function...
     if kwargs.get('conc') is False:
@@ -213,7 +371,6 @@ def pmultiquery(corpus,
     #stdout=sys.stdout
     failed = False
     terminal = False
-    used_joblib = False
     #ds = ds[::-1]
     #todo: the number of blank lines to print can be way wrong
     if not root and print_info:
@@ -232,10 +389,21 @@ def pmultiquery(corpus,
             except:
                 pass
 
+    tasks = [Task(d.get('corpus', corpus), {k: v for k, v in d.items() if k != 'corpus'}) \
+             for d in ds]
+
+    # counts returned by each worker, merged once in this process
+    from corpkit.coded import merge_all
+    partials = None
     if not root and multiprocess:
         try:
-            res = Parallel(n_jobs=num_cores)(delayed(interrogator)(**x) for x in ds)
-            used_joblib = True
+            # hand out tasks one at a time, as processes become free
+            pool = multiprocessing.Pool(num_cores, initializer=init_worker, initargs=(shared,))
+            try:
+                res = pool.map(run_task, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
         except:
             failed = True
             print('Multiprocessing failed.')
@@ -244,13 +412,22 @@ def pmultiquery(corpus,
             failed = True
     else:
         res = []
-        for index, d in enumerate(ds):
-            d['startnum'] = (100 / denom) * index
-            res.append(interrogator(**d))
+        init_worker(shared, in_pool=False)
+        for index, (d, task) in enumerate(zip(ds, tasks)):
+            task.options['startnum'] = (100 / denom) * index
+            res.append(run_task(task))
         try:
             res = sorted([i for i in res if i])
         except:
             pass
+    if res and all(getattr(r, 'partial', None) is not None for r in res):
+        partials = merge_all([r.partial for r in res])
+
+    # every worker finished, so their checkpoints are no longer needed
+    if kwargs.get('checkpoint_dir'):
+        from corpkit.cache import clear_checkpoints, checkpoint_name
+        clear_checkpoints(kwargs.get('checkpoint_dir'),
+                          [checkpoint_name(None, d['paralleling']) for d in ds])
 
     # remove unpicklable bits from query
     from types import ModuleType, FunctionType, BuiltinMethodType, BuiltinFunctionType
@@ -281,7 +458,8 @@ def pmultiquery(corpus,
         return lines
 
     # return interrodict (to become multiindex)
-    if isinstance(res[0], Interrodict) or not all(isinstance(i.results, Series) for i in res):
+    if multiple != 'scheduled' and (isinstance(res[0], Interrodict) or \
+                                    not all(isinstance(i.results, Series) for i in res)):
         out = OrderedDict()
         for interrog, d in zip(res, ds):
             for unpicklable in ['note', 'root']:
@@ -307,7 +485,64 @@ def pmultiquery(corpus,
     # todo: standardise this so we don't have to guess transposes
     # 
     else:
-        if multiple == 'multiplecorpora' and not mult_corp_are_subs:
+        errors, guaranteed = None, None
+        if kwargs.get('top') or kwargs.get('approximate'):
+            # merge frequency summaries rather than truncated results
+            from corpkit.sketch import summaries_to_frames
+            summaries = {}
+            for r, d in zip(res, ds):
+                named = getattr(r, 'summaries', {})
+                if len(named) == 1 and multiple != 'scheduled':
+                    named = {r.query.get('outname', d['outname']): list(named.values())[0]}
+                for name, summary in named.items():
+                    if name in summaries:
+                        summaries[name] += summary
+                    else:
+                        summaries[name] = summary
+            top = kwargs.get('top')
+            out, errors, guaranteed = summaries_to_frames(summaries, None if isinstance(top, float) else top or None)
+            if kwargs.get('nosubmode'):
+                out, errors = out.sum(), errors.sum()
+        elif partials is not None:
+            # the workers' counts are already merged
+            if kwargs.get('sparse'):
+                from corpkit.sparse import counters_to_sparse
+                out = counters_to_sparse(partials.to_coded())
+            else:
+                out = partials.to_coded().to_frame()
+            if kwargs.get('nosubmode'):
+                out = out.sum()
+                if not kwargs.get('sparse'):
+                    out = out.sort_values(ascending=False)
+        elif kwargs.get('sparse'):
+            # gather non-zero counts, so zeros are never filled in
+            from corpkit.sparse import counters_to_sparse, nonzero_rows, is_sparse
+            counters = OrderedDict()
+            for r, d in zip(res, ds):
+                if isinstance(r.results, Series):
+                    name = 'Total' if multiple == 'scheduled' else r.query.get('outname', d['outname'])
+                    rows = [(name, r.results[r.results != 0])]
+                elif is_sparse(r.results):
+                    rows = nonzero_rows(r.results)
+                else:
+                    rows = r.results.iterrows()
+                for name, row in rows:
+                    counters.setdefault(name, collections.Counter()).update(row.to_dict())
+            out = counters_to_sparse(counters)
+            if kwargs.get('nosubmode'):
+                out = out.sum()
+        elif multiple == 'scheduled':
+            # add up the parts of each subcorpus from each group of files
+            if all(isinstance(r.results, Series) for r in res) and kwargs.get('nosubmode'):
+                out = pd.concat([r.results for r in res], axis=1).fillna(0).sum(axis=1)
+                out = out.astype(int).sort_values(ascending=False)
+            elif all(isinstance(r.results, Series) for r in res):
+                out = pd.concat([r.results for r in res]).groupby(level=0).sum()
+            else:
+                parts = [DataFrame([r.results], index=['Total']) if isinstance(r.results, Series) \
+                         else r.results for r in res]
+                out = pd.concat(parts).fillna(0).groupby(level=0).sum().astype(int)
+        elif multiple == 'multiplecorpora' and not mult_corp_are_subs:
             sers = [i.results for i in res]
             out = DataFrame(sers, index=[i.query['outname'] for i in res])
             out = out.reindex_axis(sorted(out.columns), axis=1) # sort cols
@@ -356,7 +591,8 @@ def pmultiquery(corpus,
     
         from corpkit.interrogation import Interrogation
         tt = out.sum(axis=1) if isinstance(out, DataFrame) else out.sum()
-        out = Interrogation(results=out, totals=tt, query=qlocs)
+        out = Interrogation(results=out, totals=tt, query=qlocs, errors=errors,
+                            guaranteed=guaranteed)
 
         if hasattr(out, 'columns') and len(out.columns) == 1:
             out = out.sort_index()   
@@ -388,3 +624,95 @@ def pmultiquery(corpus,
         if list(out.results.index) == ['0'] and not kwargs.get('df1_always_df'):
             out.results = out.results.ix[0].sort_index()
         return out
+
+def iter_concordance(corpus, search, chunksize=1000, multiprocess=False,
+                     tuples=False, maxconc=False, **kwargs):
+    """
+    Concordance a corpus file by file, yielding lines as they are found.
+
+    This is used by :func:`~corpkit.corpus.Corpus.iter_concordance`. With
+    `multiprocess`, files are handed out largest first and chunks come back
+    in whatever order the files finish. Closing the generator stops the
+    workers.
+
+    :returns: generator of :class:`corpkit.interrogation.Concordance`
+              chunks, or of `tuples`, one per line
+    """
+    import os
+    import multiprocessing
+    import pandas as pd
+    from corpkit.corpus import Corpus, Datalist
+    from corpkit.interrogation import Concordance
+    from corpkit.build import check_jdk
+
+    items = []
+    if getattr(corpus, 'subcorpora', False):
+        for subc in corpus.subcorpora:
+            items.extend((subc.name, f) for f in subc.files)
+    else:
+        items.extend((f.name, f) for f in corpus.files)
+
+    # look for java once, rather than once per file
+    shared = dict(kwargs, search=search, conc='only', printstatus=False, quiet=True,
+                  multiprocess=False, maxconc=False, have_java=check_jdk())
+    tasks = []
+    for name, f in items:
+        part = Corpus(Datalist([f]), level='d', datatype=corpus.datatype, print_info=False)
+        part.singlefile = False
+        tasks.append(Task(part, {'file_subcorpora': {f.path: name}, 'outname': f.name}))
+
+    if multiprocess is True:
+        multiprocess = multiprocessing.cpu_count()
+    pool = None
+    # pool workers can't start pools of their own
+    if multiprocess and multiprocess > 1 and len(tasks) > 1 \
+       and not multiprocessing.current_process().daemon:
+        tasks.sort(key=lambda t: -os.path.getsize(t.corpus[1][0][0]))
+        pool = multiprocessing.Pool(min(multiprocess, len(tasks)),
+                                    initializer=init_worker, initargs=(shared,))
+        results = pool.imap_unordered(run_task, tasks, chunksize=1)
+    else:
+        init_worker(shared, in_pool=False)
+        results = (run_task(task) for task in tasks)
+
+    waiting, numconc = [], 0
+    query = None
+    finished = False
+    try:
+        for res in results:
+            if res is None or not len(res):
+                continue
+            query = getattr(res, 'query', query)
+            if maxconc:
+                res = res[:maxconc - numconc]
+            if tuples:
+                for line in res.itertuples(index=False, name=None):
+                    yield line
+                numconc += len(res)
+            else:
+                waiting.append(res)
+                while sum(len(w) for w in waiting) >= chunksize:
+                    lines = pd.concat(waiting)
+                    waiting = [lines[chunksize:]]
+                    chunk = Concordance(lines[:chunksize].reset_index(drop=True))
+                    chunk.index += numconc
+                    chunk.query = query
+                    numconc += len(chunk)
+                    yield chunk
+            if maxconc and numconc + sum(len(w) for w in waiting) >= maxconc:
+                break
+        waiting = [w for w in waiting if len(w)]
+        if waiting:
+            chunk = Concordance(pd.concat(waiting).reset_index(drop=True))
+            chunk.index += numconc
+            chunk.query = query
+            yield chunk
+        finished = True
+    finally:
+        if pool is not None:
+            # stop any files still being searched if we stopped early
+            if finished:
+                pool.close()
+            else:
+                pool.terminate()
+            pool.join()
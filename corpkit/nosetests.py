@@ -119,6 +119,394 @@ def test_interro3():
           }
     assert_equals(set(list(data.results.columns)), st)
 
+def test_top_interro():
+    """Testing bounded memory top-k interrogation"""
+    corp = Corpus(parsed_path)
+    exact = corp.interrogate({'w': 'any'})
+    data = corp.interrogate({'w': 'any'}, top=10)
+    assert_equals(len(data.results.columns), 10)
+    assert_equals(set(data.results.columns) <= set(exact.results.columns), True)
+    assert_equals(data.errors.shape, data.results.shape)
+    assert_equals(sorted(data.guaranteed.index), sorted(data.results.columns))
+
+def test_space_saving():
+    """Testing Space-Saving error bounds"""
+    from corpkit.sketch import SpaceSaving
+    summary = SpaceSaving(epsilon=0.34)
+    assert_equals(summary.k, 3)
+    summary.update(['a'] * 10 + ['b'] * 5 + ['c', 'd', 'e'])
+    assert_equals(summary.guaranteed(2), [('a', True), ('b', True)])
+    assert_equals([g for _, g in summary.guaranteed()], [True, True, False])
+    assert_equals(summary.error('a'), 0)
+
+def test_sparse_interro():
+    """Testing sparse results"""
+    from corpkit.sparse import is_sparse, densify, scale_rows
+    corp = Corpus(parsed_path)
+    exact = corp.interrogate({'w': 'any'})
+    data = corp.interrogate({'w': 'any'}, sparse=True)
+    assert_equals(is_sparse(data.results), True)
+    assert_equals(densify(data.results).sum().sum(), exact.results.sum().sum())
+    # scaled counts are floats, but still have zero as their fill value
+    scaled = scale_rows(data.results, [0.5] * len(data.results.index))
+    assert_equals(set(dt.fill_value for dt in scaled.dtypes), set([0]))
+
+def test_coded_counts():
+    """Testing integer-coded counts over a large vocabulary"""
+    from collections import Counter
+    from corpkit.coded import CodedCounts, SortedCounts, merge_all
+    coded = CodedCounts()
+    coded.vocab.encode(['w%d' % i for i in range(200000)])
+    coded.add('first', ['w5', 'w5', 'new'])
+    coded.add('second', {'w199999': 2})
+    coded.add('second', ['w5', 'w6'], discard=2)
+    # each subcorpus only keeps what was found in it
+    assert_equals(len(coded.counts['first']), 2)
+    index, words, mat = coded.matrix()
+    assert_equals(mat.shape, (2, 3))
+    assert_equals(dict(coded.items())['first'], Counter({'w5': 2, 'new': 1}))
+    other = SortedCounts.from_counters({'first': Counter({'new': 1})})
+    merged = merge_all([SortedCounts.from_coded(coded), other]).to_coded()
+    assert_equals(dict(merged.items())['first'], Counter({'w5': 2, 'new': 2}))
+
+def test_cached_interro():
+    """Testing the interrogation cache"""
+    from corpkit.cache import make_key
+    corp = Corpus(parsed_path)
+    assert_equals(make_key(corp, {'W': 'any'}, (), {'show': 'w'}),
+                  make_key(corp, {'w': 'any'}, (), {'show': ['w'], 'print_info': False}))
+    # multiprocessing changes the shape of the result
+    assert_equals(make_key(corp, {'w': 'any'}, (), {}) == \
+                  make_key(corp, {'w': 'any'}, (), {'multiprocess': 2}), False)
+    first = corp.interrogate({'w': 'any'}, cache='refresh')
+    second = corp.interrogate({'w': 'any'}, cache=True)
+    assert_equals(first.results.to_dict(), second.results.to_dict())
+    assert_equals(corp.clear_cache() > 0, True)
+
+def test_incremental_interro():
+    """Testing that incremental interrogation picks up a changed file"""
+    import os
+    import shutil
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'test-parsed')
+        shutil.copytree(speak_path, path)
+        corp = Corpus(path, print_info=False)
+        corp.interrogate({'w': 'any'}, incremental=True, printstatus=False)
+        changed = os.path.join(path, 'first', 'intro.txt.conll')
+        with open(changed) as fo:
+            data = fo.read().replace('\tThis\tthis\t', '\tThat\tthat\t', 1)
+        with open(changed, 'w') as fo:
+            fo.write(data)
+        st = os.stat(changed)
+        os.utime(changed, (st.st_atime, st.st_mtime + 10))
+        again = corp.interrogate({'w': 'any'}, incremental=True, printstatus=False)
+        fresh = corp.interrogate({'w': 'any'}, printstatus=False)
+        assert_equals(again.results.to_dict(), fresh.results.to_dict())
+        assert_equals('that' in again.results.columns, True)
+    finally:
+        from corpkit.cache import clear_cache
+        clear_cache()
+        shutil.rmtree(tmp)
+
+def test_checkpoint_resume():
+    """Testing saving, resuming and clearing checkpoints"""
+    import os
+    import shutil
+    import tempfile
+    from corpkit.cache import Checkpoint, checkpoint_directory, clear_checkpoints
+    params = {'search': {'w': 'any'}}
+    assert_equals(checkpoint_directory(params, Corpus(parsed_path)) == \
+                  checkpoint_directory(params, Corpus(speak_path)), False)
+    tmp = tempfile.mkdtemp()
+    try:
+        first = Checkpoint(tmp, 'task-0', every=2)
+        first.finished('a.conll', lambda: {'numconc': 1})
+        assert_equals(first.load(), None)
+        first.finished('b.conll', lambda: {'numconc': 2})
+        other = Checkpoint(tmp, 'task-1')
+        other.save({'numconc': 0})
+        resumed = Checkpoint(tmp, 'task-0')
+        assert_equals(resumed.load()['numconc'], 2)
+        assert_equals(resumed.done, set(['a.conll', 'b.conll']))
+        # only the named checkpoints are deleted
+        clear_checkpoints(tmp, ['task-0'])
+        assert_equals(os.listdir(tmp), [os.path.basename(other.path)])
+    finally:
+        shutil.rmtree(tmp)
+
+def test_incremental_prefetch():
+    """Testing that stored results are only fresh until a file changes,
+    and that the read-ahead queue survives files it was not given"""
+    import os
+    import shutil
+    import tempfile
+    from corpkit.cache import FileResults
+    from corpkit.prefetch import Prefetcher
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'test-parsed')
+        shutil.copytree(speak_path, path)
+        files = sorted(os.path.join(root, f) for root, _, fs in os.walk(path) for f in fs)
+        store = FileResults({'search': {'w': 'any'}}, cachedir=tmp)
+        store.set(files[0], {'a': 1}, [])
+        assert_equals(store.fresh(files[0]), True)
+        assert_equals(store.get(files[0]), ({'a': 1}, []))
+        st = os.stat(files[0])
+        os.utime(files[0], (st.st_atime, st.st_mtime + 10))
+        assert_equals(store.fresh(files[0]), False)
+        assert_equals(store.get(files[0]), None)
+        prefetcher = Prefetcher([(f, None) for f in files[1:]], depth=1)
+        try:
+            prefetcher.get(files[0])
+            assert_equals(len(prefetcher.pending) + len(prefetcher.items), len(files) - 1)
+            assert_equals(prefetcher.get(files[-1]), open(files[-1]).read())
+        finally:
+            prefetcher.close()
+    finally:
+        shutil.rmtree(tmp)
+
+def test_shared_interro():
+    """Testing interrogation of a shared memory corpus"""
+    corp = Corpus(parsed_path)
+    exact = corp.interrogate({'w': 'any'})
+    data = corp.interrogate({'w': 'any'}, shared=True, cache=False)
+    corp.unshare()
+    assert_equals(data.results.to_dict(), exact.results.to_dict())
+
+def test_shared_changed_file():
+    """Testing that a shared corpus is remade when a file changes"""
+    import os
+    import shutil
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'test-parsed')
+        shutil.copytree(parsed_path, path)
+        corp = Corpus(path, print_info=False)
+        first = corp.share()
+        assert_equals(corp.share() is first, True)
+        changed = os.path.join(path, 'first', 'intro.txt.conll')
+        st = os.stat(changed)
+        os.utime(changed, (st.st_atime, st.st_mtime + 10))
+        second = corp.share()
+        assert_equals(second is first, False)
+        # the old copy was freed
+        assert_equals(first.handle['files'], {})
+        corp.unshare()
+    finally:
+        shutil.rmtree(tmp)
+
+def test_describe_corpus():
+    """Testing corpora remade in worker processes"""
+    from corpkit.corpus import Datalist
+    from corpkit.multiprocess import describe_corpus, make_corpus
+    corp = Corpus(speak_path, subcorpora='speaker', skip={'speaker': 'TESTER'})
+    remade = make_corpus(describe_corpus(corp))
+    assert_equals((remade.datatype, remade.symbolic, remade.skip),
+                  ('conll', 'speaker', {'speaker': 'TESTER'}))
+    files = Corpus(Datalist(corp.subcorpora[0].files), level='d', datatype='conll')
+    assert_equals(make_corpus(describe_corpus(files)).datatype, 'conll')
+
+def test_multiprocess_tree_interro():
+    """Testing tree searches shared out between processes"""
+    from corpkit.interrogator import interrogator
+    corp = Corpus(speak_path)
+    # tgrep searches file by file, so files are scheduled across processes
+    serial = interrogator(corp, {'t': r'__ < /JJ.?/'}, tgrep=True, printstatus=False)
+    parallel = interrogator(corp, {'t': r'__ < /JJ.?/'}, tgrep=True,
+                            multiprocess=2, printstatus=False)
+    assert_equals(parallel.results.to_dict(), serial.results.to_dict())
+
+test_multiprocess_tree_interro.slow = 1
+
+def test_document_cache():
+    """Testing eviction and reparsing in the cache of parsed files"""
+    import os
+    from corpkit.cache import DocumentCache, documents, _frame_size
+    from corpkit.conll import parse_conll
+    assert_equals(documents.max_bytes, 0)
+    first, second = Corpus(speak_path).all_filepaths[:2]
+    # room for only one of the files
+    docs = DocumentCache(max_bytes=max(_frame_size(parse_conll(p)) for p in [first, second]))
+    docs.get(first)
+    docs.get(second)
+    assert_equals([k[0] for k in docs.items], [os.path.abspath(second)])
+    docs.get(second)
+    assert_equals((docs.hits, docs.misses), (1, 2))
+    # a changed file is parsed again
+    st = os.stat(second)
+    os.utime(second, (st.st_atime, st.st_mtime + 10))
+    try:
+        docs.get(second)
+    finally:
+        os.utime(second, (st.st_atime, st.st_mtime))
+    assert_equals((docs.hits, docs.misses), (1, 3))
+
+def test_manifest_rescan():
+    """Testing that the manifest notices new files, and isn't saved on load"""
+    import os
+    import shutil
+    import tempfile
+    from corpkit.manifest import get_manifest, manifest_path
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'test-parsed')
+        shutil.copytree(speak_path, path)
+        corp = Corpus(path, print_info=False)
+        assert_equals(os.path.exists(manifest_path(corp.path)), False)
+        before = len(get_manifest(path))
+        os.mkdir(os.path.join(path, 'third'))
+        shutil.copy(corp.all_filepaths[0], os.path.join(path, 'third'))
+        assert_equals(len(get_manifest(path)), before + 1)
+    finally:
+        shutil.rmtree(tmp)
+
+def test_iter_concordance():
+    """Testing streaming concordance"""
+    import pandas as pd
+    corp = Corpus(parsed_path)
+    exact = corp.concordance({'w': 'any'})
+    chunks = list(corp.iter_concordance({'w': 'any'}, chunksize=10))
+    assert_equals(all(len(c) <= 10 for c in chunks), True)
+    assert_equals(pd.concat(chunks).values.tolist(), exact.values.tolist())
+
+def test_conc_no_hits_in_file():
+    """Testing concordancing when a file has nothing to show"""
+    import pandas as pd
+    corp = Corpus(parsed_path)
+    # 'the' is only in the first subcorpus
+    lines = corp.concordance({'w': 'the'})
+    assert_equals(len(lines), 2)
+    assert_equals(set(lines['c']), set(['first']))
+    chunks = list(corp.iter_concordance({'w': 'the'}))
+    assert_equals(pd.concat(chunks).values.tolist(), lines.values.tolist())
+    assert_equals(len(corp.concordance({'w': 'the'}, on_disk=True)), 2)
+
+def test_disk_concordance():
+    """Testing concordance lines on disk"""
+    corp = Corpus(parsed_path)
+    exact = corp.concordance({'w': 'any'})
+    lines = corp.concordance({'w': 'any'}, on_disk=True)
+    assert_equals(len(lines), len(exact))
+    assert_equals(lines[:10].values.tolist(), exact[:10].values.tolist())
+    edited = lines.edit(skip_entries=r'^t', just_subcorpora=['first'])
+    expected = exact.edit(skip_entries=r'^t', just_subcorpora=['first'])
+    assert_equals(edited.materialise().values.tolist(), expected.values.tolist())
+
+def test_read_sentences():
+    """Testing reading single sentences from their offsets"""
+    from corpkit.conll import parse_conll, read_sentences
+    corp = Corpus(speak_path)
+    f = corp.all_filepaths[0]
+    full = parse_conll(f)
+    part = read_sentences(f, [2, 3])
+    assert_equals(part.equals(full.loc[[2, 3]]), True)
+    assert_equals(part._metadata[3], full._metadata[3])
+    lines = corp.concordance({'w': 'any'})
+    assert_equals(list(lines.expand(0)['l'][:3]), list(lines['l'][:3]))
+
+def test_read_compressed_sentences():
+    """Testing reading sentences from a compressed file"""
+    import os
+    import gzip
+    import shutil
+    import tempfile
+    from corpkit.conll import read_sentences
+    f = Corpus(speak_path).all_filepaths[0]
+    tmp = tempfile.mkdtemp()
+    try:
+        zipped = os.path.join(tmp, os.path.basename(f) + '.gz')
+        with open(f, 'rb') as fo, gzip.open(zipped, 'wb') as zo:
+            shutil.copyfileobj(fo, zo)
+        part = read_sentences(zipped, [1, 3])
+        assert_equals(part.equals(read_sentences(f, [1, 3])), True)
+    finally:
+        shutil.rmtree(tmp)
+
+def test_tregex_lines_context():
+    """Testing that tregex concordance lines can't be expanded"""
+    import pandas as pd
+    from corpkit.interrogation import Concordance
+    lines = Concordance(pd.DataFrame([['_,_', 'first', 'a.txt', 'none', 'the', 'cat', 'sat']],
+                                     columns=list('icfslmr')))
+    try:
+        lines.expand()
+        raised = False
+    except ValueError:
+        raised = True
+    assert_equals(raised, True)
+
+def test_sort_kwic():
+    """Testing sorting concordance lines by stored keys"""
+    from corpkit.interrogation import Concordance
+    corp = Corpus(speak_path)
+    lines = corp.concordance({'w': 'any'}, sort_keys=2)
+    plain = Concordance(lines.drop(['L1', 'L2', 'R1', 'R2'], axis=1))
+    assert_equals(list(lines['R1']), list(plain.kwic_key('R1')))
+    assert_equals(list(lines.sort_kwic(['R1', 'L2']).index),
+                  list(plain.sort_kwic(['R1', 'L2']).index))
+
+def test_tree_sort_keys():
+    """Testing sort keys on concordance lines from tree searches"""
+    from corpkit.process import make_conc_lines_from_whole_mid
+    wholes = [('a/b.txt', 'none', 'The cat sat on the mat')]
+    lines = make_conc_lines_from_whole_mid(wholes, [('sat',)], show=['w'], sort_keys=2)
+    assert_equals(lines[0][4:], ['The cat', 'sat', 'on the mat', 'cat', 'the', 'on', 'the'])
+
+def test_near_duplicates():
+    """Testing grouping of similar MinHash signatures"""
+    import numpy as np
+    from corpkit.dedupe import near_duplicates
+    first = np.arange(128)
+    second = first.copy()
+    second[:10] = 999
+    assert_equals(near_duplicates({'a': first, 'b': second, 'c': first + 1000}), {'b': 'a'})
+
+def test_signatures_changed_file():
+    """Testing that only changed files get new MinHash signatures"""
+    import os
+    import shutil
+    import tempfile
+    from corpkit import dedupe
+    made = []
+    minhash = dedupe.minhash
+    def counting_minhash(path, **kwargs):
+        made.append(path)
+        return minhash(path, **kwargs)
+    tmp = tempfile.mkdtemp()
+    dedupe.minhash = counting_minhash
+    try:
+        path = os.path.join(tmp, 'test-parsed')
+        shutil.copytree(speak_path, path)
+        first = dedupe.signatures(Corpus(path, print_info=False), multiprocess=False)
+        changed = sorted(first)[0]
+        st = os.stat(changed)
+        os.utime(changed, (st.st_atime, st.st_mtime + 10))
+        dedupe.signatures(Corpus(path, print_info=False), multiprocess=False)
+        assert_equals(made[len(first):], [changed])
+    finally:
+        dedupe.minhash = minhash
+        shutil.rmtree(tmp)
+
+def test_conc_lines_from_spans():
+    """Testing concordance lines sliced at tregex node numbers"""
+    from corpkit.process import read_subtree_codes, conc_lines_from_spans
+    tree = '(ROOT (S (NP (DT The) (NN dog)) (VP (VBD saw) (NP (DT the) (NN dog)))))'
+    out = ['# /tmp/first.txt', '1:7', tree, '# /tmp/first.txt', '1:15', tree]
+    matches = read_subtree_codes(out)
+    assert_equals([m[2] for m in matches], [7, 15])
+    result, lines = conc_lines_from_spans(matches)
+    assert_equals([r[-1] for r in result], ['dog', 'dog'])
+    assert_equals([l[4:] for l in lines], [['the', 'dog', 'saw the dog'],
+                                           ['the dog saw the', 'dog', '']])
+    _, lines = conc_lines_from_spans(matches, sort_keys=2)
+    assert_equals([l[7:] for l in lines], [['the', '', 'saw', 'the'],
+                                           ['the', 'saw', '', '']])
+    result, _ = conc_lines_from_spans(read_subtree_codes(['1:6', tree]), option='u')
+    assert_equals(result[0][-1], 'nn')
+
 # skipping this for now, as who cares about tokens
 #def test_interro4():
 #    """Testing interrogation 4"""
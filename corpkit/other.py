@@ -114,6 +114,7 @@ def concprinter(dataframe, kind='string', n=100,
     :type n: int/'all'
     :returns: None
     """
+    import re
     import corpkit
 
     df = dataframe.copy().fillna('')
@@ -162,7 +163,8 @@ def concprinter(dataframe, kind='string', n=100,
     if columns == 'all':
         columns = cnames[:ind+1]
     if metadata is True:
-        after_right = cnames[ind+1:]
+        # leave out sort keys
+        after_right = [c for c in cnames[ind+1:] if not re.match(r'^[LR][0-9]+$', str(c))]
         columns = columns + after_right
     elif isinstance(metadata, list):
         columns = columns + metadata
@@ -742,8 +744,20 @@ def topwords(self, datatype='n', n=10, df=False, sort=True, precision=2):
         operation = 'k'
     else:
         operation = '%'
+    from corpkit.sparse import is_sparse, nonzero_rows
+    try:
+        from itertools import zip_longest
+    except ImportError:
+        from itertools import izip_longest as zip_longest
     if isinstance(self, corpkit.interrogation.Interrodict):
         to_iterate = self.items()
+    elif is_sparse(self.results):
+        # only look at the non-zero cells of each row
+        if sort is True:
+            to_iterate = [(x, ser.sort_values(ascending=ascend)) \
+                          for x, ser in nonzero_rows(self.results)]
+        else:
+            to_iterate = list(nonzero_rows(self.results))
     else:
         if sort is True:
             to_iterate = [(x, self.results.ix[x].sort_values(ascending=ascend)) \
@@ -774,7 +788,8 @@ def topwords(self, datatype='n', n=10, df=False, sort=True, precision=2):
             #strings.append(ser2)
         else:
             as_str = data[:n].to_string(header=False)
-            linelen = len(as_str.splitlines()[1])
+            # sparse rows can have fewer than two results
+            linelen = max(len(l) for l in as_str.splitlines())
             strings.append(name.ljust(linelen - 1) + '%s\n' % operation + as_str)
 
 
@@ -783,6 +798,7 @@ def topwords(self, datatype='n', n=10, df=False, sort=True, precision=2):
         dataframe = pd.concat(strings, axis=1, keys=[i for i, _ in to_iterate])
         return dataframe
     output = ''
-    for tup in zip(*[i.splitlines() for i in strings]):
-        output += '   '.join(tup) + '\n'
+    widths = [max(len(l) for l in i.splitlines()) for i in strings]
+    for tup in zip_longest(*[i.splitlines() for i in strings], fillvalue=''):
+        output += '   '.join(l.ljust(w) for l, w in zip(tup, widths)) + '\n'
     print(output)
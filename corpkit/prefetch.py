@@ -0,0 +1,118 @@
+"""
+corpkit: reading files ahead of the interrogation loop
+
+While one file is being parsed and searched, background threads read the
+next few, so that the disk (or network) and the CPU are busy at once.
+"""
+
+from __future__ import print_function
+
+def read_data(path, span=None):
+    """
+    Read a file as text, decompressing it if its name ends with `.gz`,
+    `.bz2`, `.xz` or `.zst`
+
+    :param span: only read this `(start, end, ...)` byte range of an
+                 uncompressed file
+    :returns: `str`
+    """
+    from corpkit.process import open_compressed
+    with open_compressed(path, 'rb') as fo:
+        if span:
+            fo.seek(span[0])
+            data = fo.read(span[1] - span[0])
+        else:
+            data = fo.read()
+    return data.decode('utf-8').replace('\r\n', '\n')
+
+class Prefetcher(object):
+    """
+    A bounded queue of files being read by a thread pool
+
+    Files must be asked for in the order they were given. Reading stops
+    ahead of the loop once `depth` files or `max_bytes` bytes (on disk) are
+    waiting, though a single file is always read, however big.
+    """
+
+    def __init__(self, items, depth=4, max_bytes=256 * 1024 * 1024, threads=2):
+        """
+        :param items: `list` of `(path, span)` tuples
+        """
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+        self.items = deque(items)
+        # everything still to be asked for
+        self.keys = set(self.items)
+        self.pending = deque()
+        self.depth = max(int(depth), 1)
+        self.max_bytes = max_bytes
+        self.queued_bytes = 0
+        self.pool = ThreadPoolExecutor(max(int(threads), 1))
+        self._fill()
+
+    def __repr__(self):
+        return "<corpkit.prefetch.Prefetcher instance: %d queued, %d to go>" % \
+               (len(self.pending), len(self.items))
+
+    @staticmethod
+    def _size(key):
+        import os
+        path, span = key
+        if span:
+            return span[1] - span[0]
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _fill(self):
+        """
+        Start reading files until the queue is full
+        """
+        while self.items and len(self.pending) < self.depth:
+            size = self._size(self.items[0])
+            if self.pending and self.queued_bytes + size > self.max_bytes:
+                break
+            key = self.items.popleft()
+            self.pending.append((key, size, self.pool.submit(read_data, *key)))
+            self.queued_bytes += size
+
+    def get(self, path, span=None):
+        """
+        Get the text of a file, waiting for it if still being read. Files
+        queued before it are dropped, as the loop has skipped them.
+
+        :returns: `str`
+        """
+        key = (path, span)
+        # a file that was never queued leaves the queue as it is
+        if key not in self.keys:
+            return read_data(path, span)
+        self.keys.discard(key)
+        while self.pending:
+            k, size, future = self.pending.popleft()
+            self.queued_bytes -= size
+            if k == key:
+                data = future.result()
+                self._fill()
+                return data
+            future.cancel()
+            self.keys.discard(k)
+        # not queued yet, so drop anything before it and read it now
+        while self.items and self.items[0] != key:
+            self.keys.discard(self.items.popleft())
+        if self.items:
+            self.items.popleft()
+        self._fill()
+        return read_data(path, span)
+
+    def close(self):
+        """
+        Stop reading ahead
+        """
+        for _, _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.items.clear()
+        self.keys.clear()
+        self.pool.shutdown(wait=False)
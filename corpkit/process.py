@@ -216,6 +216,10 @@ def tregex_engine(corpus=False,
     if not res:
         return []
 
+    # with -x and -w, each match is a node number followed by its whole tree
+    if '-x' in options and '-w' in options:
+        return read_subtree_codes(res, filename=kwargs.get('filename', ''))
+
     # make unicode and lowercase
     make_tuples = []
 
@@ -373,14 +377,14 @@ def determine_datatype(path):
     if os.path.isfile(path):
         singlefile = True
         if '.' in path:
-            exts = [os.path.splitext(path)[1]]
+            exts = [os.path.splitext(strip_compression(path))[1]]
         else:
             exts = ['.txt']
     else:
         for (root, dirs, fs) in os.walk(path):
             for f in fs:
                 if '.' in f:
-                    ext = os.path.splitext(f)[1]
+                    ext = os.path.splitext(strip_compression(f))[1]
                     exts.append(ext)
     counted = Counter(exts)
     counted.pop('', None)
@@ -887,6 +891,9 @@ def canpickle(obj):
 
     """
     import os
+    # no need to try pickling simple values
+    if obj is None or isinstance(obj, (STRINGTYPE, bool, int, float)):
+        return True
     try:
         from cPickle import UnpickleableError as unpick_error
         import cPickle as pickle
@@ -930,6 +937,9 @@ def saferead(path):
     import sys
     if sys.version_info.major == 3:
         enc = 'utf-8'
+        if compression_of(path):
+            with open_compressed(path) as fo:
+                return fo.read(), enc
         try:
             with open(path, 'r', encoding=enc) as fo:
                 data = fo.read()
@@ -948,6 +958,91 @@ def saferead(path):
             data = data.decode(enc, errors='ignore')
         return data, enc
 
+def compression_of(path):
+    """
+    Get the compression extension of a filename, or `''` if uncompressed
+    """
+    from corpkit.constants import COMPRESSED_EXTENSIONS
+    for ext in COMPRESSED_EXTENSIONS:
+        if path.endswith(ext):
+            return ext
+    return ''
+
+def strip_compression(path):
+    """
+    Remove a compression extension from a filename
+    """
+    ext = compression_of(path)
+    return path[:-len(ext)] if ext else path
+
+def open_compressed(path, mode='rt'):
+    """
+    Open a file for reading, decompressing it as a stream if it ends with 
+    `.gz`, `.bz2`, `.xz` or `.zst` (the latter needs `zstandard`)
+
+    :param mode: `'rt'` for utf-8 text, `'rb'` for bytes
+    :returns: file object
+    """
+    import io
+    ext = compression_of(path)
+    if ext == '.gz':
+        import gzip
+        fo = gzip.open(path, 'rb')
+    elif ext == '.bz2':
+        import bz2
+        fo = bz2.BZ2File(path, 'rb')
+    elif ext == '.xz':
+        import lzma
+        fo = lzma.open(path, 'rb')
+    elif ext == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstandard is needed to read %s' % path)
+        fo = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True,
+                                                        read_across_frames=True)
+    else:
+        fo = open(path, 'rb')
+    if 'b' in mode:
+        return fo
+    return io.TextIOWrapper(fo, encoding='utf-8', errors='ignore')
+
+def compress_file(path, kind='gz', level=None):
+    """
+    Compress a file, replacing it with `path.<kind>`
+
+    :param kind: `'gz'`, `'bz2'`, `'xz'` or `'zst'`
+    :param level: compression level, or `None` for the default
+
+    :returns: path of the compressed file
+    """
+    import os
+    import shutil
+    if compression_of(path):
+        return path
+    newpath = '%s.%s' % (path, kind)
+    tmp = newpath + '.tmp'
+    with open(path, 'rb') as fi:
+        if kind == 'gz':
+            import gzip
+            fo = gzip.open(tmp, 'wb', compresslevel=9 if level is None else level)
+        elif kind == 'bz2':
+            import bz2
+            fo = bz2.BZ2File(tmp, 'wb', compresslevel=9 if level is None else level)
+        elif kind == 'xz':
+            import lzma
+            fo = lzma.open(tmp, 'wb', preset=level)
+        elif kind == 'zst':
+            import zstandard
+            fo = zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(open(tmp, 'wb'))
+        else:
+            raise ValueError("Compression must be 'gz', 'bz2', 'xz' or 'zst'.")
+        with fo:
+            shutil.copyfileobj(fi, fo, 1 << 20)
+    os.rename(tmp, newpath)
+    os.remove(path)
+    return newpath
+
 def urlify(s):
     """
     Turn plot title into filename for saving
@@ -1276,11 +1371,129 @@ def format_tregex(results,
     
     return done
 
+def read_subtree_codes(lines, filename=''):
+    """
+    Read Tregex output made with `-x`, `-w` and `-f`, where each match is
+    a `tree:node` number line and then the whole tree on one line
+
+    :returns: `list` of `[fname, tree number, node number, tree]`
+    """
+    import re
+    code = re.compile(r'^([0-9]+):([0-9]+)$')
+    out = []
+    fname, numbers = filename, None
+    for line in lines:
+        if line.startswith('# /'):
+            fname = line
+            continue
+        match = code.match(line)
+        if match:
+            numbers = int(match.group(1)), int(match.group(2))
+        elif numbers and line.startswith('('):
+            out.append([fname, numbers[0], numbers[1], line])
+            numbers = None
+    return out
+
+def tree_spans(tree):
+    """
+    Number the nodes of a bracketed tree as Tregex does, in preorder from
+    one, counting leaves as nodes
+
+    :returns: `list` of leaves, and a `list` of `(label, first leaf, last
+              leaf + 1, start char, end char)` for each node number
+    """
+    import re
+    leaves, nodes, stack = [], [None], []
+    expect_label = False
+    for tok in re.finditer(r'\(|\)|[^\s()]+', tree):
+        text = tok.group()
+        if text == '(':
+            stack.append(len(nodes))
+            nodes.append(['', len(leaves), len(leaves), tok.start(), tok.end()])
+            expect_label = True
+        elif text == ')':
+            if stack:
+                node = nodes[stack.pop()]
+                node[2], node[4] = len(leaves), tok.end()
+            expect_label = False
+        elif expect_label:
+            nodes[stack[-1]][0] = text
+            expect_label = False
+        else:
+            nodes.append([text, len(leaves), len(leaves) + 1, tok.start(), tok.end()])
+            leaves.append(text)
+    return leaves, nodes
+
+def conc_lines_from_spans(matches, option='t', preserve_case=False, sort_keys=False):
+    """
+    Make results and concordance lines from :func:`read_subtree_codes`
+    output, by slicing the leaves of each tree at its matching node
+
+    :param option: how to show the match: `'t'` for its words, `'u'` for
+                   its label, `'o'` for its bracketed subtree
+    :param sort_keys: also give the first this many words to the left and
+                      right of each line, as from :func:`sort_key_fields`
+    :returns: `list` of `[fname, speaker, match]` like
+              :func:`tregex_engine`, and `list` of concordance lines
+    """
+    import os
+    result, conc_lines = [], []
+    trees, seen = {}, set()
+
+    def fix(text):
+        return text if preserve_case else text.lower().replace('/', '-slash-')
+
+    for fname, treenum, nodenum, tree in matches:
+        key = (fname, treenum)
+        if key not in trees:
+            trees[key] = tree_spans(tree)
+        leaves, nodes = trees[key]
+        if not 0 < nodenum < len(nodes):
+            continue
+        label, start, end, cstart, cend = nodes[nodenum]
+        if option == 'u':
+            text = label
+        elif option == 'o':
+            text = tree[cstart:cend]
+        else:
+            text = ' '.join(leaves[start:end])
+        result.append([fname, '', fix(text)])
+        # nodes over the same words make the same line
+        if (fname, treenum, start, end) in seen:
+            continue
+        seen.add((fname, treenum, start, end))
+        left, right = fix(' '.join(leaves[:start])), fix(' '.join(leaves[end:]))
+        lin = ['_,_', '', os.path.basename(fname), '', left,
+               fix(' '.join(leaves[start:end])), right]
+        if sort_keys:
+            lin += sort_key_fields(left, right, sort_keys)
+        conc_lines.append(lin)
+    return result, conc_lines
+
+def sort_key_fields(start, end, num):
+    """
+    Get the first `num` words to the left and right of a match, lowercased,
+    from the left and right context strings
+
+    :param start: left context
+    :param end: right context
+    :param num: number of words either side
+    :type num: `int`
+    :returns: `list` of `L1` ... `Ln` then `R1` ... `Rn`, `''` where the
+              context runs out
+    """
+    left = start.lower().split()[::-1]
+    right = end.lower().split()
+    keys = [left[n] if n < len(left) else '' for n in range(num)]
+    keys += [right[n] if n < len(right) else '' for n in range(num)]
+    return keys
+
 def make_conc_lines_from_whole_mid(wholes,
                                    middle_column_result,
                                    show=False,
                                    category=False,
-                                   filename=False):
+                                   filename=False,
+                                   sort_keys=False):
     """
     Create concordance line output from tregex output
     """
@@ -1292,7 +1505,7 @@ def make_conc_lines_from_whole_mid(wholes,
     conc_lines = []
     unique_wholes = []
     unique_middle_column_result = []
-    duplicates = []
+    duplicates = set()
 
     word_index = show.index('w') if 'w' in show else 0
 
@@ -1300,9 +1513,9 @@ def make_conc_lines_from_whole_mid(wholes,
 
     for (f, sk, whole), mid in list(zip(wholes, middle_column_result)):
         mid = mid[-1]
-        joined = '-join-'.join([f, sk, whole, mid])
+        joined = (f, sk, whole, mid)
         if joined not in duplicates:
-            duplicates.append(joined)
+            duplicates.add(joined)
             unique_wholes.append([f, sk, whole])
             unique_middle_column_result.append(mid)
 
@@ -1317,7 +1530,10 @@ def make_conc_lines_from_whole_mid(wholes,
             start, middle, end = whole[0:offstart].strip(), whole[offstart:offend].strip(), \
                                  whole[offend:].strip()
             # lin = [ix, category, fname, sname, start, mid, end]
-            conc_lines.append(['_,_', metcat, os.path.basename(f), sk, start, middle, end])
+            lin = ['_,_', metcat, os.path.basename(f), sk, start, middle, end]
+            if sort_keys:
+                lin += sort_key_fields(start, end, sort_keys)
+            conc_lines.append(lin)
     return conc_lines
 
 def gettag(query, lemmatag=False):
@@ -1374,38 +1590,29 @@ def get_first_df(corpus):
 
 def make_dotfile(path, return_json=False, data_dict=False):
     """
-    Generate a dotfile in the data directory containing corpus information
-    Right now, this information is the metadata fields and their values
+    Update the corpus metadata store (see :mod:`corpkit.metastore`), 
+    reading only new and changed files. Right now, this information is the 
+    metadata fields and their values, plus cached tables of results
+
+    :param data_dict: tables to add, as `DataFrames` or `dicts`
     """
     path = getattr(path, 'path', path)
-    import os
-    import json
-    from corpkit.build import get_all_metadata_fields, get_speaker_names_from_parsed_corpus
-    from corpkit.constants import OPENER
+    import pandas as pd
+    from corpkit.metastore import MetadataStore
+    store = MetadataStore(path)
+    store.update()
     if data_dict:
-        json_data = data_dict
-    else:
-        json_data = {'fields': {}}
-        fields = get_all_metadata_fields(path, include_speakers=True)
-        for field in fields:
-            vals = get_speaker_names_from_parsed_corpus(path, field)
-            json_data['fields'][field] = vals
-        df = get_first_df(path)
-        json_data['columns'] = ['s', 'i'] + list(df.columns)
-    dotname = '.%s.json' % os.path.basename(path)
-    with OPENER(os.path.join('data', dotname), 'w', encoding='utf-8') as fo:
-        fo.write(json.dumps(json_data))
+        for name, table in data_dict.items():
+            if name not in ['fields', 'columns']:
+                store.set_table(name, pd.DataFrame(table))
     if return_json:
-        return json_data
+        return store.as_dict()
     
 def get_corpus_metadata(path, generate=False):
     """
     Return a dict containing corpus metadata, or None if not done yet
     """
-    import os
-    import json
     from corpkit.corpus import Corpus
-    from corpkit.constants import OPENER
 
     if not isinstance(path, Corpus):
         corpus = Corpus(path, print_info=False)
@@ -1415,21 +1622,12 @@ def get_corpus_metadata(path, generate=False):
     if not corpus.datatype == 'conll':
         return {}
 
-    path = getattr(path, 'path', path)
-    dotname = '.%s.json' % os.path.basename(path)
-    dotpath = os.path.join('data', dotname)
-    if not os.path.isfile(dotpath):
-        if generate:
-            return make_dotfile(path, return_json=True)
-        else:
-            return
-    else:
-        with OPENER(dotpath, 'r') as fo:
-            data = fo.read()
-            if data:
-                return json.loads(data)
-            else:
-                return make_dotfile(path, return_json=True)
+    from corpkit.metastore import MetadataStore
+    store = MetadataStore(path)
+    if not store.exists() and not generate:
+        return
+    # cheap if no files have changed
+    return make_dotfile(path, return_json=True)
 
 def make_df_json_name(typ, subcorpora=False):
     if subcorpora:
@@ -1443,12 +1641,18 @@ def add_df_to_dotfile(path, df, typ='features', subcorpora=False):
     """
     Add some Pandas data to corpus metadata
     """
-    path = getattr(path, 'path', path)
-    name = make_df_json_name(typ, subcorpora)
-    md = get_corpus_metadata(path, generate=True)
-    if name not in md:
-        md[name] = df.astype(object).to_dict()
-        make_dotfile(path, data_dict=md)
+    from corpkit.metastore import MetadataStore
+    MetadataStore(path).set_table(make_df_json_name(typ, subcorpora), df)
+
+def get_df_from_dotfile(path, typ='features', subcorpora=False):
+    """
+    Get some Pandas data from corpus metadata, or `None` if it isn't there,
+    or the corpus has changed since it was added
+    """
+    from corpkit.metastore import MetadataStore
+    store = MetadataStore(path)
+    store.update()
+    return store.get_table(make_df_json_name(typ, subcorpora))
 
 def delete_files_and_subcorpora(corpus, skip_metadata, just_metadata):
     """
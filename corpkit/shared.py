@@ -0,0 +1,235 @@
+"""
+corpkit: parsed corpora held in shared memory
+
+Each file of a corpus is parsed once. Every CONLL column is then stored as a
+single array of integer codes in a `multiprocessing.shared_memory` block,
+with one vocabulary per column. Worker processes attach to the blocks as
+`numpy` views instead of making their own copies, and rebuild a `DataFrame`
+for one file at a time, without reading or parsing it again.
+
+Needs Python 3.8 or later.
+"""
+
+from __future__ import print_function
+
+# shared memory blocks open in this process, by name
+_blocks = {}
+# decoded vocabularies and metadata, by block name
+_unpickled = {}
+
+def _create(data):
+    """
+    Copy an array or bytestring into a new shared memory block
+
+    :returns: a picklable description of the block: name, dtype and shape
+    """
+    import numpy as np
+    from multiprocessing import shared_memory
+    if isinstance(data, bytes):
+        data = np.frombuffer(data, dtype=np.uint8)
+    data = np.ascontiguousarray(data)
+    block = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    view = np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)
+    view[:] = data
+    _blocks[block.name] = block
+    return block.name, data.dtype.str, data.shape
+
+def _free(names, owner):
+    """
+    Close and remove shared memory blocks, if this is the process that
+    made them
+    """
+    import os
+    if os.getpid() != owner:
+        return
+    for name in names:
+        block = _blocks.pop(name, None)
+        if block is None:
+            continue
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+def _view(desc):
+    """
+    Get a `numpy` view of a block, attaching to it if need be
+    """
+    import numpy as np
+    name, dtype, shape = desc
+    if name not in _blocks:
+        from multiprocessing import shared_memory
+        # only the process that made the block should remove it. before
+        # python 3.13, workers share their parent's tracker, which is fine
+        try:
+            _blocks[name] = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            _blocks[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=_blocks[name].buf)
+
+def _unpickle(desc, start=0, end=None):
+    """
+    Unpickle (part of) a bytes block
+    """
+    import pickle
+    key = (desc[0], start, end)
+    if key in _unpickled:
+        return _unpickled[key]
+    data = pickle.loads(_view(desc)[start:end].tobytes())
+    # vocabularies are needed for every file, metadata only once
+    if end is None:
+        _unpickled[key] = data
+    return data
+
+def _vocabularies(handle):
+    """
+    Get an object array of values for each column, with `nan` last, so
+    that the missing value code, -1, decodes to it
+    """
+    import numpy as np
+    key = ('arrays', handle['vocab'][0])
+    if key not in _unpickled:
+        arrays = {}
+        for col, words in _unpickle(handle['vocab']).items():
+            arr = np.empty(len(words) + 1, dtype=object)
+            arr[:-1] = words
+            arr[-1] = np.nan
+            arrays[col] = arr
+        _unpickled[key] = arrays
+    return _unpickled[key]
+
+class SharedCorpus(object):
+    """
+    A parsed corpus in shared memory
+
+    Make one with :func:`~corpkit.corpus.Corpus.share`. Pass its `handle`,
+    which is small and picklable, to other processes, and rebuild files
+    there with :func:`shared_frame`.
+    """
+
+    def __init__(self, corpus, usecols=None):
+        import os
+        import pickle
+        import weakref
+        import numpy as np
+        import pandas as pd
+        from corpkit.conll import parse_conll
+        from corpkit.coded import Vocabulary
+        from corpkit.cache import corpus_fingerprint
+
+        # taken first, so that files changed while parsing count as changed
+        self.fingerprint = corpus_fingerprint(corpus)
+        vocabs, codes, sents, toks = {}, {}, [], []
+        files, metadata = {}, []
+        start, meta_start = 0, 0
+        for path in corpus.all_filepaths:
+            df = parse_conll(path, usecols=usecols)
+            if df is None:
+                continue
+            end = start + len(df)
+            for col in df.columns:
+                vocab = vocabs.setdefault(col, Vocabulary())
+                # factorize, then only encode the unique values
+                local, uniques = pd.factorize(df[col])
+                ids = vocab.encode(list(uniques)).astype(np.int32)
+                coded = np.full(len(df), -1, dtype=np.int32)
+                found = local >= 0
+                coded[found] = ids[local[found]]
+                # columns missing from earlier files are left as nan
+                previous = codes.setdefault(col, [])
+                filled = sum(len(c) for c in previous)
+                if filled < start:
+                    previous.append(np.full(start - filled, -1, dtype=np.int32))
+                previous.append(coded)
+            sents.append(df.index.get_level_values(0).values.astype(np.int64))
+            toks.append(df.index.get_level_values(1).values.astype(np.int64))
+            meta = pickle.dumps(getattr(df, '_metadata', {}), protocol=pickle.HIGHEST_PROTOCOL)
+            metadata.append(meta)
+            files[path] = (start, end, meta_start, meta_start + len(meta),
+                           [(col, df[col].dtype) for col in df.columns])
+            start, meta_start = end, meta_start + len(meta)
+
+        columns = {}
+        for col, parts in codes.items():
+            filled = sum(len(c) for c in parts)
+            if filled < start:
+                parts.append(np.full(start - filled, -1, dtype=np.int32))
+            columns[col] = _create(np.concatenate(parts))
+        empty = np.zeros(0, dtype=np.int64)
+        vocab = {col: v.words for col, v in vocabs.items()}
+        self.handle = {'files': files,
+                       'columns': columns,
+                       's': _create(np.concatenate(sents) if sents else empty),
+                       'i': _create(np.concatenate(toks) if toks else empty),
+                       'vocab': _create(pickle.dumps(vocab, protocol=pickle.HIGHEST_PROTOCOL)),
+                       'metadata': _create(b''.join(metadata))}
+        self.path = corpus.path
+        self.tokens = start
+        # free the blocks when this object goes, or at exit at the latest
+        h = self.handle
+        names = [desc[0] for desc in list(h['columns'].values()) +
+                 [h['s'], h['i'], h['vocab'], h['metadata']]]
+        self._finalizer = weakref.finalize(self, _free, names, os.getpid())
+
+    def __repr__(self):
+        return "<corpkit.shared.SharedCorpus instance: %s, %d files, %d tokens>" % \
+               (self.path, len(self.handle['files']), self.tokens)
+
+    def __contains__(self, path):
+        return path in self.handle['files']
+
+    def frame(self, path, usecols=None):
+        """
+        Get the `DataFrame` for one file, as :func:`~corpkit.conll.parse_conll`
+        would make it
+        """
+        return shared_frame(self.handle, path, usecols=usecols)
+
+    def close(self):
+        """
+        Free the shared memory. The handle cannot be used afterward.
+        """
+        h = self.handle
+        self._finalizer()
+        for key in list(_unpickled):
+            if h['vocab'][0] in key[:2]:
+                _unpickled.pop(key)
+        h['files'] = {}
+
+def shared_frame(handle, path, usecols=None):
+    """
+    Rebuild the `DataFrame` of a file from a :class:`SharedCorpus` handle
+
+    Only the rows of this file are decoded; the codes themselves are read
+    from shared memory without copying.
+
+    :param handle: `SharedCorpus.handle`
+    :param path: path of the file
+    :param usecols: only decode these columns, by name or, as given to
+                    :func:`~corpkit.conll.parse_conll`, by position
+
+    :returns: `DataFrame`, with metadata as `._metadata`, or `None` if the
+              file is not in the shared corpus
+    """
+    import pandas as pd
+    if path not in handle['files']:
+        return
+    start, end, meta_start, meta_end, dtypes = handle['files'][path]
+    if usecols:
+        from corpkit.constants import CONLL_COLUMNS
+        names = ['s'] + CONLL_COLUMNS
+        usecols = [names[c] if isinstance(c, int) else c for c in usecols]
+    vocabs = _vocabularies(handle)
+    index = pd.MultiIndex.from_arrays([_view(handle['s'])[start:end],
+                                       _view(handle['i'])[start:end]],
+                                      names=['s', 'i'])
+    data = {}
+    for col, dtype in dtypes:
+        if usecols and col not in usecols:
+            continue
+        values = vocabs[col][_view(handle['columns'][col])[start:end]]
+        data[col] = pd.Series(values, index=index).astype(dtype)
+    df = pd.DataFrame(data, index=index, columns=list(data))
+    df._metadata = _unpickle(handle['metadata'], meta_start, meta_end)
+    return df
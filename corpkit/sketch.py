@@ -0,0 +1,403 @@
+"""
+corpkit: bounded-memory frequency summaries for very large interrogations
+"""
+
+from __future__ import print_function
+
+# relative error of a count-min sketch if neither it nor the stream length
+# is given: a 5 x 2719 table, about 110KB
+DEFAULT_EPSILON = 0.001
+# limits on the relative error when it is worked out from the stream length
+MIN_EPSILON = 0.0001
+MAX_EPSILON = 0.01
+
+class SpaceSaving(object):
+    """
+    A Space-Saving (heavy hitters) summary, holding at most `k` counters,
+    or `ceil(1 / epsilon)` if an error bound of `epsilon` is given instead.
+
+    Any item occurring more than `total / k` times is guaranteed to be
+    present. Stored counts may overestimate true counts, but never by more
+    than the per-item error, which is itself bounded by `total / k`.
+
+    Summaries can be added to one another, so that results from different
+    files, subcorpora or worker processes can be merged.
+    """
+
+    def __init__(self, k=None, epsilon=None):
+        import math
+        if k is None and epsilon is not None:
+            if not 0 < epsilon < 1:
+                raise ValueError('epsilon must be between 0 and 1.')
+            k = int(math.ceil(1.0 / epsilon))
+        if not isinstance(k, int) or k < 1:
+            raise ValueError('top must be a positive int, not %s.' % repr(k))
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def __getitem__(self, item):
+        return self.counts.get(item, 0)
+
+    def __repr__(self):
+        return "<corpkit.sketch.SpaceSaving instance: %d/%d counters, %d total>" % \
+               (len(self), self.k, self.total)
+
+    def __iadd__(self, other):
+        if isinstance(other, SpaceSaving):
+            self.merge(other)
+        else:
+            self.update(other)
+        return self
+
+    def empty(self):
+        """
+        A new, empty summary of the same size, for other summaries to be
+        merged into
+        """
+        return SpaceSaving(self.k)
+
+    def __getstate__(self):
+        # the heap is only an index, and can be rebuilt
+        state = self.__dict__.copy()
+        state['_heap'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._rebuild()
+
+    def _rebuild(self):
+        """
+        Remake the heap of (count, item) pairs from the counters
+        """
+        import heapq
+        self._heap = [(v, i) for i, v in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        """
+        Remove and return the item with the smallest count, and that count
+
+        Heap entries go stale whenever a counter is incremented, so they are
+        skipped until one matches the stored count.
+        """
+        import heapq
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                del self.counts[item]
+                return item, count
+
+    def _push(self, item):
+        import heapq
+        heapq.heappush(self._heap, (self.counts[item], item))
+        # stop stale entries from piling up
+        if len(self._heap) > self.k * 4:
+            self._rebuild()
+
+    @property
+    def min_count(self):
+        """
+        The smallest stored count, or zero if the summary is not yet full
+        """
+        if len(self.counts) < self.k:
+            return 0
+        return min(self.counts.values())
+
+    def add(self, item, count=1):
+        """
+        Count `item` `count` times
+        """
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.k:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del self.errors[evicted]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        self._push(item)
+
+    def update(self, data):
+        """
+        Count items from a `dict`/`Counter` of counts, or an iterable of items
+        """
+        if hasattr(data, 'items'):
+            # most frequent first, so that rare items are evicted
+            for item, count in sorted(data.items(), key=lambda x: x[1], reverse=True):
+                if count:
+                    self.add(item, count)
+        else:
+            for item in data:
+                self.add(item)
+
+    def merge(self, other):
+        """
+        Merge another summary into this one, keeping the top `k` counters
+
+        An item missing from a full summary may still have occurred up to
+        that summary's smallest count, so this is added to its count and error.
+        """
+        counts, errors = {}, {}
+        mins = (self.min_count, other.min_count)
+        for item in set(self.counts) | set(other.counts):
+            c, e = 0, 0
+            for summ, floor in zip((self, other), mins):
+                if item in summ.counts:
+                    c += summ.counts[item]
+                    e += summ.errors[item]
+                else:
+                    c += floor
+                    e += floor
+            counts[item] = c
+            errors[item] = e
+        keep = sorted(counts, key=counts.get, reverse=True)[:self.k]
+        self.counts = {i: counts[i] for i in keep}
+        self.errors = {i: errors[i] for i in keep}
+        self.total += other.total
+        self._rebuild()
+
+    def most_common(self, n=None):
+        """
+        Get `(item, count, error)` tuples, highest count first
+        """
+        out = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        return [(i, c, self.errors[i]) for i, c in out[:n]]
+
+    def error(self, item):
+        """
+        The largest possible overestimate of an item's stored count
+        """
+        return self.errors.get(item, 0)
+
+    def error_bound(self):
+        """
+        The largest possible overestimate of any stored count
+        """
+        return max(self.errors.values()) if self.errors else 0
+
+    def guaranteed(self, n=None):
+        """
+        Check which of the `n` most common items are certainly among the `n`
+        most frequent: those whose count, less its error, is at least the
+        count of the next item (or, if there is none, of any unstored item)
+
+        :returns: `list` of `(item, bool)` tuples, highest count first
+        """
+        ranked = self.most_common()
+        n = len(ranked) if n is None else n
+        floor = ranked[n][1] if n < len(ranked) else self.min_count
+        return [(i, c - e >= floor) for i, c, e in ranked[:n]]
+
+class CountMinSketch(object):
+    """
+    A count-min sketch, plus an exact table for frequent items.
+
+    Counts go into a `depth` x `width` table of integers, sized so that an
+    estimate exceeds the true count by more than `epsilon * total` with
+    probability of at most `delta`. Estimates are never too low.
+
+    If `epsilon` is not given, it is worked out from `expected`, the
+    expected total count, so that errors stay under `threshold`. Without
+    either, it is 0.001.
+
+    Since a sketch cannot list what it has counted, any item whose estimate
+    reaches `threshold` is also added to an exact table. From then on, it is
+    counted exactly, and only these items are listed in results.
+
+    Sketches with the same dimensions and seed can be added to one another.
+    """
+
+    # a mersenne prime, for universal hashing
+    PRIME = 2 ** 31 - 1
+
+    def __init__(self, epsilon=None, delta=0.01, threshold=5, seed=0, expected=None):
+        import math
+        import numpy as np
+        if epsilon is None:
+            if expected:
+                epsilon = min(max(float(threshold) / expected, MIN_EPSILON), MAX_EPSILON)
+            else:
+                epsilon = DEFAULT_EPSILON
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError('epsilon and delta must be between 0 and 1.')
+        self.epsilon = epsilon
+        self.delta = delta
+        self.threshold = threshold
+        self.seed = seed
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1.0 / delta)))
+        rs = np.random.RandomState(seed)
+        self._a = rs.randint(1, self.PRIME, self.depth).astype(np.uint64)
+        self._b = rs.randint(0, self.PRIME, self.depth).astype(np.uint64)
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.exact = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.exact)
+
+    def __iter__(self):
+        return iter(self.exact)
+
+    def __contains__(self, item):
+        return item in self.exact
+
+    def __getitem__(self, item):
+        return self.estimate([item])[0]
+
+    def __repr__(self):
+        return "<corpkit.sketch.CountMinSketch instance: %dx%d, %d exact, %d total>" % \
+               (self.depth, self.width, len(self), self.total)
+
+    def __iadd__(self, other):
+        if isinstance(other, CountMinSketch):
+            self.merge(other)
+        else:
+            self.update(other)
+        return self
+
+    def empty(self):
+        """
+        A new, empty sketch that this one can be merged into
+        """
+        return CountMinSketch(epsilon=self.epsilon, delta=self.delta,
+                              threshold=self.threshold, seed=self.seed)
+
+    def _columns(self, items):
+        """
+        Get the table column of each item, for each row
+
+        Python's own hash is salted per process, so crc32 is used instead,
+        to make sketches from different workers compatible.
+        """
+        import zlib
+        import numpy as np
+        from corpkit.constants import STRINGTYPE
+        keys = np.array([zlib.crc32((i if isinstance(i, STRINGTYPE) else str(i)).encode('utf-8')) \
+                         & 0xffffffff for i in items], dtype=np.uint64)
+        hashed = (self._a[:, None] * keys[None, :] + self._b[:, None]) % np.uint64(self.PRIME)
+        return (hashed % np.uint64(self.width)).astype(np.intp)
+
+    def _lookup(self, cols):
+        import numpy as np
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+    def estimate(self, items):
+        """
+        Estimate the counts of a list of items
+
+        :returns: `list` of `int`s
+        """
+        items = list(items)
+        if not items:
+            return []
+        approx = self._lookup(self._columns(items))
+        return [int(n) + self.exact.get(i, 0) for i, n in zip(items, approx)]
+
+    def update(self, data):
+        """
+        Count items from a `dict`/`Counter` of counts, or an iterable of items
+        """
+        import numpy as np
+        from collections import Counter
+        if not hasattr(data, 'items'):
+            data = Counter(data)
+        rest = []
+        for item, count in data.items():
+            self.total += count
+            if item in self.exact:
+                self.exact[item] += count
+            elif count:
+                rest.append((item, count))
+        if not rest:
+            return
+        items, counts = zip(*rest)
+        cols = self._columns(items)
+        counts = np.array(counts, dtype=np.int64)
+        for row in range(self.depth):
+            np.add.at(self.table[row], cols[row], counts)
+        for item, n in zip(items, self._lookup(cols)):
+            if n >= self.threshold:
+                self.exact[item] = 0
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError('Cannot merge sketches with different dimensions or seeds.')
+        self.table += other.table
+        self.total += other.total
+        for item, count in other.exact.items():
+            self.exact[item] = self.exact.get(item, 0) + count
+
+    def most_common(self, n=None):
+        """
+        Get `(item, count, error)` tuples for the exact table, highest first
+        """
+        items = list(self.exact)
+        bound = self.error_bound()
+        out = sorted(zip(items, self.estimate(items)), key=lambda x: x[1], reverse=True)
+        return [(i, c, bound) for i, c in out[:n]]
+
+    def error_bound(self):
+        """
+        The largest likely overestimate of any count (true with p >= 1 - delta)
+        """
+        import math
+        return int(math.ceil(self.epsilon * int(self.table[0].sum())))
+
+def summaries_to_frames(summaries, k=None):
+    """
+    Turn a dict of subcorpus names and summaries into results and errors
+
+    The columns are the `k` (or all listable) entries with the highest
+    combined counts. Summaries may be :class:`SpaceSaving` or
+    :class:`CountMinSketch` objects, but not a mix of the two. A
+    Space-Saving entry that a subcorpus did not keep is given a count of
+    zero there.
+
+    :returns: two `DataFrames` (counts and maximum overestimates), with the
+              same shape, and for Space-Saving summaries a boolean `Series`
+              saying whether each column is certainly among the most
+              frequent (otherwise `None`)
+    """
+    from pandas import DataFrame, Series
+    index = sorted(summaries.keys())
+    merged = None
+    for name in index:
+        if merged is None:
+            merged = summaries[name].empty()
+        merged += summaries[name]
+    columns = [i for i, _, _ in merged.most_common(k)] if merged is not None else []
+    counts, errors = [], []
+    for name in index:
+        summary = summaries[name]
+        if isinstance(summary, CountMinSketch):
+            counts.append(summary.estimate(columns))
+            errors.append([summary.error_bound()] * len(columns))
+        else:
+            counts.append([summary[i] for i in columns])
+            errors.append([summary.errors.get(i, 0) for i in columns])
+    df = DataFrame(counts, index=index, columns=columns)
+    err = DataFrame(errors, index=index, columns=columns)
+    guaranteed = None
+    if isinstance(merged, SpaceSaving):
+        guaranteed = Series([g for _, g in merged.guaranteed(len(columns))], index=columns)
+    return df, err, guaranteed
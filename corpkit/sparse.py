@@ -0,0 +1,158 @@
+"""
+corpkit: sparse storage of interrogation results
+
+With many subcorpora and a big vocabulary, nearly every cell of a results
+matrix is zero. These helpers build results as `scipy.sparse` matrices
+wrapped in sparse pandas objects, and do the common edits without
+filling in the zeros.
+"""
+
+from __future__ import print_function
+
+def is_sparse(data):
+    """
+    Check if a pandas object holds sparse data
+
+    :returns: `bool`
+    """
+    import pandas as pd
+    if hasattr(pd, 'SparseDataFrame'):
+        if isinstance(data, (pd.SparseDataFrame, pd.SparseSeries)):
+            return True
+    if not isinstance(data, (pd.DataFrame, pd.Series)):
+        return False
+    try:
+        data.sparse
+        return True
+    except AttributeError:
+        return False
+
+def from_coo(mat, index, columns):
+    """
+    Wrap a `scipy.sparse` matrix as a sparse `DataFrame`, with a fill value
+    of zero whatever the matrix's dtype
+    """
+    import pandas as pd
+    if hasattr(pd.DataFrame, 'sparse'):
+        df = pd.DataFrame.sparse.from_spmatrix(mat, index=index, columns=columns)
+        # some versions give float matrices nan as their fill value
+        return df.astype(pd.SparseDtype(mat.dtype, 0))
+    return pd.SparseDataFrame(mat, index=index, columns=columns, default_fill_value=0)
+
+def to_coo(df):
+    """
+    Get a `scipy.sparse.coo_matrix` from a sparse `DataFrame`
+    """
+    if hasattr(df, 'sparse'):
+        return df.sparse.to_coo()
+    return df.to_coo()
+
+def counters_to_sparse(results):
+    """
+    Make a sparse `DataFrame` from a dict of subcorpus names and `Counters`,
+    or from a :class:`corpkit.coded.CodedCounts` object
+
+    Columns are ordered by total frequency, most frequent first.
+    """
+    import numpy as np
+    from scipy.sparse import coo_matrix
+    from corpkit.coded import CodedCounts
+    if isinstance(results, CodedCounts):
+        index, words, mat = results.to_coo()
+        order = np.argsort(-np.asarray(mat.sum(axis=0)).ravel(), kind='mergesort')
+        return from_coo(mat[:, order], index, [words[i] for i in order])
+    index = sorted(results.keys())
+    vocab = {}
+    rows, cols, data = [], [], []
+    for row, name in enumerate(index):
+        for word, count in results[name].items():
+            if not count:
+                continue
+            rows.append(row)
+            cols.append(vocab.setdefault(word, len(vocab)))
+            data.append(count)
+    mat = coo_matrix((np.array(data, dtype=np.int64), (rows, cols)),
+                     shape=(len(index), len(vocab))).tocsc()
+    words = [None] * len(vocab)
+    for word, col in vocab.items():
+        words[col] = word
+    order = np.argsort(-np.asarray(mat.sum(axis=0)).ravel(), kind='mergesort')
+    mat = mat[:, order]
+    return from_coo(mat, index, [words[i] for i in order])
+
+def nonzero_rows(df):
+    """
+    Yield subcorpus names and `Series` of their non-zero results
+    """
+    from pandas import Series
+    mat = to_coo(df).tocsr()
+    columns = list(df.columns)
+    for row, name in enumerate(df.index):
+        start, end = mat.indptr[row], mat.indptr[row + 1]
+        yield name, Series(mat.data[start:end],
+                           index=[columns[i] for i in mat.indices[start:end]])
+
+def densify(data):
+    """
+    Turn sparse pandas data into a normal `DataFrame`/`Series`
+    """
+    if not is_sparse(data):
+        return data
+    if hasattr(data, 'sparse'):
+        return data.sparse.to_dense()
+    return data.to_dense()
+
+def scale_rows(df, factors):
+    """
+    Multiply each row of a sparse `DataFrame` by a factor
+    """
+    from scipy.sparse import diags
+    mat = diags([float(f) for f in factors]).dot(to_coo(df).tocsr())
+    return from_coo(mat.tocoo(), list(df.index), list(df.columns))
+
+def sparse_keywords(df, measure='ll', selfdrop=True):
+    """
+    Vectorised keyness of each subcorpus against the others
+
+    Scores are only calculated where a result occurs in a subcorpus, so
+    the output is as sparse as the input. This is the same as using
+    `calc_all=False` with :func:`corpkit.keys.keywords`.
+
+    :param measure: `'ll'` (log likelihood) or `'pd'` (percentage difference)
+    :param selfdrop: remove the subcorpus from the reference corpus
+
+    :returns: sparse `DataFrame` of scores
+    """
+    import numpy as np
+    from scipy.sparse import coo_matrix
+    coo = to_coo(df).tocoo()
+    row_sums = np.asarray(coo.sum(axis=1)).ravel().astype(float)
+    col_sums = np.asarray(coo.sum(axis=0)).ravel().astype(float)
+    total = row_sums.sum()
+    target = coo.data.astype(float)
+    target_sum = row_sums[coo.row]
+    ref = col_sums[coo.col]
+    ref_sum = np.repeat(total, len(target))
+    if selfdrop:
+        ref = ref - target
+        ref_sum = ref_sum - target_sum
+    with np.errstate(divide='ignore', invalid='ignore'):
+        norm_target = target / target_sum
+        norm_ref = ref / ref_sum
+        if measure == 'll':
+            both = ref + target
+            both_sums = ref_sum + target_sum
+            expected_ref = ref_sum * both / both_sums
+            expected_target = target_sum * both / both_sums
+            log_ref = np.where(ref > 0, np.log(ref / expected_ref), 0.0)
+            log_target = np.where(target > 0, np.log(target / expected_target), 0.0)
+            scores = 2 * (ref * log_ref + target * log_target)
+            scores = np.where(norm_target < norm_ref, -scores, scores)
+        elif measure == 'pd':
+            norm_ref = np.where(norm_ref == 0, 1e-26, norm_ref)
+            scores = ((norm_target - norm_ref) * 100.0) / norm_ref
+        else:
+            raise NotImplementedError("Only 'll' and 'pd' measures defined so far.")
+    scores = np.nan_to_num(scores)
+    mat = coo_matrix((scores, (coo.row, coo.col)), shape=coo.shape)
+    return from_coo(mat, list(df.index), list(df.columns))
@@ -20,7 +20,7 @@ class TextProgressBar:
     def animate_ipython(self, iter, dirname=None, quiet=False):
         from time import localtime, strftime
         import sys
-        if not self.quiet:
+        if not self.quiet and not quiet:
             print(str(self) + '\r', end='')
         try:
             sys.stdout.flush()